@@ -4,7 +4,7 @@ from django.contrib import admin
 # api/admin.py
 from django.contrib import admin
 # Ensure you import ALL the models you want to see
-from .models import User, Department, EmployeeProfile, Salary, TitleHistory, PayRun, PayStub
+from .models import User, Department, EmployeeProfile, Salary, TitleHistory, PayRun, PayStub, PayrollJob, ClerkWebhookEvent
 
 # Optional: Define custom admin displays for better usability
 class UserAdmin(admin.ModelAdmin):
@@ -17,6 +17,7 @@ class EmployeeProfileAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'user__first_name', 'user__last_name', 'job_title')
     list_filter = ('department',)
     raw_id_fields = ('user', 'department') # Makes linking easier
+    readonly_fields = ('current_salary', 'current_title') # Maintained from Salary / TitleHistory changes
 
     @admin.display(ordering='user__email', description='User Email')
     def get_user_email(self, obj):
@@ -42,6 +43,14 @@ class SalaryAdmin(admin.ModelAdmin):
     def get_employee_email(self, obj):
         return obj.employee.user.email if obj.employee else None
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.employee.sync_current_salary()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        obj.employee.sync_current_salary()
+
 
 class TitleHistoryAdmin(admin.ModelAdmin):
     list_display = ('get_employee_email', 'job_title', 'start_date', 'end_date') # Custom method
@@ -53,6 +62,14 @@ class TitleHistoryAdmin(admin.ModelAdmin):
     def get_employee_email(self, obj):
          return obj.employee.user.email if obj.employee else None
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.employee.sync_current_title()
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        obj.employee.sync_current_title()
+
 class PayRunAdmin(admin.ModelAdmin):
      list_display = ('id', 'start_date', 'end_date', 'pay_date', 'status', 'processed_at')
      list_filter = ('status', 'pay_date')
@@ -70,6 +87,19 @@ class PayStubAdmin(admin.ModelAdmin):
          return obj.employee.user.email if obj.employee else None
      
 
+class PayrollJobAdmin(admin.ModelAdmin):
+     list_display = ('id', 'pay_run', 'status', 'processed', 'total', 'attempts', 'worker', 'updated_at')
+     list_filter = ('status',)
+     raw_id_fields = ('pay_run',)
+     readonly_fields = ('created_at', 'started_at', 'finished_at', 'updated_at')
+
+class ClerkWebhookEventAdmin(admin.ModelAdmin):
+     list_display = ('id', 'event_type', 'clerk_id', 'occurred_at', 'received_at', 'processed_at', 'error')
+     list_filter = ('event_type',)
+     search_fields = ('clerk_id', 'event_id')
+     readonly_fields = ('received_at',)
+
+
 # === Register your models with the admin site ===
 # Make sure ALL these lines are present and uncommented
 admin.site.register(User, UserAdmin)
@@ -79,3 +109,5 @@ admin.site.register(Salary, SalaryAdmin)
 admin.site.register(TitleHistory, TitleHistoryAdmin)
 admin.site.register(PayRun, PayRunAdmin)
 admin.site.register(PayStub, PayStubAdmin)
+admin.site.register(PayrollJob, PayrollJobAdmin)
+admin.site.register(ClerkWebhookEvent, ClerkWebhookEventAdmin)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registers the search index receivers)
+        from django.conf import settings
+        if settings.WARMUP_ON_START:
+            from . import warmup
+            warmup.start()
@@ -1,16 +1,24 @@
 # api/auth_utils.py
 import os
+import hashlib
+import threading
 import requests
 import time
-from functools import wraps
-from jose import jwt # Using python-jose which handles jwk well
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import timedelta
+from types import MappingProxyType
+from jose import jwk, jwt # Using python-jose which handles jwk well
 from jose.exceptions import JOSEError, JWTError
-from django.core.cache import cache  # Use Django's cache instead of SimpleCache
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import APIException, AuthenticationFailed, PermissionDenied
 from rest_framework.permissions import BasePermission
-from rest_framework.response import Response
-from rest_framework import status
 from dotenv import load_dotenv
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from hrms_backend import config_loader
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,52 +27,346 @@ from .models import User, EmployeeProfile
 load_dotenv()
 
 
-# Function to get JWKs with caching
+# --- JWKS Key Manager ---
+# Issuer and JWKS URL come from settings (CLERK_ISSUER_URL / CLERK_JWKS_URL), so a local stand-in
+# (`manage.py clerk_standin`) can replace Clerk for offline and load testing.
+
+
+class JWKSKeyManager:
+    """
+    Process-wide holder of Clerk's signing keys.
+
+    Keys are parsed once into a kid -> jose Key map and swapped in atomically. Shortly before
+    the TTL runs out they are refreshed by a background thread. Fetches are single-flight:
+    concurrent cold callers wait for the one fetch in flight, and failed fetches are not
+    retried more often than every `retry_interval` seconds. If the IdP is unreachable the
+    last-known-good keys keep being served.
+
+    With a `store_path`, the workers on a host share one JWKS snapshot file (atomic replace,
+    refreshes serialised with flock, as for the SSM snapshot). A worker whose keys are due first
+    adopts a newer snapshot written by another worker and only fetches when there is none, so a
+    host makes one fetch per TTL. On a cold start the store, then the packaged `fallback_path`
+    snapshot (`manage.py snapshot_jwks`), provide keys before any network call; if they are
+    stale, the refresh then runs in the background.
+    """
+    def __init__(self, url, ttl=3600, refresh_ahead=300, retry_interval=30, timeout=10, store_path=None, fallback_path=None):
+        self.url = url
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.store_path = store_path
+        self.fallback_path = fallback_path
+        self.fetch_count = 0
+        self._keys = {}
+        self._jwks = None
+        self._fetched_at = 0.0
+        self._expires_at = 0.0
+        self._last_attempt = 0.0
+        self._fetch_lock = threading.Lock()
+
+    @property
+    def has_keys(self):
+        return bool(self._keys)
+
+    def get_key(self, kid):
+        """ Returns the parsed key for `kid`, or None if it is unknown (or no keys could ever be fetched). """
+        self._ensure_keys()
+        key = self._keys.get(kid)
+        if key is None and self._keys:
+            # Unknown kid: the keys may have been rotated, so refresh once (still rate limited)
+            self._refresh(blocking=True, force=True)
+            key = self._keys.get(kid)
+        return key
+
+    def get_jwks(self):
+        """ The raw JWKS document behind the current keys. """
+        self._ensure_keys()
+        return self._jwks
+
+    def snapshot(self):
+        """ The current keys in the store / fallback file format. """
+        return {'url': self.url, 'jwks': self._jwks, 'fetched_at': self._fetched_at}
+
+    def _ensure_keys(self):
+        if not self._keys:
+            with self._fetch_lock:
+                if not self._keys: # Cold start: local snapshots first, no network
+                    for path in (self.store_path, self.fallback_path):
+                        if path and self._adopt(config_loader.read_snapshot(path)):
+                            break
+            if not self._keys:
+                self._refresh(blocking=True)
+                return
+        if time.time() >= self._expires_at - self.refresh_ahead:
+            self._refresh(blocking=False)
+
+    def _is_current(self):
+        return time.time() < self._expires_at - self.refresh_ahead
+
+    def _should_fetch(self, force):
+        if not force and self._keys and self._is_current():
+            return False # Another caller refreshed while we were waiting
+        return time.time() - self._last_attempt >= self.retry_interval
+
+    def _refresh(self, blocking, force=False):
+        if blocking:
+            with self._fetch_lock:
+                if self._should_fetch(force):
+                    self._update(force)
+            return
+        if not self._fetch_lock.acquire(blocking=False):
+            return # A refresh is already in flight
+        def refresh_in_background():
+            try:
+                if self._should_fetch(force):
+                    self._update(force)
+            finally:
+                self._fetch_lock.release()
+        threading.Thread(target=refresh_in_background, name='jwks-refresh', daemon=True).start()
+
+    def _update(self, force):
+        """ Refreshes the keys: from the shared store when another worker just did, else from the IdP. """
+        if not self.store_path:
+            return self._fetch()
+        if self._adopt(config_loader.read_snapshot(self.store_path)) and (force or self._is_current()):
+            return True
+        try:
+            with config_loader.refresh_lock(self.store_path):
+                snapshot = config_loader.read_snapshot(self.store_path)
+                if self._adopt(snapshot) and (force or self._is_current()):
+                    return True # Another worker refreshed while we waited for the lock
+                if snapshot.get('url') == self.url and time.time() - snapshot.get('failed_at', 0) < self.retry_interval:
+                    return False # Another worker just failed to reach the IdP
+                fetched = self._fetch()
+                if fetched:
+                    snapshot = self.snapshot()
+                else: # Recorded so the other workers wait out the retry interval too
+                    snapshot = {**(snapshot if snapshot.get('url') == self.url else {'url': self.url}), 'failed_at': time.time()}
+                try:
+                    config_loader.write_snapshot(self.store_path, snapshot)
+                except OSError as exc:
+                    logger.warning("Could not write the shared JWKS store %s: %s", self.store_path, exc)
+                return fetched
+        except OSError as exc: # No lock file (read-only directory): this worker fetches on its own
+            logger.warning("Could not lock the shared JWKS store %s: %s", self.store_path, exc)
+            return self._fetch()
+
+    def _adopt(self, snapshot):
+        """ Takes a stored snapshot's keys if they are for our URL and newer than the ones held. """
+        fetched_at = snapshot.get('fetched_at', 0)
+        if snapshot.get('url') != self.url or fetched_at <= self._fetched_at:
+            return False
+        try:
+            keys = self._parse(snapshot['jwks'])
+        except (ValueError, KeyError, TypeError, AttributeError, JOSEError) as e:
+            logger.warning(f"Ignoring unreadable stored JWKS: {e}")
+            return False
+        if not keys:
+            return False
+        self._keys, self._jwks, self._fetched_at = keys, snapshot['jwks'], fetched_at
+        self._expires_at = fetched_at + self.ttl
+        return True
+
+    @staticmethod
+    def _parse(jwks_data):
+        return {key['kid']: jwk.construct(key, key.get('alg', 'RS256'))
+                for key in jwks_data.get('keys', []) if key.get('kid') and key.get('use', 'sig') == 'sig'}
+
+    def _fetch(self):
+        self._last_attempt = time.time()
+        self.fetch_count += 1
+        try:
+            response = requests.get(self.url, timeout=self.timeout)
+            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+            jwks_data = response.json()
+            keys = self._parse(jwks_data)
+        except (requests.exceptions.RequestException, ValueError, KeyError, AttributeError, JOSEError) as e:
+            # ValueError covers JSON decoding errors
+            logger.error(f"Error refreshing JWKS, keeping {len(self._keys)} last-known-good keys: {e}")
+            return False
+        if not keys:
+            logger.error("JWKS response contained no signing keys, keeping last-known-good keys.")
+            return False
+        self._keys, self._jwks = keys, jwks_data
+        self._fetched_at = time.time()
+        self._expires_at = self._fetched_at + self.ttl
+        return True
+
+
+jwks_manager = JWKSKeyManager(
+    settings.CLERK_JWKS_URL,
+    ttl=getattr(settings, 'CLERK_JWKS_CACHE_TTL', 3600),
+    refresh_ahead=getattr(settings, 'CLERK_JWKS_REFRESH_AHEAD', 300),
+    store_path=getattr(settings, 'CLERK_JWKS_STORE', None),
+    fallback_path=getattr(settings, 'CLERK_JWKS_FALLBACK', None),
+)
+
+
 def get_jwks():
-    jwks = cache.get('jwks')
-    if jwks:
-        return jwks
-    try:
-        response = requests.get("https://balanced-parrot-21.clerk.accounts.dev/.well-known/jwks.json", timeout=10) # Added timeout
-        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-        jwks_data = response.json()
-        cache.set('jwks', jwks_data, timeout=3600) # Cache for 1 hour
-        return jwks_data
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching JWKS: {e}")
-        return None # Return None if fetch fails
-    except ValueError as e: # Catches JSON decoding errors
-        logger.error(f"Error decoding JWKS JSON: {e}")
-        return None
+    return jwks_manager.get_jwks()
+
+
+# --- Verified Token Cache ---
+class VerifiedTokenCache:
+    """
+    Bounded, thread-safe LRU of verified token claims.
+    Keyed by the SHA-256 of the raw token (the token itself is never stored); each entry
+    is served only until the token's own `exp` claim, so expiry is still enforced.
+    """
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (claims, expires_at)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0]) # Copy: callers must not mutate the cached claims
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, token, claims):
+        expires_at = claims.get('exp')
+        if not isinstance(expires_at, (int, float)) or self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (dict(claims), expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'max_size': self.max_size}
+
+
+token_cache = VerifiedTokenCache(max_size=getattr(settings, 'CLERK_TOKEN_CACHE_SIZE', 1024))
+
+
+# --- Cached User/Role Resolution ---
+class PrincipalCache:
+    """
+    Process-local clerk_id -> (pk, role, is_active) cache with a short TTL, so authenticated
+    requests skip the User lookup. Every process keeps its own copy, so invalidate() only
+    reaches the calling process. Other processes see a change through User.updated_at: at most
+    every `sync_interval` seconds, a lookup first evicts the users updated since the previous
+    check (one indexed query). Writes that change role or is_active must therefore bump
+    updated_at (save() does; bulk_update/update() must list it); the TTL is only a backstop.
+    """
+    SYNC_OVERLAP = 5 # Seconds re-checked each time, for clock skew between hosts and late commits
+
+    def __init__(self, ttl=30, sync_interval=2):
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self._entries = {} # clerk_id -> ((pk, role, is_active), expires_at)
+        self._lock = threading.Lock()
+        self._synced_at = timezone.now()
+        self._next_sync = time.monotonic() + sync_interval
+
+    def get(self, clerk_id):
+        self.sync()
+        with self._lock:
+            entry = self._entries.get(clerk_id)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[clerk_id]
+                return None
+            return entry[0]
+
+    def sync(self):
+        """ Evicts users other processes changed since the last check, once `sync_interval` has passed. """
+        with self._lock:
+            if time.monotonic() < self._next_sync:
+                return
+            self._next_sync = time.monotonic() + self.sync_interval
+            since, self._synced_at = self._synced_at, timezone.now()
+            if not self._entries: # Nothing to evict; entries added from now on are newer than `since`
+                return
+        changed = list(User.objects.filter(updated_at__gte=since - timedelta(seconds=self.SYNC_OVERLAP)).values_list('clerk_id', flat=True))
+        with self._lock:
+            for clerk_id in changed:
+                self._entries.pop(clerk_id, None)
+
+    def set(self, user):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user.pk] = ((user.pk, user.role, user.is_active), time.monotonic() + self.ttl)
+
+    def invalidate(self, clerk_id):
+        with self._lock:
+            self._entries.pop(clerk_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._synced_at = timezone.now()
+            self._next_sync = time.monotonic() + self.sync_interval
+
+
+principal_cache = PrincipalCache(ttl=getattr(settings, 'CLERK_PRINCIPAL_CACHE_TTL', 30),
+                                 sync_interval=getattr(settings, 'CLERK_PRINCIPAL_SYNC_INTERVAL', 2))
+
+
+def invalidate_cached_principal(clerk_id):
+    """ Evicts `clerk_id` in this process only, so its next request sees the change at once. """
+    principal_cache.invalidate(clerk_id)
+
+
+def resolve_user(clerk_user_id):
+    """
+    Returns the User for a Clerk id, raising User.DoesNotExist. Cache hits return an instance
+    with only clerk_id/role/is_active loaded; other fields are fetched lazily if accessed.
+    """
+    cached = principal_cache.get(clerk_user_id)
+    if cached is not None:
+        return User.from_db(User.objects.db, ['clerk_id', 'role', 'is_active'], list(cached))
+    user = User.objects.get(clerk_id=clerk_user_id)
+    principal_cache.set(user)
+    return user
+
 
 # --- Verification Function ---
 def verify_clerk_token(token):
-    jwks = get_jwks()
-    if not jwks:
-        raise JWTError("Could not retrieve JWKS.")
+    cached_claims = token_cache.get(token)
+    if cached_claims is not None:
+        return cached_claims
 
     try:
         # Get the Key ID from the token header (unverified)
         unverified_header = jwt.get_unverified_header(token)
-        rsa_key = {}
-        for key in jwks["keys"]:
-            if key["kid"] == unverified_header.get("kid"):
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"],
-                }
-        if not rsa_key:
-             raise JWTError("Unable to find appropriate key")
+        rsa_key = jwks_manager.get_key(unverified_header.get("kid"))
+        if rsa_key is None:
+            if not jwks_manager.has_keys:
+                raise JWTError("Could not retrieve JWKS.")
+            raise JWTError("Unable to find appropriate key")
 
         # Decode and verify the token
         payload = jwt.decode(
             token,
             rsa_key,
             algorithms=["RS256"],
-            issuer="https://balanced-parrot-21.clerk.accounts.dev",
+            issuer=settings.CLERK_ISSUER_URL,
             # Audience might be the frontend API key/publishable key or specific identifier
             # Set audience validation based on Clerk settings if needed. Often can be omitted initially.
             # audience="YOUR_CLERK_AUDIENCE"
@@ -75,137 +377,141 @@ def verify_clerk_token(token):
             }
         )
         # Additional checks? (e.g., minimum security level if using `acr` claim)
+        token_cache.set(token, payload)
         return payload
 
     except JWTError as e:
-        logger.error(f"Token validation error: {e}") # Log specific error
+        logger.warning("Token validation error: %s", e) # Expired/invalid tokens are routine: rate limited, not ERROR
         raise # Re-raise the JWTError
     except Exception as e:
          logger.error(f"An unexpected error occurred during token verification: {e}")
          raise JWTError(f"Unexpected verification error: {e}")
 
 
-class HasClerkRole(BasePermission):
-    message = 'Authentication failed or required role missing.'
+# --- Authentication (once per request) ---
+@dataclass(frozen=True)
+class ClerkPrincipal:
+    """ Immutable identity attached to request.user by ClerkAuthentication. """
+    clerk_id: str
+    role: str
+    is_active: bool
+    claims: Mapping = field(default_factory=dict, compare=False, hash=False)
 
-    def __init__(self, allowed_roles=None):
-        self.allowed_roles = list(allowed_roles) if allowed_roles else ['employee', 'hr_manager', 'admin']
+    is_authenticated = True
+    is_anonymous = False
 
-    def has_permission(self, request, view):
+    @property
+    def pk(self):
+        return self.clerk_id
+
+
+class ClerkAuthentication(BaseAuthentication):
+    """
+    Verifies the Clerk bearer token once per request (DRF caches request.user) and
+    provisions unknown users just in time. Role checks are left to the permission classes below.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
         auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            self.message = 'Unauthorized: Missing or invalid Authorization header.'
-            return False
+        if not auth_header:
+            return None # Anonymous; permission classes answer 401
+        if not auth_header.startswith(f'{self.keyword} '):
+            raise AuthenticationFailed('Unauthorized: Missing or invalid Authorization header.')
         token = auth_header.split(' ')[1]
         try:
             session_claims = verify_clerk_token(token)
-            logger.info(f"HasClerkRole: Token verified. Claims: {session_claims}")
-            clerk_user_id = session_claims.get('sub')
-            if not clerk_user_id:
-                 self.message = 'Unauthorized: Invalid token claims (missing sub).'
-                 return False
+        except JWTError as e: # Already logged by verify_clerk_token
+            raise AuthenticationFailed(f'Unauthorized: Token validation failed - {e}')
 
-            # Try fetching the user first
-            try:
-                logger.info(f"HasClerkRole: Attempting User.objects.get(clerk_id='{clerk_user_id}')")
-                user = User.objects.get(clerk_id=clerk_user_id)
-                logger.info(f"HasClerkRole: User {clerk_user_id} found in DB: {user.email}")
-                if not user.is_active:
-                     self.message = 'User account is inactive.'
-                     logger.warning(f"HasClerkRole: User {user.email} is inactive.")
-                     return False
-                # User exists and is active, fall through to role check below
-
-            # === START JIT Provisioning Block ===
-            except User.DoesNotExist:
-                logger.info(f"User {clerk_user_id} not found locally. Attempting JIT provisioning.")
-                try:
-                    # Extract details needed for creation from verified token
-                    email = session_claims.get('email')
-                    first_name = session_claims.get('given_name') or session_claims.get('firstName') or ''
-                    last_name = session_claims.get('family_name') or session_claims.get('lastName') or ''
-
-                    if not email:
-                        # Cannot create user without email
-                        self.message = 'Forbidden: Cannot create user profile, missing email claim in token.'
-                        return False # Fail permission check
-
-                    # Create the local User record
-                    user = User.objects.create(
-                        clerk_id=clerk_user_id,
-                        email=email,
-                        first_name=first_name,
-                        last_name=last_name,
-                        role='employee',  # Assign default role
-                        is_active=True
-                    )
-                    logger.info(f"Created new local user {user.email} via JIT.")
-
-                    # Create the associated EmployeeProfile record
-                    EmployeeProfile.objects.create(
-                        user=user,
-                        job_title='Pending Assignment'
-                    )
-
-                    # User is now created, continue to role check with this new 'user' object
-
-                except Exception as jit_e:
-                    # Catch potential errors during DB creation
-                    logger.error(f"Failed JIT database provisioning for {clerk_user_id}: {jit_e}", exc_info=True)
-                    self.message = 'Internal Server Error: Could not provision user profile during login.'
-                    return False # Fail permission check if JIT DB operation fails
-            # === END JIT Provisioning Block ===
-
-            # --- Permission Granted So Far: Attach user to request ---
-            # This 'user' object is either the one found or the one just created by JIT
-            request.user_profile = user
-            request.clerk_user_id = clerk_user_id
-            request.session_claims = session_claims
-
-            # --- Final Role Check ---
-            if user.role not in self.allowed_roles:
-                self.message = f'Forbidden: Role "{user.role}" does not have permission. Required: {self.allowed_roles}'
-                return False # Role doesn't match requirement for this permission instance
-
-            # --- All Checks Passed ---
-            return True
+        clerk_user_id = session_claims.get('sub')
+        if not clerk_user_id:
+            raise AuthenticationFailed('Unauthorized: Invalid token claims (missing sub).')
+        logger.debug("ClerkAuthentication: Token verified for %s", clerk_user_id) # Lazy args: this runs on every request
 
-        except JWTError as e:
-            self.message = f'Unauthorized: Token validation failed - {e}'
-            logger.error(f"HasClerkRole: JWTError during token validation: {e}", exc_info=True)
-            return False
-        except Exception as e:
-            logger.error(f"Unexpected error in HasClerkRole permission check: {e}")
-            self.message = 'Internal Server Error during authentication check.'
-            logger.error(f"HasClerkRole: Unexpected error in permission check: {e}", exc_info=True) 
-            return False
+        try:
+            user = resolve_user(clerk_user_id)
+        except User.DoesNotExist:
+            user = self.provision_user(clerk_user_id, session_claims)
+        if not user.is_active:
+            logger.warning("ClerkAuthentication: User %s is inactive.", clerk_user_id)
+            raise PermissionDenied('User account is inactive.')
 
+        principal = ClerkPrincipal(clerk_id=user.pk, role=user.role, is_active=user.is_active,
+                                   claims=MappingProxyType(dict(session_claims)))
+        return (principal, principal.claims)
 
-def clerk_auth_required(allowed_roles=None):
-    if allowed_roles is None:
-        allowed_roles = ['employee', 'hr_manager', 'admin']
+    def authenticate_header(self, request):
+        return self.keyword
+
+    @staticmethod
+    def provision_user(clerk_user_id, session_claims):
+        """ JIT provisioning: creates the local User and EmployeeProfile from the verified token. """
+        logger.info(f"User {clerk_user_id} not found locally. Attempting JIT provisioning.")
+        # Extract details needed for creation from verified token
+        email = session_claims.get('email')
+        first_name = session_claims.get('given_name') or session_claims.get('firstName') or ''
+        last_name = session_claims.get('family_name') or session_claims.get('lastName') or ''
+        if not email:
+            # Cannot create user without email
+            raise PermissionDenied('Forbidden: Cannot create user profile, missing email claim in token.')
+        try:
+            with transaction.atomic():
+                user = User.objects.create(
+                    clerk_id=clerk_user_id,
+                    email=email,
+                    first_name=first_name,
+                    last_name=last_name,
+                    role='employee',  # Assign default role
+                    is_active=True
+                )
+                EmployeeProfile.objects.create(user=user, job_title='Pending Assignment')
+        except Exception as jit_e:
+            # Catch potential errors during DB creation
+            logger.error(f"Failed JIT database provisioning for {clerk_user_id}: {jit_e}", exc_info=True)
+            raise APIException('Internal Server Error: Could not provision user profile during login.')
+        logger.info(f"Created new local user {user.email} via JIT.")
+        principal_cache.set(user)
+        return user
+
+
+# --- Stateless Role Permissions ---
+class HasClerkRole(BasePermission):
+    """ Grants access when ClerkAuthentication attached a principal with one of `allowed_roles`. """
+    allowed_roles = ('employee', 'hr_manager', 'admin')
+    message = 'Forbidden: Your role does not have permission for this action.'
+
+    def has_permission(self, request, view):
+        principal = request.user
+        return isinstance(principal, ClerkPrincipal) and principal.role in self.allowed_roles
+
+
+class IsClerkEmployee(HasClerkRole):
+    allowed_roles = ('employee', 'hr_manager', 'admin')
+
+
+class IsClerkHr(HasClerkRole):
+    allowed_roles = ('hr_manager', 'admin')
+
+
+class IsClerkAdmin(HasClerkRole):
+    allowed_roles = ('admin',)
+
+
+def _requires(permission):
+    # Same effect as rest_framework.decorators.permission_classes, which cannot be imported
+    # here: DRF loads this module (DEFAULT_AUTHENTICATION_CLASSES) while importing its views.
     def decorator(view_func):
-        @wraps(view_func)
-        def _wrapped_view(request, *args, **kwargs):
-            # Use an INSTANCE here internally
-            checker = HasClerkRole(allowed_roles=allowed_roles)
-            if checker.has_permission(request, None):
-                return view_func(request, *args, **kwargs)
-            else:
-                status_code = status.HTTP_401_UNAUTHORIZED
-                if 'Forbidden' in checker.message or 'inactive' in checker.message:
-                    status_code = status.HTTP_403_FORBIDDEN
-                return Response({"detail": checker.message}, status=status_code)
-        return _wrapped_view
+        view_func.permission_classes = [permission]
+        return view_func
     return decorator
 
-# --- Create Specific Decorators using the factory ---
-clerk_auth_employee = clerk_auth_required(allowed_roles=['employee', 'hr_manager', 'admin'])
-clerk_auth_hr = clerk_auth_required(allowed_roles=['hr_manager', 'admin'])
-clerk_auth_admin = clerk_auth_required(allowed_roles=['admin'])
 
+def clerk_auth_required(allowed_roles=None):
+    """ FBV decorator (apply below @api_view): requires one of `allowed_roles`. """
+    return _requires(type('HasClerkRoleFor', (HasClerkRole,), {'allowed_roles': tuple(allowed_roles or HasClerkRole.allowed_roles)}))
 
-# --- Convenience INSTANCES of Permission Class (for CBVs) ---
-IsClerkEmployee = HasClerkRole(allowed_roles=['employee', 'hr_manager', 'admin'])
-IsClerkHr = HasClerkRole(allowed_roles=['hr_manager', 'admin'])
-IsClerkAdmin = HasClerkRole(allowed_roles=['admin'])
+# --- Specific Decorators ---
+clerk_auth_employee = _requires(IsClerkEmployee)
+clerk_auth_hr = _requires(IsClerkHr)
+clerk_auth_admin = _requires(IsClerkAdmin)
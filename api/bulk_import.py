@@ -0,0 +1,229 @@
+# api/bulk_import.py
+"""
+Bulk employee import from CSV (one row per employee; see COLUMNS).
+
+Rows are read lazily and handled in batches. Per batch, one query loads the existing users with
+their profile and current salary/title, then users and profiles are upserted with
+bulk_create(update_conflicts=True) and salary/title history is written with bulk_create and
+bulk_update, so round trips grow with the number of batches instead of rows. Rows that fail
+validation are reported and skipped; if a batch still fails in the database, its rows are
+retried one at a time so only the offending ones are reported.
+
+Role, active status and existing users' emails are admin-only, as in UserViewSet: importers created
+without `manage_users` (HR uploads) reject rows that would change them.
+
+Bulk writes bypass model signals: each batch syncs the profiles' current pointers and search
+tokens itself, and the dashboard counters are reconciled once at the end of an import.
+"""
+import csv
+import operator
+from functools import reduce
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import search, stats
+from .auth_utils import invalidate_cached_principal
+from .models import User, Department, EmployeeProfile, Salary, TitleHistory
+from .serializers import EmployeeImportRowSerializer
+
+DEFAULT_BATCH_SIZE = 500
+USER_FIELDS = ['email', 'first_name', 'last_name', 'role', 'is_active']
+PROFILE_FIELDS = ['department', 'job_title', 'hire_date', 'phone_number', 'address', 'onboarding_status', 'onboarding_start_date']
+COLUMNS = ['clerk_id', *USER_FIELDS, *PROFILE_FIELDS, 'salary', 'salary_effective_date', 'title_start_date']
+REQUIRED_COLUMNS = ['clerk_id', 'email']
+ADMIN_ONLY_FIELDS = ['role', 'is_active'] # Plus `email` of existing users
+
+
+def get_batch_size():
+    return int(getattr(settings, 'EMPLOYEE_IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+
+def read_csv(lines):
+    """ (line number, {column: value}) pairs from CSV text lines; raises ValueError for a bad header. """
+    reader = csv.DictReader(lines)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return ((reader.line_num, row) for row in reader)
+
+
+def upsert(model, objs, unique_fields, update_fields):
+    if not connection.features.supports_update_conflicts_with_target:
+        unique_fields = None # MySQL: ON DUPLICATE KEY UPDATE takes no conflict target
+    model.objects.bulk_create(objs, update_conflicts=True, unique_fields=unique_fields, update_fields=update_fields)
+
+
+def sync_pointers(profile_ids, now):
+    """ Set-based EmployeeProfile.sync_current_salary() + sync_current_title(): one UPDATE with correlated subqueries. """
+    salary = Salary.objects.filter(employee=OuterRef('pk'), is_current=True).order_by('-effective_date', '-id').values('id')[:1]
+    title = TitleHistory.objects.filter(employee=OuterRef('pk')).order_by('-start_date', '-id').values('id')[:1]
+    EmployeeProfile.objects.filter(pk__in=profile_ids).update(current_salary=Subquery(salary), current_title=Subquery(title), updated_at=now)
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.salaries = 0
+        self.titles = 0
+        self.errors = [] # [{'row': CSV line number, 'errors': {field: [messages]}}]
+
+    def add_error(self, line, errors):
+        self.errors.append({'row': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'updated': self.updated, 'salaries': self.salaries,
+                'titles': self.titles, 'failed': len(self.errors), 'errors': self.errors}
+
+
+class EmployeeImporter:
+    def __init__(self, batch_size=None, manage_users=False):
+        self.batch_size = batch_size or get_batch_size()
+        self.manage_users = manage_users
+        self.report = ImportReport()
+        self.departments = dict(Department.objects.values_list('name', 'id'))
+        self.seen_ids, self.seen_emails = set(), set() # Duplicates are rejected across the whole file
+        self.row_serializer = EmployeeImportRowSerializer() # Reused: building the fields per row dominated validation
+
+    def run(self, rows):
+        """ Imports (line number, {column: value}) pairs and returns the ImportReport. """
+        try:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        finally:
+            if self.report.created or self.report.updated:
+                stats.reconcile()
+        return self.report
+
+    def import_batch(self, batch):
+        rows = self.validate(batch)
+        if not rows:
+            return
+        try:
+            self.write(rows)
+        except DatabaseError:
+            for row in rows:
+                try:
+                    self.write([row])
+                except DatabaseError as exc:
+                    self.report.add_error(row[0], {'non_field_errors': [str(exc)]})
+
+    def validate(self, batch):
+        """ Field validation per row, then the uniqueness checks that need the database (two queries per batch). """
+        candidates = []
+        for line, raw in batch:
+            try:
+                data = self.row_serializer.run_validation({
+                    column: value.strip() for column, value in raw.items()
+                    if column in COLUMNS and isinstance(value, str) and value.strip()})
+            except ValidationError as exc:
+                self.report.add_error(line, exc.detail)
+                continue
+            errors = {}
+            if data['clerk_id'] in self.seen_ids:
+                errors['clerk_id'] = ['Duplicate clerk_id in this file.']
+            if data['email'].lower() in self.seen_emails:
+                errors['email'] = ['Duplicate email in this file.']
+            if 'department' in data and data['department'] not in self.departments:
+                errors['department'] = [f"Unknown department '{data['department']}'."]
+            self.seen_ids.add(data['clerk_id'])
+            self.seen_emails.add(data['email'].lower())
+            if errors:
+                self.report.add_error(line, errors)
+            else:
+                candidates.append((line, data))
+
+        existing = {user.pk: user for user in User.objects.select_related('profile__current_salary', 'profile__current_title')
+                                                          .filter(clerk_id__in=[data['clerk_id'] for _, data in candidates])}
+        # Emails are unique regardless of case (MySQL's collation): an owner differing only in case must be found too
+        owners = {}
+        if candidates:
+            by_email = reduce(operator.or_, (Q(email__iexact=data['email']) for _, data in candidates))
+            owners = {email.lower(): clerk_id for email, clerk_id in User.objects.filter(by_email).values_list('email', 'clerk_id')}
+        rows = []
+        for line, data in candidates:
+            user = existing.get(data['clerk_id'])
+            restricted = [] if self.manage_users else self.admin_only_changes(data, user)
+            if restricted:
+                self.report.add_error(line, {field: ['Only admins can change this field.'] for field in restricted})
+            elif owners.get(data['email'].lower(), data['clerk_id']) != data['clerk_id']:
+                self.report.add_error(line, {'email': ['Email is already used by another user.']})
+            elif getattr(user, 'profile', None) is None and 'job_title' not in data:
+                self.report.add_error(line, {'job_title': ['Required for new employees.']})
+            else:
+                rows.append((line, data, user))
+        return rows
+
+    @staticmethod
+    def admin_only_changes(data, user):
+        """ Admin-only fields the row would change: against the stored user, or the defaults for a new one. """
+        base = user or User()
+        changed = [field for field in ADMIN_ONLY_FIELDS if field in data and data[field] != getattr(base, field)]
+        if user is not None and data['email'] != user.email:
+            changed.append('email')
+        return changed
+
+    def write(self, rows):
+        """ Writes validated (line, data, existing user or None) rows in one transaction. """
+        now = timezone.now()
+        today = now.date()
+        users, profiles, salaries, titles, closed_titles = [], [], [], [], []
+        updated_ids, salary_ids = [], []
+        for line, data, existing_user in rows:
+            clerk_id = data['clerk_id']
+            existing_profile = getattr(existing_user, 'profile', None)
+            # Omitted columns keep their stored (or, for new rows, default) values
+            base_user = existing_user or User()
+            users.append(User(clerk_id=clerk_id, **{field: data.get(field, getattr(base_user, field)) for field in USER_FIELDS}))
+            base_profile = existing_profile or EmployeeProfile()
+            values = {field: data.get(field, getattr(base_profile, field)) for field in PROFILE_FIELDS if field != 'department'}
+            department_id = self.departments[data['department']] if 'department' in data else base_profile.department_id
+            profiles.append(EmployeeProfile(user_id=clerk_id, department_id=department_id, **values))
+            if existing_user is not None:
+                updated_ids.append(clerk_id)
+
+            # Title history, as manage_employee_profile records it: close the open entry, start a new one
+            current_title = existing_profile.current_title if existing_profile else None
+            if 'job_title' in data and (current_title is None or current_title.job_title != data['job_title']):
+                start_date = data.get('title_start_date') or (values['hire_date'] if current_title is None else None) or today
+                if current_title is not None and current_title.end_date is None:
+                    closed_titles.append(TitleHistory(pk=current_title.pk, end_date=max(start_date - timezone.timedelta(days=1), current_title.start_date)))
+                titles.append(TitleHistory(employee_id=clerk_id, job_title=data['job_title'], start_date=start_date))
+
+            # Salary, as SalaryViewSet.create records it: the new row becomes the only current one
+            current_salary = existing_profile.current_salary if existing_profile else None
+            if 'salary' in data and (current_salary is None or current_salary.amount != data['salary'] or
+                                     data.get('salary_effective_date', current_salary.effective_date) != current_salary.effective_date):
+                # Only a first salary defaults to the hire date: back-dating a raise would put it before the salary it replaces
+                effective_date = data.get('salary_effective_date') or (values['hire_date'] if current_salary is None else None) or today
+                salaries.append(Salary(employee_id=clerk_id, amount=data['salary'], effective_date=effective_date, is_current=True))
+                salary_ids.append(clerk_id)
+
+        profile_ids = [profile.pk for profile in profiles]
+        with transaction.atomic():
+            upsert(User, users, ['clerk_id'], [*USER_FIELDS, 'updated_at'])
+            upsert(EmployeeProfile, profiles, ['user'], [*PROFILE_FIELDS, 'updated_at'])
+            if closed_titles:
+                TitleHistory.objects.bulk_update(closed_titles, ['end_date'])
+            if salary_ids:
+                Salary.objects.filter(employee_id__in=salary_ids, is_current=True).update(is_current=False)
+            Salary.objects.bulk_create(salaries)
+            TitleHistory.objects.bulk_create(titles)
+            sync_pointers(profile_ids, now)
+            search.reindex_profiles(EmployeeProfile.objects.filter(pk__in=profile_ids))
+        for clerk_id in updated_ids: # Role / is_active may have changed
+            invalidate_cached_principal(clerk_id)
+
+        self.report.created += len(rows) - len(updated_ids)
+        self.report.updated += len(updated_ids)
+        self.report.salaries += len(salaries)
+        self.report.titles += len(titles)
@@ -0,0 +1,130 @@
+# api/clerk_standin.py
+"""
+Local stand-in for Clerk's token issuer, for offline development and load testing.
+
+It holds one RSA signing key, persisted as a PEM file so restarts keep the same `kid` and other
+processes (e.g. `manage.py load_test`) can mint tokens from the same file without a network hop.
+`manage.py clerk_standin` serves the public key as a JWKS document and mints session tokens over
+HTTP. Point the backend at it with CLERK_ISSUER_URL / CLERK_JWKS_URL.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+JWKS_PATH = '/.well-known/jwks.json'
+TOKENS_PATH = '/tokens'
+DEFAULT_TOKEN_TTL = 3600
+
+
+class SigningKey:
+    def __init__(self, private_pem):
+        self.private_pem = private_pem
+        private_key = serialization.load_pem_private_key(private_pem, password=None)
+        public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        digest = hashes.Hash(hashes.SHA256())
+        digest.update(public_pem)
+        self.kid = 'ins_' + digest.finalize().hex()[:24] # Stable per key, so restarts keep verifying old tokens
+        self.public_jwk = {**jwk.construct(public_pem, 'RS256').to_dict(), 'kid': self.kid, 'use': 'sig'}
+
+    @classmethod
+    def generate(cls):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return cls(private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+
+    @classmethod
+    def load(cls, path):
+        """ Loads the PEM key at `path`; raises FileNotFoundError if it does not exist. """
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    @classmethod
+    def load_or_create(cls, path):
+        """ Loads the PEM key at `path`, creating it (mode 0600) if it does not exist. """
+        try:
+            return cls.load(path)
+        except FileNotFoundError:
+            key = cls.generate()
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(key.private_pem)
+            return key
+
+    def jwks(self):
+        return {'keys': [self.public_jwk]}
+
+    def mint(self, issuer, sub, ttl=DEFAULT_TOKEN_TTL, **claims):
+        """ A Clerk-shaped session token (RS256, kid header) for `sub`. """
+        now = int(time.time())
+        payload = {'iss': issuer, 'sub': sub, 'iat': now, 'nbf': now - 5, 'exp': now + ttl, 'sid': f'sess_{sub}', **claims}
+        return jwt.encode(payload, self.private_pem, algorithm='RS256', headers={'kid': self.kid})
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    GET  /.well-known/jwks.json             -> the JWKS document
+    POST /tokens {"sub": ..., "ttl": ..., extra claims}  -> {"jwt": ...}
+    GET  /tokens?sub=...&ttl=...            -> {"jwt": ...}
+    """
+    server_version = 'ClerkStandIn/1.0'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == JWKS_PATH:
+            return self.send_json(200, self.server.key.jwks())
+        if url.path == TOKENS_PATH:
+            return self.mint({key: values[-1] for key, values in parse_qs(url.query).items()})
+        self.send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if urlparse(self.path).path != TOKENS_PATH:
+            return self.send_json(404, {'error': 'Not found'})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        except ValueError:
+            return self.send_json(400, {'error': 'Body must be JSON.'})
+        self.mint(body if isinstance(body, dict) else {})
+
+    def mint(self, claims):
+        claims = dict(claims)
+        sub = claims.pop('sub', None)
+        if not sub:
+            return self.send_json(400, {'error': 'sub is required.'})
+        try:
+            ttl = int(claims.pop('ttl', DEFAULT_TOKEN_TTL))
+        except (TypeError, ValueError):
+            return self.send_json(400, {'error': 'ttl must be an integer.'})
+        self.send_json(200, {'jwt': self.server.key.mint(self.server.issuer, sub, ttl=ttl, **claims)})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(key, host='127.0.0.1', port=0, issuer=None, verbose=False):
+    """ A ThreadingHTTPServer for `key`; port 0 picks a free port. The issuer defaults to the server's own URL. """
+    server = ThreadingHTTPServer((host, port), StandInHandler)
+    server.key = key
+    server.issuer = issuer or f'http://{host}:{server.server_address[1]}'
+    server.verbose = verbose
+    return server
+
+
+def start_in_thread(server):
+    """ Serves in a daemon thread (tests, embedding); stop with server.shutdown(). """
+    thread = threading.Thread(target=server.serve_forever, name='clerk-standin', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,52 @@
+# api/conditional.py
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints the frontend re-fetches on every navigation.
+
+Validators come from one aggregate query over the rows a response is built from: COUNT plus the
+newest updated_at of every table that contributes fields. A matching If-None-Match (or, without
+one, If-Modified-Since) gets a 304 before anything is serialized. The ETag also covers the caller's
+identity and the full URL, so per-user and per-page responses never validate each other.
+"""
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+
+def fingerprint(queryset, *timestamp_paths):
+    """ (row count, newest timestamp) over `queryset`; timestamp_paths name updated_at columns, e.g. 'user__updated_at'. """
+    # Drop ordering/annotations the aggregate does not need (e.g. search_rank) so the query stays a plain scan
+    result = queryset.order_by().aggregate(rows=Count('pk'), **{f'newest_{i}': Max(path) for i, path in enumerate(timestamp_paths)})
+    stamps = [value for key, value in result.items() if key != 'rows' and value is not None]
+    return result['rows'], max(stamps) if stamps else None
+
+
+class Validators:
+    def __init__(self, request, rows, last_modified):
+        self.last_modified = last_modified
+        principal = getattr(request.user, 'pk', None) or ''
+        stamp = last_modified.isoformat() if last_modified else ''
+        digest = hashlib.sha256(f'{principal}|{request.get_full_path()}|{rows}|{stamp}'.encode()).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+
+    def not_modified(self, request):
+        """ A 304 response when the client's copy is current, else None. """
+        timestamp = int(self.last_modified.timestamp()) if self.last_modified else None
+        response = get_conditional_response(request, etag=self.etag, last_modified=timestamp)
+        return self.apply(response) if response is not None else None
+
+    def apply(self, response):
+        if response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            if self.last_modified:
+                response['Last-Modified'] = http_date(self.last_modified.timestamp())
+            # Cacheable only by the caller's browser, and always revalidated
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+
+def check(request, queryset, *timestamp_paths):
+    """ Returns (304 response or None, validators to apply() to the full response). """
+    validators = Validators(request, *fingerprint(queryset, *timestamp_paths))
+    return validators.not_modified(request), validators
@@ -0,0 +1,59 @@
+# api/exports.py
+"""
+Streaming pay stub exports.
+
+Rows are read in keyset batches (WHERE id > last ORDER BY id LIMIT n) through the PAYSTUB_ADMIN
+projection, so each batch is one joined query and the process never holds more than one batch.
+(`.iterator(chunk_size=...)` alone does not give that on MySQL: mysqlclient buffers the whole result.)
+"""
+import csv
+import json
+from django.conf import settings
+
+from .models import PayStub
+from .projections import PAYSTUB_ADMIN
+
+DEFAULT_CHUNK_SIZE = 2000
+COLUMNS = [key for key, _ in PAYSTUB_ADMIN.fields]
+
+
+def get_chunk_size():
+    return int(getattr(settings, 'PAYROLL_EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+
+
+def iter_stub_rows(pay_run, chunk_size=None):
+    """ Yields the pay run's stubs as PAYSTUB_ADMIN dicts, ordered by id, one query per chunk. """
+    chunk_size = chunk_size or get_chunk_size()
+    queryset = PAYSTUB_ADMIN.values(PayStub.objects.filter(pay_run=pay_run).order_by('id'))
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield from PAYSTUB_ADMIN.render(rows)
+        last_id = rows[-1]['id']
+
+
+class _Echo:
+    """ File-like object whose write() returns the line instead of buffering it. """
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow([row[column] for column in COLUMNS])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')) + '\n'
+
+
+FORMATS = {
+    # output: (line generator, content type, file extension)
+    'csv': (csv_lines, 'text/csv; charset=utf-8', 'csv'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson', 'ndjson'),
+}
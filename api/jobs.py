@@ -0,0 +1,129 @@
+# api/jobs.py
+"""
+Database-backed job queue for pay run processing.
+
+Jobs are rows in PayrollJob, claimed with SELECT ... FOR UPDATE SKIP LOCKED so any number
+of `manage.py run_payroll_worker` processes can share the queue using only the
+application database (no Redis/Celery). A Running job whose heartbeat (updated_at)
+is older than PAYROLL_JOB_STALE_SECONDS is assumed orphaned and can be reclaimed; while a job
+runs, a side thread keeps its heartbeat fresh however long a batch takes. A job orphaned
+PAYROLL_JOB_MAX_ATTEMPTS times (e.g. a run that keeps killing its worker) is failed instead.
+Reclaimed jobs and re-queued Failed runs resume from the run's checkpoint (see api/payroll.py).
+"""
+import logging
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import payroll, stats
+from .models import PayRun, PayrollJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STALE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def get_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def get_stale_seconds():
+    return int(getattr(settings, 'PAYROLL_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS))
+
+
+def enqueue_pay_run(pay_run):
+    """ Moves a Pending/Failed run to Processing and queues a job for it. Returns None for any other status. """
+    with transaction.atomic():
+        # Conditional UPDATEs so two concurrent requests cannot both queue the same run
+        if PayRun.objects.filter(pk=pay_run.pk, status='Pending').update(status='Processing'):
+            stats.bump(pending_payruns=-1)
+        elif not PayRun.objects.filter(pk=pay_run.pk, status='Failed').update(status='Processing'):
+            return None
+        return PayrollJob.objects.create(pay_run=pay_run)
+
+
+def claim_next_job(worker_id=None):
+    """ Atomically claims the oldest runnable job, or returns None if the queue is empty. """
+    stale_before = timezone.now() - timedelta(seconds=get_stale_seconds())
+    max_attempts = int(getattr(settings, 'PAYROLL_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+    while True:
+        with transaction.atomic():
+            job = PayrollJob.objects.select_for_update(skip_locked=True)\
+                                    .filter(Q(status='Queued') | Q(status='Running', updated_at__lt=stale_before))\
+                                    .order_by('created_at', 'id').first()
+            if job is None:
+                return None
+            if job.status == 'Running' and job.attempts >= max_attempts:
+                _abandon(job)
+                continue
+            job.status = 'Running'
+            job.worker = worker_id or get_worker_id()
+            job.attempts += 1
+            job.started_at = timezone.now()
+            job.error = ''
+            job.save()
+        return job
+
+
+def _abandon(job):
+    """ Fails an orphaned job (and its run) that has used up its attempts, so it is not reclaimed forever. """
+    logger.error(f"Payroll job {job.pk} for run {job.pay_run_id} was orphaned {job.attempts} times; marking it failed.")
+    now = timezone.now()
+    PayRun.objects.filter(pk=job.pay_run_id).update(status='Failed', processed_at=now)
+    _touch(job, status='Failed', error=f'Worker lost {job.attempts} times (no heartbeat); giving up.', finished_at=now)
+
+
+def _touch(job, **fields):
+    PayrollJob.objects.filter(pk=job.pk).update(updated_at=timezone.now(), **fields)
+
+
+@contextmanager
+def heartbeat(job, interval):
+    """ Touches the job every `interval` seconds from a side thread, so a slow batch is not taken for an orphan. """
+    stop = threading.Event()
+    def beat():
+        try:
+            while not stop.wait(interval):
+                try:
+                    _touch(job)
+                except Exception as e: # A missed beat is not fatal; the next one may get through
+                    logger.warning(f"Heartbeat for payroll job {job.pk} failed: {e}")
+        finally:
+            connections.close_all() # This thread's connections only
+    thread = threading.Thread(target=beat, name=f'payroll-job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    """ Processes (or resumes) the job's pay run, reporting progress after every batch. Returns True on success. """
+    pay_run = job.pay_run
+    try:
+        with heartbeat(job, get_stale_seconds() / 4):
+            # Committed chunks from an earlier attempt are kept and counted; processing resumes after the checkpoint
+            total = pay_run.stubs_generated + payroll.count_eligible(after_employee_id=pay_run.checkpoint_employee_id)
+            _touch(job, total=total, processed=pay_run.stubs_generated)
+            stubs_created_count = payroll.run_payroll(pay_run, progress=lambda processed: _touch(job, processed=processed))
+    except Exception as e:
+        logger.error(f"Payroll job {job.pk} for run {pay_run.pk} failed: {e}", exc_info=True)
+        now = timezone.now()
+        PayRun.objects.filter(pk=pay_run.pk).update(status='Failed', processed_at=now)
+        _touch(job, status='Failed', error=str(e), finished_at=now)
+        return False
+
+    now = timezone.now()
+    PayRun.objects.filter(pk=pay_run.pk).update(status='Completed', processed_at=now)
+    _touch(job, status='Completed', processed=stubs_created_count, finished_at=now)
+    logger.info(f"Payroll job {job.pk} for run {pay_run.pk} completed: {stubs_created_count} stubs.")
+    return True
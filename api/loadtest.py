@@ -0,0 +1,100 @@
+# api/loadtest.py
+"""
+Closed-loop HTTP load driver for `manage.py load_test`.
+
+Each client process loops until its deadline. On every iteration it picks a session, weighted by
+persona (employee / HR / admin). It then picks a request from that persona's traffic mix, sends it
+over a keep-alive connection, and records the latency under the route's name. Only read traffic is
+replayed, so a run can be repeated against the same data.
+
+This module imports nothing from Django. Client processes are started with the 'spawn' method and
+only need `requests`.
+"""
+import random
+import time
+import requests
+
+# persona -> [(weight, route label, path)]; paths may use {employee}, {run} and {term}
+MIXES = {
+    'employee': [
+        (35, 'get-current-user', '/api/me/'),
+        (30, 'my-paystubs', '/api/my/paystubs/'),
+        (15, 'list-employees', '/api/employees/'),
+        (10, 'list-employees?search', '/api/employees/?search={term}'),
+        (10, 'department-list', '/api/departments/'),
+    ],
+    'hr': [
+        (10, 'get-current-user', '/api/me/'),
+        (20, 'get-hr-stats', '/api/hr/stats/'),
+        (15, 'list-employees?search', '/api/employees/?search={term}'),
+        (15, 'list-pending-onboarding', '/api/hr/onboarding/pending/'),
+        (15, 'manage-employee-profile', '/api/manage/employee/{employee}/'),
+        (10, 'payrun-list', '/api/payroll/runs/'),
+        (5, 'paystub-admin-list', '/api/payroll/stubs-admin/?run_id={run}'),
+        (10, 'department-list', '/api/departments/'),
+    ],
+    'admin': [
+        (30, 'get-admin-stats', '/api/admin/stats/'),
+        (20, 'get-current-user', '/api/me/'),
+        (20, 'department-list', '/api/departments/'),
+        (20, 'payrun-list', '/api/payroll/runs/'),
+        (10, 'admin-user-list', '/api/admin/users/'),
+    ],
+}
+
+
+def parse_weights(spec):
+    """ 'employee=80,hr=15,admin=5' -> {'employee': 80.0, ...}; raises ValueError. """
+    weights = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        persona, _, weight = part.partition('=')
+        if persona not in MIXES:
+            raise ValueError(f"Unknown persona '{persona}'. Use {', '.join(MIXES)}.")
+        weights[persona] = float(weight)
+    if not weights or any(weight < 0 for weight in weights.values()) or not sum(weights.values()):
+        raise ValueError('Persona weights must be non-negative and not all zero.')
+    return weights
+
+
+def run_client(base_url, sessions, weights, context, duration, seed, timeout=30.0, think_time=0.0):
+    """
+    One client: `sessions` maps persona -> [bearer tokens]; `context` holds the values path
+    templates draw from ('employee', 'run', 'term' lists). Returns
+    {route: {'latencies': [ms], 'statuses': {status: count}}}; transport errors count as status 0.
+    """
+    rng = random.Random(seed)
+    personas = [persona for persona in weights if sessions.get(persona)]
+    persona_weights = [weights[persona] for persona in personas]
+    results = {}
+    http = requests.Session()
+    # TLS is terminated in front of the app (SECURE_PROXY_SSL_HEADER): do the same so SSL redirect does not answer
+    http.headers['X-Forwarded-Proto'] = 'https'
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        persona = rng.choices(personas, weights=persona_weights)[0]
+        _, route, path = rng.choices(MIXES[persona], weights=[weight for weight, _, _ in MIXES[persona]])[0]
+        url = base_url + path.format(**{key: rng.choice(values) for key, values in context.items() if values})
+        started = time.perf_counter()
+        try:
+            response = http.get(url, headers={'Authorization': f'Bearer {rng.choice(sessions[persona])}'}, timeout=timeout)
+            status = response.status_code
+        except requests.RequestException:
+            status = 0
+        elapsed = (time.perf_counter() - started) * 1000
+        entry = results.setdefault(route, {'latencies': [], 'statuses': {}})
+        entry['latencies'].append(elapsed)
+        entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+        if think_time:
+            time.sleep(rng.expovariate(1 / think_time))
+    return results
+
+
+def merge(client_results):
+    merged = {}
+    for results in client_results:
+        for route, entry in results.items():
+            target = merged.setdefault(route, {'latencies': [], 'statuses': {}})
+            target['latencies'].extend(entry['latencies'])
+            for status, count in entry['statuses'].items():
+                target['statuses'][status] = target['statuses'].get(status, 0) + count
+    return merged
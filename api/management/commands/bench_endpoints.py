@@ -0,0 +1,201 @@
+# api/management/commands/bench_endpoints.py
+import json
+import statistics
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.urls import URLResolver, reverse
+from rest_framework.test import APIClient
+
+from api import auth_utils, seeding, urls as api_urls
+from api.models import User, EmployeeProfile, Salary, PayRun, PayrollJob, PayStub
+from api.management.commands.bench_payroll import _Rollback
+
+PREFIX = 'bench'
+
+# route name -> (method, URL kwargs naming fixtures, body or callable building a multipart body)
+ROUTES = {
+    'api-root': ('get', {}, None),
+    'department-list': ('get', {}, None),
+    'department-detail': ('get', {'pk': 'department'}, None),
+    'salary-list': ('get', {}, None),
+    'salary-detail': ('get', {'pk': 'salary'}, None),
+    'titlehistory-list': ('get', {}, None),
+    'titlehistory-detail': ('get', {'pk': 'title'}, None),
+    'admin-user-list': ('get', {}, None),
+    'admin-user-detail': ('get', {'clerk_id': 'employee'}, None),
+    'payrun-list': ('get', {}, None),
+    'payrun-detail': ('get', {'pk': 'completed_run'}, None),
+    'payrun-process-payroll': ('post', {'pk': 'pending_run'}, None),
+    'payrun-progress': ('get', {'pk': 'completed_run'}, None),
+    'payrun-export': ('get', {'pk': 'completed_run'}, None),
+    'paystub-admin-list': ('get', {}, None),
+    'sync-user': ('post', {}, lambda f: {'type': 'user.updated', 'data': {
+        'id': f['employee'], 'first_name': 'Bench', 'last_name': 'Updated',
+        'email_addresses': [{'email_address': f['employee_email'], 'verification': {'status': 'verified'}}]}}),
+    'get-current-user': ('get', {}, None),
+    'list-employees': ('get', {}, None),
+    'manage-employee-profile': ('get', {'clerk_id': 'employee'}, None),
+    'list-pending-onboarding': ('get', {}, None),
+    'import-employees': ('post', {}, lambda f: {'file': SimpleUploadedFile('employees.csv', (
+        'clerk_id,email,first_name,last_name,department,job_title,salary\n'
+        f"{f['employee']},{f['employee_email']},Bench,Updated,{f['department_name']},Staff Engineer,99000\n"
+        f"{PREFIX}_new,{PREFIX}_new@example.com,New,Hire,{f['department_name']},Engineer,50000\n").encode())}),
+    'my-paystubs': ('get', {}, None),
+    'get-hr-stats': ('get', {}, None),
+    'get-admin-stats': ('get', {}, None),
+    'health-ready': ('get', {}, None),
+}
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+def percentile(values, fraction):
+    """ Nearest-rank percentile of a non-empty list. """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+class QueryCounter:
+    """ connection.execute_wrapper hook counting the statements a request runs, not the benchmark's savepoints. """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK')):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks every route in api/urls.py (p50/p95 latency and queries per request) at several data sizes. "
+            "Data is seeded with api.seeding inside a transaction that is always rolled back; token verification is "
+            "stubbed and every request's writes are rolled back too. Optionally compares against a saved baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000', help='Comma-separated employee counts.')
+        parser.add_argument('--pay-runs', type=int, default=4)
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per route (after one warm-up).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--routes', default='', help='Comma-separated route names (default: all).')
+        parser.add_argument('--baseline', help='Baseline JSON to compare against.')
+        parser.add_argument('--save-baseline', help='Write the results as a baseline JSON to this path.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 slowdown vs the baseline (0.25 = 25%%).')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero if any route regressed.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers.')
+        missing = set(route_names(api_urls.urlpatterns)) - set(ROUTES)
+        if missing:
+            raise CommandError(f"No benchmark request defined for route(s): {', '.join(sorted(missing))}")
+        routes = [name.strip() for name in options['routes'].split(',') if name.strip()] or list(ROUTES)
+        unknown = set(routes) - set(ROUTES)
+        if unknown:
+            raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}")
+        baseline = {}
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        results, regressions = {}, []
+        with override_settings(ALLOWED_HOSTS=['testserver']), \
+                mock.patch('api.auth_utils.verify_clerk_token', side_effect=lambda token: {'sub': token.removeprefix('token-')}):
+            for size in sizes:
+                results[str(size)] = self._measure(size, routes, options)
+                regressions += self._report(size, results[str(size)], baseline.get(str(size), {}), options['tolerance'])
+        auth_utils.principal_cache.clear()
+
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+        if regressions:
+            message = f"{len(regressions)} regression(s): {', '.join(regressions)}"
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+
+    def _measure(self, size, routes, options):
+        results = {}
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                seeding.seed(size, pay_runs=options['pay_runs'], seed=options['seed'], prefix=PREFIX)
+                self.stdout.write(f'\n{size} employees seeded in {time.perf_counter() - started:.1f}s')
+                fixtures = self._fixtures()
+                client = APIClient()
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer token-{fixtures['actor']}")
+                for name in routes:
+                    method, kwargs, body = ROUTES[name]
+                    url = reverse(name, kwargs={key: fixtures[value] for key, value in kwargs.items()})
+                    timings, queries = [], []
+                    for iteration in range(options['iterations'] + 1): # The first request warms caches and is discarded
+                        counter = QueryCounter()
+                        with transaction.atomic():
+                            with connection.execute_wrapper(counter):
+                                request_started = time.perf_counter()
+                                data = body(fixtures) if callable(body) else body
+                                response = getattr(client, method)(url, data, format='multipart' if name == 'import-employees' else 'json', secure=True)
+                                if response.streaming:
+                                    for _ in response.streaming_content: # Streamed queries run while the body is consumed
+                                        pass
+                                elapsed = time.perf_counter() - request_started
+                            transaction.set_rollback(True)
+                        if response.status_code >= 300:
+                            raise CommandError(f'{name}: HTTP {response.status_code} at {size} employees')
+                        if iteration:
+                            timings.append(elapsed * 1000)
+                            queries.append(counter.count)
+                    results[name] = {'p50_ms': round(statistics.median(timings), 2), 'p95_ms': round(percentile(timings, 0.95), 2),
+                                     'queries': max(queries)}
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return results
+
+    def _fixtures(self):
+        """ Seeded rows the parameterised routes point at; the actor is an admin with pay stubs. """
+        seeded = {'employee__user__clerk_id__startswith': f'{PREFIX}_'}
+        actor = PayStub.objects.filter(employee__user__is_active=True, **seeded).order_by('employee_id').values_list('employee_id', flat=True).first()
+        User.objects.filter(pk=actor).update(role='admin')
+        employee = EmployeeProfile.objects.exclude(pk=actor).filter(user__clerk_id__startswith=f'{PREFIX}_', current_title__isnull=False).select_related('user', 'department').first()
+        completed_run = PayRun.objects.filter(status='Completed', paystubs__employee=actor).order_by('-end_date').first()
+        PayrollJob.objects.create(pay_run=completed_run, status='Completed', total=completed_run.stubs_generated,
+                                  processed=completed_run.stubs_generated)
+        last_end = PayRun.objects.order_by('-end_date').values_list('end_date', flat=True).first()
+        pending_run = PayRun.objects.create(start_date=last_end + timedelta(days=1), end_date=last_end + timedelta(days=15),
+                                            pay_date=last_end + timedelta(days=20))
+        return {'actor': actor, 'employee': employee.pk, 'employee_email': employee.user.email,
+                'department': employee.department_id, 'department_name': employee.department.name,
+                'salary': Salary.objects.filter(employee=employee).values_list('pk', flat=True).first(),
+                'title': employee.current_title_id, 'completed_run': completed_run.pk, 'pending_run': pending_run.pk}
+
+    def _report(self, size, results, baseline, tolerance):
+        """ Prints one size's table and returns the routes slower (p95) or chattier (queries) than the baseline. """
+        regressions = []
+        self.stdout.write(f"{'route':<26} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8}" + (f" {'base p95':>9} {'base q':>7}" if baseline else ''))
+        for name, row in results.items():
+            line = f"{name:<26} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['queries']:>8}"
+            base = baseline.get(name)
+            if base:
+                slower = row['p95_ms'] > base['p95_ms'] * (1 + tolerance)
+                chattier = row['queries'] > base['queries']
+                line += f" {base['p95_ms']:>9.2f} {base['queries']:>7}" + ('  REGRESSION' if slower or chattier else '')
+                if slower or chattier:
+                    regressions.append(f'{name}@{size}')
+            self.stdout.write(line)
+        return regressions
@@ -0,0 +1,79 @@
+# api/management/commands/bench_logging.py
+import io
+import logging
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from hrms_backend.log_handlers import AsyncRotatingFileHandler, AsyncStreamHandler, RateLimitFilter, SamplingFilter
+
+VERBOSE = logging.Formatter('{levelname} {asctime} {module} {process:d} {thread:d} {message}', style='{')
+SIMPLE = logging.Formatter('{levelname} {message}', style='{')
+CLAIMS = {'sub': 'user_2abcDEF', 'sid': 'sess_2xyz', 'iss': 'https://example.clerk.accounts.dev',
+          'exp': 1760000000, 'iat': 1759999940, 'nbf': 1759999930, 'azp': 'https://app.example.com'}
+
+
+def previous_auth_logging(log, clerk_id='user_2abcDEF'):
+    """ What HasClerkRole used to log on every request. """
+    log.info(f"HasClerkRole: Token verified. Claims: {CLAIMS}")
+    log.info(f"HasClerkRole: Attempting User.objects.get(clerk_id='{clerk_id}')")
+    log.info(f"HasClerkRole: User {clerk_id} found in DB: someone@example.com")
+
+
+def current_auth_logging(log, clerk_id='user_2abcDEF'):
+    """ What ClerkAuthentication logs on every request now. """
+    log.debug("ClerkAuthentication: Token verified for %s", clerk_id)
+
+
+class Command(BaseCommand):
+    help = "Measures per-request logging overhead of the auth hot path: synchronous handlers vs the queue-based setup."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        with tempfile.TemporaryDirectory() as tmp:
+            scenarios = [
+                ('sync handlers, previous log lines', self._sync_logger, previous_auth_logging, logging.DEBUG, []),
+                ('async handlers, previous log lines', self._async_logger, previous_auth_logging, logging.DEBUG, []),
+                ('async + sampling/rate limit, previous lines', self._async_logger, previous_auth_logging, logging.DEBUG,
+                 [SamplingFilter(rate=0.01), RateLimitFilter(rate=20)]),
+                ('async + filters, current log lines', self._async_logger, current_auth_logging, logging.INFO,
+                 [SamplingFilter(rate=0.01), RateLimitFilter(rate=20)]),
+            ]
+            self.stdout.write(f"{'scenario':<46} {'us/request':>11}")
+            for index, (name, build, emit, level, filters) in enumerate(scenarios):
+                log, handlers = build(f'bench.logging.{index}', os.path.join(tmp, f'{index}.log'), level, filters)
+                started = time.perf_counter()
+                for _ in range(requests):
+                    emit(log)
+                elapsed = time.perf_counter() - started
+                for handler in handlers:
+                    handler.close() # Drain outside the timed section: that work is off the request thread
+                self.stdout.write(f"{name:<46} {elapsed / requests * 1e6:>11.2f}")
+
+    @staticmethod
+    def _configure(name, level, filters, handlers):
+        log = logging.getLogger(name)
+        log.handlers[:] = handlers
+        log.filters[:] = filters
+        log.setLevel(level)
+        log.propagate = False
+        return log, handlers
+
+    def _sync_logger(self, name, filename, level, filters):
+        file_handler = logging.FileHandler(filename)
+        file_handler.setFormatter(VERBOSE)
+        console_handler = logging.StreamHandler(io.StringIO())
+        console_handler.setFormatter(SIMPLE)
+        return self._configure(name, level, filters, [file_handler, console_handler])
+
+    def _async_logger(self, name, filename, level, filters):
+        file_handler = AsyncRotatingFileHandler(filename, maxBytes=10 * 1024 * 1024, backupCount=1)
+        file_handler.setFormatter(VERBOSE)
+        console_handler = AsyncStreamHandler(io.StringIO())
+        console_handler.setFormatter(SIMPLE)
+        return self._configure(name, level, filters, [file_handler, console_handler])
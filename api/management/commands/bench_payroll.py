@@ -0,0 +1,93 @@
+# api/management/commands/bench_payroll.py
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api import payroll
+from api.models import User, EmployeeProfile, Salary, PayRun, PayStub
+
+
+class _Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    """ connection.execute_wrapper hook; unlike CaptureQueriesContext it has no 9000-query cap. """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def seed_employees(count, prefix='bench'):
+    """ Bulk inserts `count` active users with a profile and one current salary each. """
+    users = [User(clerk_id=f'{prefix}_{i:07d}', email=f'{prefix}_{i:07d}@example.com',
+                  first_name='Bench', last_name=f'Employee{i}') for i in range(count)]
+    User.objects.bulk_create(users, batch_size=2000)
+    EmployeeProfile.objects.bulk_create(
+        [EmployeeProfile(user_id=u.clerk_id, job_title='Engineer') for u in users], batch_size=2000)
+    Salary.objects.bulk_create(
+        [Salary(employee_id=u.clerk_id, amount=Decimal(40000 + (i % 500) * 137), effective_date=date(2024, 1, 1))
+         for i, u in enumerate(users)], batch_size=2000)
+
+
+def legacy_run_payroll(pay_run):
+    """ The previous per-employee loop (one salary query + one INSERT per employee), kept for comparison. """
+    days_in_period = payroll.period_days(pay_run)
+    created = 0
+    for profile in EmployeeProfile.objects.filter(user__is_active=True):
+        current_salary_obj = Salary.objects.filter(employee=profile, is_current=True).first()
+        if not current_salary_obj: continue
+        gross, deductions, net = payroll.calculate_stub_amounts(current_salary_obj.amount, days_in_period)
+        PayStub.objects.create(pay_run=pay_run, employee=profile, gross_pay=gross, deductions=deductions, net_pay=net)
+        created += 1
+    return created
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks payroll processing (query count and wall time) at several headcounts. "
+            "Seeds synthetic employees inside a transaction that is always rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated employee counts.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Override PAYROLL_BATCH_SIZE.')
+        parser.add_argument('--workers', type=int, default=None, help='Override PAYROLL_WORKERS.')
+        parser.add_argument('--legacy', action='store_true', help='Also time the old per-employee loop.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers.')
+
+        engines = [('bulk', lambda run: payroll.run_payroll(run, batch_size=options['batch_size'], workers=options['workers']))]
+        if options['legacy']:
+            engines.append(('legacy', legacy_run_payroll))
+
+        self.stdout.write(f"{'engine':<8} {'employees':>10} {'stubs':>10} {'queries':>8} {'seconds':>9}")
+        for size in sizes:
+            for name, engine in engines:
+                stubs, queries, elapsed = self._measure(size, engine)
+                self.stdout.write(f"{name:<8} {size:>10} {stubs:>10} {queries:>8} {elapsed:>9.3f}")
+
+    def _measure(self, size, engine):
+        result = {}
+        try:
+            with transaction.atomic():
+                seed_employees(size)
+                pay_run = PayRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 15), pay_date=date(2025, 1, 20))
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    result['stubs'] = engine(pay_run)
+                    result['elapsed'] = time.perf_counter() - started
+                result['queries'] = counter.count
+                raise _Rollback()
+        except _Rollback:
+            pass
+        return result['stubs'], result['queries'], result['elapsed']
@@ -0,0 +1,84 @@
+# api/management/commands/bench_search.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api import search
+from api.models import User, Department, EmployeeProfile
+from api.management.commands.bench_payroll import _Rollback
+
+FIRST_NAMES = ['James', 'Maria', 'Wei', 'Aisha', 'Olga', 'Carlos', 'Priya', 'Kenji', 'Fatima', 'Liam', 'Sofia', 'Noah']
+LAST_NAMES = ['Smith', 'Garcia', 'Chen', 'Okafor', 'Ivanova', 'Silva', 'Patel', 'Tanaka', 'Haddad', 'Murphy', 'Rossi', 'Novak']
+TITLES = ['Software Engineer', 'Accountant', 'Sales Manager', 'Recruiter', 'Data Analyst', 'Support Specialist']
+DEPARTMENTS = ['Engineering', 'Finance', 'Sales', 'People', 'Analytics', 'Support']
+TERMS = ['smith', 'maria garcia', 'eng', 'analyst', 'tanaka3', 'zzz']
+
+
+def legacy_search(queryset, term):
+    """ The previous five-way icontains filter, kept for comparison. """
+    return queryset.filter(
+        Q(user__first_name__icontains=term) | Q(user__last_name__icontains=term) | Q(user__email__icontains=term) |
+        Q(job_title__icontains=term) | Q(department__name__icontains=term)
+    ).order_by('user__last_name', 'user__first_name', 'pk')
+
+
+def indexed_search(queryset, term):
+    return search.search_profiles(queryset, term).order_by('-search_rank', 'user__last_name', 'user__first_name', 'pk')
+
+
+def seed_directory(count, prefix='search'):
+    """ Bulk inserts `count` employees with varied names, titles and departments, then indexes them. """
+    departments = [Department.objects.create(name=f'{prefix} {name}') for name in DEPARTMENTS]
+    users = [User(clerk_id=f'{prefix}_{i:07d}', email=f'{prefix}_{i:07d}@example.com',
+                  first_name=FIRST_NAMES[i % len(FIRST_NAMES)], last_name=f'{LAST_NAMES[(i // 7) % len(LAST_NAMES)]}{i // 1000}')
+             for i in range(count)]
+    User.objects.bulk_create(users, batch_size=2000)
+    EmployeeProfile.objects.bulk_create(
+        [EmployeeProfile(user_id=u.clerk_id, job_title=TITLES[i % len(TITLES)], department=departments[i % len(departments)])
+         for i, u in enumerate(users)], batch_size=2000)
+    for start in range(0, count, 2000):
+        search.reindex_profiles(EmployeeProfile.objects.filter(pk__in=[u.clerk_id for u in users[start:start + 2000]]))
+
+
+class Command(BaseCommand):
+    help = ("Compares the directory search index with the previous icontains query (first page of results). "
+            "Seeds synthetic employees inside a transaction that is always rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--explain', action='store_true', help='Print the query plan of each indexed search.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                seed_directory(options['employees'])
+                self.stdout.write(f"Seeded and indexed {options['employees']} employees in {time.perf_counter() - started:.1f}s")
+                with connection.cursor() as cursor:
+                    if connection.vendor == 'mysql':
+                        cursor.execute('ANALYZE TABLE api_employeesearchtoken, api_employeeprofile, api_user')
+                    else:
+                        cursor.execute('ANALYZE')
+                self._compare(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _compare(self, options):
+        base = EmployeeProfile.objects.select_related('user', 'department').filter(user__is_active=True)
+        self.stdout.write(f"{'term':<14} {'engine':<8} {'hits':>7} {'ms/page':>9}")
+        for term in TERMS:
+            for name, run in (('legacy', legacy_search), ('indexed', indexed_search)):
+                queryset = run(base, term)
+                hits = queryset.count()
+                started = time.perf_counter()
+                for _ in range(options['repeat']):
+                    list(queryset[:options['page_size']])
+                elapsed = (time.perf_counter() - started) / options['repeat']
+                self.stdout.write(f"{term:<14} {name:<8} {hits:>7} {elapsed * 1000:>9.1f}")
+                if options['explain'] and name == 'indexed':
+                    self.stdout.write(queryset[:options['page_size']].explain())
@@ -0,0 +1,59 @@
+# api/management/commands/bench_serializers.py
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api import projections
+from api.models import EmployeeProfile, PayRun, PayStub
+from api.serializers import EmployeeProfileBasicSerializer, PayStubAdminSerializer, PayStubEmployeeSerializer
+from api.management.commands.bench_payroll import _Rollback, seed_employees
+
+CASES = [
+    ('employees', EmployeeProfileBasicSerializer, projections.EMPLOYEE_BASIC,
+     lambda: EmployeeProfile.objects.select_related('user', 'department').order_by('pk')),
+    ('my paystubs', PayStubEmployeeSerializer, projections.PAYSTUB_EMPLOYEE,
+     lambda: PayStub.objects.select_related('pay_run').order_by('id')),
+    ('stubs-admin', PayStubAdminSerializer, projections.PAYSTUB_ADMIN,
+     lambda: PayStub.objects.select_related('pay_run', 'employee__user').order_by('id')),
+]
+
+
+class Command(BaseCommand):
+    help = ("Rows/sec of the list serializers vs the .values() projections (query + serialize + JSON render). "
+            "Seeds synthetic employees and stubs inside a transaction that is always rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000', help='Comma-separated row counts.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers.')
+
+        self.stdout.write(f"{'endpoint':<12} {'rows':>8} {'serializer r/s':>15} {'projection r/s':>15} {'speedup':>8} {'identical':>10}")
+        for size in sizes:
+            try:
+                with transaction.atomic():
+                    seed_employees(size)
+                    pay_run = PayRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 15), pay_date=date(2025, 1, 20))
+                    PayStub.objects.bulk_create(
+                        [PayStub(pay_run=pay_run, employee_id=pk, gross_pay='2054.79', deductions='410.96', net_pay='1643.83')
+                         for pk in EmployeeProfile.objects.values_list('pk', flat=True)], batch_size=2000)
+                    for name, serializer_class, projection, queryset in CASES:
+                        slow, slow_body = self._time(lambda: serializer_class(queryset(), many=True).data)
+                        fast, fast_body = self._time(lambda: projection.render(projection.values(queryset())))
+                        self.stdout.write(f"{name:<12} {size:>8} {size / slow:>15,.0f} {size / fast:>15,.0f} "
+                                          f"{slow / fast:>7.1f}x {str(slow_body == fast_body):>10}")
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+    @staticmethod
+    def _time(build):
+        started = time.perf_counter()
+        body = JSONRenderer().render(build())
+        return time.perf_counter() - started, body
@@ -0,0 +1,55 @@
+# api/management/commands/bench_startup.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TARGETS = {
+    'manage.py check': [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'check'],
+    'import wsgi app': [sys.executable, '-c', 'import hrms_backend.wsgi'],
+}
+
+
+class Command(BaseCommand):
+    help = ("Times process startup (`manage.py check` and importing the WSGI application) in fresh interpreters, "
+            "with the SSM snapshot current, missing (one refresh attempt), and with SSM disabled. "
+            "Snapshots are written to a temporary directory; the real one is not touched.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Processes started per target and scenario.')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive.')
+        with tempfile.TemporaryDirectory() as directory:
+            current = os.path.join(directory, 'current.json')
+            with open(current, 'w') as f: # Values are the defaults: only the lookup path is measured
+                json.dump({'names': sorted(settings.SSM_PARAMETERS), 'values': {}, 'fetched_at': time.time()}, f)
+            scenarios = {
+                'snapshot current': {'HRMS_SSM_SNAPSHOT': current},
+                'snapshot missing': {'HRMS_SSM_SNAPSHOT': os.path.join(directory, 'missing.json')},
+                'SSM disabled': {'HRMS_SSM_ENABLED': 'false', 'HRMS_SSM_SNAPSHOT': os.path.join(directory, 'unused.json')},
+            }
+            self.stdout.write(f"{'target':<18} {'scenario':<18} {'min s':>7} {'median s':>9} {'max s':>7}")
+            for target, command in TARGETS.items():
+                for scenario, env in scenarios.items():
+                    timings = [self._time(command, env, scenario == 'snapshot missing', directory) for _ in range(options['runs'])]
+                    self.stdout.write(f"{target:<18} {scenario:<18} {min(timings):>7.3f} {statistics.median(timings):>9.3f} {max(timings):>7.3f}")
+
+    def _time(self, command, env, remove_snapshot, directory):
+        if remove_snapshot: # Every run starts cold
+            for name in os.listdir(directory):
+                if name.startswith('missing.json'):
+                    os.unlink(os.path.join(directory, name))
+        started = time.perf_counter()
+        result = subprocess.run(command, env={**os.environ, **env}, cwd=settings.BASE_DIR, capture_output=True)
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f"{' '.join(command)} failed:\n{result.stderr.decode()[-2000:]}")
+        return elapsed
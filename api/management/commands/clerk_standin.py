@@ -0,0 +1,30 @@
+# api/management/commands/clerk_standin.py
+from django.core.management.base import BaseCommand
+
+from api import clerk_standin
+
+
+class Command(BaseCommand):
+    help = ("Runs a local stand-in for Clerk: serves a JWKS document and mints RS256 session tokens. "
+            "Start the backend with the CLERK_ISSUER_URL / CLERK_JWKS_URL it prints to accept its tokens.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--key-file', default='clerk-standin.pem', help='PEM signing key; created if missing.')
+        parser.add_argument('--issuer', default=None, help='iss claim (default: this server\'s URL).')
+        parser.add_argument('--verbose', action='store_true', help='Log every request.')
+
+    def handle(self, *args, **options):
+        key = clerk_standin.SigningKey.load_or_create(options['key_file'])
+        server = clerk_standin.make_server(key, options['host'], options['port'], options['issuer'], options['verbose'])
+        base_url = f"http://{options['host']}:{server.server_address[1]}"
+        self.stdout.write(f"Clerk stand-in on {base_url} (kid {key.kid}). Start the backend with:\n"
+                          f"  CLERK_ISSUER_URL={server.issuer}\n"
+                          f"  CLERK_JWKS_URL={base_url}{clerk_standin.JWKS_PATH}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Clerk stand-in stopped.")
+        finally:
+            server.server_close()
@@ -0,0 +1,33 @@
+# api/management/commands/import_employees.py
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import bulk_import
+
+
+class Command(BaseCommand):
+    help = ("Creates or updates employees (user, profile, salary, title) from a CSV file; "
+            f"columns: {', '.join(bulk_import.COLUMNS)}. Invalid rows are reported and skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per batch (default: EMPLOYEE_IMPORT_BATCH_SIZE).')
+
+    def handle(self, *args, **options):
+        importer = bulk_import.EmployeeImporter(batch_size=options['batch_size'], manage_users=True) # Shell access: trusted like an admin
+        started = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                report = importer.run(bulk_import.read_csv(f))
+        except (OSError, ValueError, csv.Error) as e:
+            raise CommandError(f"Could not import {options['path']}: {e}")
+        elapsed = time.perf_counter() - started
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['row']}: {dict(error['errors'])}")
+        rows = report.created + report.updated
+        self.stdout.write(self.style.SUCCESS(
+            f"{report.created} created, {report.updated} updated, {report.salaries} salaries, {report.titles} titles, "
+            f"{len(report.errors)} failed in {elapsed:.1f}s ({rows / elapsed * 60 if elapsed else 0:,.0f} rows/min)."))
@@ -0,0 +1,91 @@
+# api/management/commands/load_test.py
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api import clerk_standin, loadtest
+from api.models import User, PayRun
+from api.management.commands.bench_endpoints import percentile
+
+PERSONA_ROLES = {'employee': 'employee', 'hr': 'hr_manager', 'admin': 'admin'}
+SEARCH_TERMS = ['smith', 'maria', 'eng', 'senior', 'pat', 'sales', 'chen', 'ops']
+
+
+class Command(BaseCommand):
+    help = ("Replays an employee / HR / admin read-traffic mix against a running server from several client processes and "
+            "reports throughput and tail latency per endpoint. Tokens are minted from the `clerk_standin` signing key, so "
+            "the server must run with that stand-in's CLERK_ISSUER_URL / CLERK_JWKS_URL. Users are read from this "
+            "project's database (e.g. seeded with `seed_hrms`).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--processes', type=int, default=4, help='Concurrent client processes.')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run.')
+        parser.add_argument('--personas', default='employee=80,hr=15,admin=5', help='Relative share of traffic per persona.')
+        parser.add_argument('--users', type=int, default=200, help='Distinct users (tokens) per persona, at most.')
+        parser.add_argument('--key-file', default='clerk-standin.pem', help="The stand-in's PEM signing key.")
+        parser.add_argument('--issuer', default=None, help='iss claim (default: settings.CLERK_ISSUER_URL).')
+        parser.add_argument('--think-time', type=float, default=0.0, help='Mean seconds between a client\'s requests.')
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            weights = loadtest.parse_weights(options['personas'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['processes'] < 1 or options['duration'] <= 0:
+            raise CommandError('--processes and --duration must be positive.')
+
+        try: # Never create one here: a key the running stand-in does not know would fail every request with 401
+            key = clerk_standin.SigningKey.load(options['key_file'])
+        except FileNotFoundError:
+            raise CommandError(f"No signing key at {options['key_file']}. Start `manage.py clerk_standin` first, or pass the "
+                               "--key-file it uses.")
+        issuer = options['issuer'] or settings.CLERK_ISSUER_URL
+        ttl = int(options['duration']) + 300
+        sessions = {}
+        for persona in weights:
+            clerk_ids = User.objects.filter(role=PERSONA_ROLES[persona], is_active=True, profile__isnull=False) \
+                                    .order_by('clerk_id').values_list('clerk_id', flat=True)[:options['users']]
+            sessions[persona] = [key.mint(issuer, clerk_id, ttl=ttl) for clerk_id in clerk_ids]
+        if not any(sessions.values()):
+            raise CommandError('No active users with the requested roles. Seed some with `manage.py seed_hrms`.')
+        context = {
+            'employee': list(User.objects.filter(is_active=True, profile__isnull=False).order_by('?').values_list('clerk_id', flat=True)[:500]),
+            'run': [str(pk) for pk in PayRun.objects.order_by('-pay_date').values_list('pk', flat=True)[:6]] or [''],
+            'term': SEARCH_TERMS,
+        }
+        connections.close_all() # Client processes never touch the database
+
+        self.stdout.write(f"{options['processes']} clients for {options['duration']:.0f}s against {options['base_url']} "
+                          f"({', '.join(f'{persona}: {len(tokens)} users' for persona, tokens in sessions.items())})")
+        spawn = multiprocessing.get_context('spawn') # No inherited Django state or DB sockets
+        started = time.monotonic()
+        with spawn.Pool(options['processes']) as pool:
+            client_results = pool.starmap(loadtest.run_client, [
+                (options['base_url'].rstrip('/'), sessions, weights, context, options['duration'], options['seed'] + i,
+                 options['timeout'], options['think_time']) for i in range(options['processes'])])
+        elapsed = time.monotonic() - started
+        self._report(loadtest.merge(client_results), elapsed)
+
+    def _report(self, results, elapsed):
+        total = sum(len(entry['latencies']) for entry in results.values())
+        failures = {} # status -> count; 0 is a connection error or timeout
+        self.stdout.write(f"{'route':<26} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+        for route, entry in sorted(results.items(), key=lambda item: -len(item[1]['latencies'])):
+            latencies = entry['latencies']
+            failed = 0
+            for status, count in entry['statuses'].items():
+                if not 200 <= status < 400:
+                    failures[status] = failures.get(status, 0) + count
+                    failed += count
+            self.stdout.write(f"{route:<26} {len(latencies):>9} {len(latencies) / elapsed:>8.1f} {percentile(latencies, 0.5):>8.1f} "
+                              f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f} {failed:>7}")
+        self.stdout.write(f"{'total':<26} {total:>9} {total / elapsed:>8.1f}")
+        if failures:
+            self.stdout.write(self.style.WARNING('Failed requests by status: ' + ', '.join(
+                f"{status or 'connection error'}: {count}" for status, count in sorted(failures.items()))))
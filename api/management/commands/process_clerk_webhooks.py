@@ -0,0 +1,34 @@
+# api/management/commands/process_clerk_webhooks.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import webhooks
+
+
+class Command(BaseCommand):
+    help = "Applies queued Clerk webhook events (stored by /api/sync-user/) to users and profiles in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the inbox, then exit.')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the inbox is empty.')
+        parser.add_argument('--batch-size', type=int, default=None, help='Events per batch (default: CLERK_WEBHOOK_BATCH_SIZE).')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Clerk webhook consumer started.")
+        try:
+            while True:
+                close_old_connections() # Long-running process: respect CONN_MAX_AGE / drop broken connections
+                consumed = webhooks.process_batch(options['batch_size'])
+                if consumed:
+                    self.stdout.write(f"Applied {consumed} event(s).")
+                    continue
+                pruned = webhooks.prune()
+                if pruned:
+                    self.stdout.write(f"Pruned {pruned} processed event(s).")
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Clerk webhook consumer stopped.")
@@ -0,0 +1,26 @@
+# api/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from api import search
+from api.models import EmployeeProfile
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the employee directory search index (needed after bulk loads, which bypass the signals)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        indexed, last_pk = 0, None
+        while True:
+            batch = EmployeeProfile.objects.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            pks = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            indexed += search.reindex_profiles(EmployeeProfile.objects.filter(pk__in=pks))
+            last_pk = pks[-1]
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} employee profiles."))
@@ -0,0 +1,16 @@
+# api/management/commands/reconcile_stats.py
+from django.core.management.base import BaseCommand
+
+from api import stats
+
+
+class Command(BaseCommand):
+    help = "Recounts the dashboard counters from the source tables and fixes any drift (run periodically, e.g. from cron)."
+
+    def handle(self, *args, **options):
+        drift = stats.reconcile()
+        for name, delta in drift.items():
+            if delta:
+                self.stdout.write(self.style.WARNING(f"{name}: corrected by {delta:+d}"))
+        if not any(drift.values()):
+            self.stdout.write(self.style.SUCCESS("Counters match the source tables."))
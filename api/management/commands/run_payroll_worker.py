@@ -0,0 +1,33 @@
+# api/management/commands/run_payroll_worker.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = "Claims and processes queued payroll jobs from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the queue until empty, then exit.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty.')
+
+    def handle(self, *args, **options):
+        worker_id = jobs.get_worker_id()
+        self.stdout.write(f"Payroll worker {worker_id} started.")
+        try:
+            while True:
+                close_old_connections() # Long-running process: respect CONN_MAX_AGE / drop broken connections
+                job = jobs.claim_next_job(worker_id)
+                if job is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+                self.stdout.write(f"Claimed job {job.pk} (pay run {job.pay_run_id}, attempt {job.attempts}).")
+                ok = jobs.run_job(job)
+                self.stdout.write(f"Job {job.pk} {'completed' if ok else 'failed'}.")
+        except KeyboardInterrupt:
+            self.stdout.write(f"Payroll worker {worker_id} stopped.")
@@ -0,0 +1,23 @@
+# api/management/commands/snapshot_jwks.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.auth_utils import JWKSKeyManager
+from hrms_backend import config_loader
+
+
+class Command(BaseCommand):
+    help = ("Fetches the Clerk JWKS and writes it as the packaged fallback snapshot (settings.CLERK_JWKS_FALLBACK), "
+            "which workers verify tokens with until their first fetch. Run at deploy time; the keys are public.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default=None, help='JWKS URL (default: settings.CLERK_JWKS_URL).')
+        parser.add_argument('--output', default=None, help='File to write (default: settings.CLERK_JWKS_FALLBACK).')
+
+    def handle(self, *args, **options):
+        manager = JWKSKeyManager(options['url'] or settings.CLERK_JWKS_URL, retry_interval=0)
+        if manager.get_jwks() is None:
+            raise CommandError(f'Could not fetch a JWKS with signing keys from {manager.url} (see the log).')
+        output = options['output'] or settings.CLERK_JWKS_FALLBACK
+        config_loader.write_snapshot(output, manager.snapshot())
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(manager.get_jwks()['keys'])} keys from {manager.url} to {output}."))
@@ -0,0 +1,49 @@
+# api/middleware.py
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+class QueryStats:
+    """ execute_wrapper hook counting statements and the time spent in them. """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header with the request's SQL query count, DB time and total time, e.g.
+        Server-Timing: db;dur=4.1;desc="6 queries", app;dur=17.9
+    Visible in the browser's network panel. Disable with SERVER_TIMING=False.
+    Queries run while a streaming response is being consumed are not included.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        metrics = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed * 1000:.1f}'
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = f'{existing}, {metrics}' if existing else metrics
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_payrolljob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payrun",
+            name="checkpoint_employee_id",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="payrun",
+            name="stubs_generated",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
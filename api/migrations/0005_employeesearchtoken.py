@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:02
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of api.search's tokenizer as of this migration, so later changes to it do not alter history
+WEIGHTS = {"last_name": 5, "first_name": 4, "email": 3, "job_title": 2, "department": 1}
+TOKEN_MAX_LENGTH = 64
+WORD = re.compile(r"\w+")
+
+
+def profile_tokens(first_name, last_name, email, job_title, department_name):
+    tokens = {}
+    for field, text in (
+        ("first_name", first_name),
+        ("last_name", last_name),
+        ("email", email),
+        ("job_title", job_title),
+        ("department", department_name),
+    ):
+        for token in WORD.findall((text or "").lower()):
+            token = token[:TOKEN_MAX_LENGTH]
+            tokens[token] = max(tokens.get(token, 0), WEIGHTS[field])
+    return tokens
+
+
+def build_search_index(apps, schema_editor):
+    EmployeeProfile = apps.get_model("api", "EmployeeProfile")
+    EmployeeSearchToken = apps.get_model("api", "EmployeeSearchToken")
+    rows = []
+    for profile in EmployeeProfile.objects.select_related("user", "department").iterator(chunk_size=2000):
+        tokens = profile_tokens(
+            profile.user.first_name,
+            profile.user.last_name,
+            profile.user.email,
+            profile.job_title,
+            profile.department.name if profile.department else "",
+        )
+        rows.extend(
+            EmployeeSearchToken(profile_id=profile.pk, token=token, weight=weight)
+            for token, weight in tokens.items()
+        )
+        if len(rows) >= 10000:
+            EmployeeSearchToken.objects.bulk_create(rows)
+            rows = []
+    EmployeeSearchToken.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_payrun_checkpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmployeeSearchToken",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("token", models.CharField(max_length=64)),
+                ("weight", models.PositiveSmallIntegerField(default=1)),
+                (
+                    "profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_tokens",
+                        to="api.employeeprofile",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["token", "profile"], name="search_token_prefix_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("profile", "token"),
+                        name="uniq_search_token_per_profile",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_current_pointers(apps, schema_editor):
+    EmployeeProfile = apps.get_model("api", "EmployeeProfile")
+    Salary = apps.get_model("api", "Salary")
+    TitleHistory = apps.get_model("api", "TitleHistory")
+    latest_salary = Salary.objects.filter(employee=OuterRef("pk"), is_current=True).order_by("-effective_date", "-id")
+    latest_title = TitleHistory.objects.filter(employee=OuterRef("pk")).order_by("-start_date", "-id")
+    EmployeeProfile.objects.update(
+        current_salary=Subquery(latest_salary.values("id")[:1]),
+        current_title=Subquery(latest_title.values("id")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_employeesearchtoken"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employeeprofile",
+            name="current_salary",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="api.salary",
+            ),
+        ),
+        migrations.AddField(
+            model_name="employeeprofile",
+            name="current_title",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="api.titlehistory",
+            ),
+        ),
+        migrations.RunPython(backfill_current_pointers, migrations.RunPython.noop),
+    ]
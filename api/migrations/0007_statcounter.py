@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:14
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    Department = apps.get_model("api", "Department")
+    EmployeeProfile = apps.get_model("api", "EmployeeProfile")
+    PayRun = apps.get_model("api", "PayRun")
+    StatCounter = apps.get_model("api", "StatCounter")
+    counts = {
+        "active_employees": EmployeeProfile.objects.filter(user__is_active=True).count(),
+        "pending_onboarding": EmployeeProfile.objects.filter(
+            onboarding_status__in=["Pending", "Scheduled", "InProgress"]
+        ).count(),
+        "pending_payruns": PayRun.objects.filter(status="Pending").count(),
+        "total_users": User.objects.count(),
+        "active_users": User.objects.filter(is_active=True).count(),
+        "departments": Department.objects.count(),
+    }
+    StatCounter.objects.bulk_create([StatCounter(name=name, value=value) for name, value in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_employeeprofile_current_pointers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatCounter",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("value", models.BigIntegerField(default=0)),
+                ("reconciled_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_statcounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClerkWebhookEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event_id", models.CharField(max_length=255, unique=True)),
+                ("event_type", models.CharField(max_length=50)),
+                ("clerk_id", models.CharField(max_length=255)),
+                ("payload", models.JSONField()),
+                ("occurred_at", models.DateTimeField(blank=True, null=True)),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["processed_at", "id"], name="webhook_event_pending_idx"
+                    ),
+                    models.Index(
+                        fields=["clerk_id", "occurred_at"],
+                        name="webhook_event_user_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
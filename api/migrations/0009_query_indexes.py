@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:30
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def clear_duplicate_current_salaries(apps, schema_editor):
+    # Keep only the latest current salary per employee (what payroll and current_salary already used)
+    Salary = apps.get_model("api", "Salary")
+    latest = Salary.objects.filter(employee=OuterRef("employee"), is_current=True).order_by("-effective_date", "-id")
+    stale = list(
+        Salary.objects.filter(is_current=True)
+        .annotate(latest_id=Subquery(latest.values("id")[:1]))
+        .exclude(pk=F("latest_id"))
+        .values_list("pk", flat=True)
+    )
+    Salary.objects.filter(pk__in=stale).update(is_current=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_clerkwebhookevent"),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_current_salaries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="employeeprofile",
+            index=models.Index(
+                fields=["onboarding_status", "onboarding_start_date"],
+                name="profile_onboarding_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="payrun",
+            index=models.Index(fields=["status"], name="payrun_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="paystub",
+            index=models.Index(
+                fields=["employee", "pay_run"], name="paystub_employee_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="salary",
+            index=models.Index(
+                fields=["employee", "effective_date"], name="salary_employee_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="titlehistory",
+            index=models.Index(
+                fields=["employee", "start_date"], name="title_latest_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="salary",
+            constraint=models.UniqueConstraint(
+                models.Case(models.When(is_current=True, then=models.F("employee"))),
+                name="one_current_salary_per_employee",
+                violation_error_message="This employee already has a current salary.",
+            ),
+        ),
+    ]
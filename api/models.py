@@ -1,12 +1,27 @@
 # api/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, When
 from django.conf import settings # If using settings.AUTH_USER_MODEL later
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin # If swapping AUTH_USER_MODEL
 from django.core.exceptions import ValidationError # For custom validation
+from django.utils import timezone
+
+
+class CountedModel(models.Model):
+    """
+    Base for the models behind the dashboard counters (see api.signals). save() runs in a transaction,
+    so the stored state locked in pre_save, the write and the counter update commit or roll back together.
+    """
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 # --- Existing Models (User, Department) ---
-class User(models.Model):
+class User(CountedModel):
     ROLE_CHOICES = [
         ('employee', 'Employee'),
         ('hr_manager', 'HR Manager'),
@@ -21,6 +36,9 @@ class User(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['updated_at'], name='user_updated_idx')] # Principal cache sync (api.auth_utils)
+
     def __str__(self):
         return self.email
 
@@ -36,7 +54,7 @@ class Department(models.Model):
 
 
 # --- Updated EmployeeProfile Model ---
-class EmployeeProfile(models.Model):
+class EmployeeProfile(CountedModel):
     ONBOARDING_STATUS_CHOICES = [
         ('Pending', 'Pending'),
         ('Scheduled', 'Scheduled'), # E.g., Offer accepted, start date set
@@ -61,12 +79,38 @@ class EmployeeProfile(models.Model):
     )
     onboarding_start_date = models.DateField(null=True, blank=True) # Tentative or actual start date
 
+    # Denormalized pointers so profile reads need no per-row history queries; kept in step by the sync_* methods
+    current_salary = models.ForeignKey('Salary', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    current_title = models.ForeignKey('TitleHistory', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['onboarding_status', 'onboarding_start_date'], name='profile_onboarding_idx')] # Pending onboarding list
+
     def __str__(self):
         return f"Profile for {self.user.email}"
 
+    def sync_current_salary(self, edited=None):
+        """ Points current_salary at the salary payroll uses: the latest one flagged is_current. """
+        latest = self.salaries.filter(is_current=True).order_by('-effective_date', '-id').first()
+        self._set_pointer('current_salary', latest, edited)
+
+    def sync_current_title(self, edited=None):
+        """ Points current_title at the latest title history entry. """
+        latest = self.title_history.order_by('-start_date', '-id').first()
+        self._set_pointer('current_title', latest, edited)
+
+    def _set_pointer(self, field, target, edited=None):
+        # `edited`: a history row just changed in place; if it is the current one the profile still changed
+        target_id = target.pk if target else None
+        if getattr(self, f'{field}_id') != target_id or (edited is not None and edited.pk == target_id):
+            now = timezone.now()
+            EmployeeProfile.objects.filter(pk=self.pk).update(**{f'{field}_id': target_id, 'updated_at': now})
+            setattr(self, field, target)
+            self.updated_at = now
+
 # --- Existing Salary and TitleHistory ---
 class Salary(models.Model):
     employee = models.ForeignKey(EmployeeProfile, on_delete=models.CASCADE, related_name='salaries')
@@ -77,6 +121,16 @@ class Salary(models.Model):
 
     class Meta:
         ordering = ['-effective_date', '-id'] # Ensure unique ordering
+        # Current salary / history list / payroll scan, in (employee, effective_date, id) order. is_current is left out:
+        # Django filters it as a bare `WHERE is_current`, which no index can seek on, and as a key column it would stop
+        # the index serving the `-id` tie-break.
+        indexes = [models.Index(fields=['employee', 'effective_date'], name='salary_employee_date_idx')]
+        constraints = [
+            # At most one current salary per employee. An expression index rather than a partial one (condition=),
+            # which MySQL does not support; rows that are not current index as NULL and never collide.
+            models.UniqueConstraint(Case(When(is_current=True, then=F('employee'))), name='one_current_salary_per_employee',
+                                    violation_error_message='This employee already has a current salary.'),
+        ]
 
     def __str__(self):
         return f"{self.employee.user.email} - {self.amount} as of {self.effective_date}"
@@ -90,12 +144,13 @@ class TitleHistory(models.Model):
 
     class Meta:
         ordering = ['-start_date', '-id']
+        indexes = [models.Index(fields=['employee', 'start_date'], name='title_latest_idx')] # Latest title / history list
 
     def __str__(self):
         return f"{self.employee.user.email} - {self.job_title} starting {self.start_date}"
 
 # --- New Payroll Models ---
-class PayRun(models.Model):
+class PayRun(CountedModel):
     """ Represents a scheduled or processed payroll period. """
     STATUS_CHOICES = [
         ('Pending', 'Pending'), # Scheduled but not processed
@@ -109,9 +164,13 @@ class PayRun(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     created_at = models.DateTimeField(auto_now_add=True)
     processed_at = models.DateTimeField(null=True, blank=True) # When completed/failed
+    # Resume point for chunked processing: stubs up to and including this employee are committed
+    checkpoint_employee_id = models.CharField(max_length=255, blank=True, default='')
+    stubs_generated = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-pay_date', '-id']
+        indexes = [models.Index(fields=['status'], name='payrun_status_idx')] # Pending pay run counts / enqueue
 
     def clean(self):
         # Basic validation
@@ -141,6 +200,7 @@ class PayStub(models.Model):
         ordering = ['-pay_run__pay_date', '-id']
         # Prevent duplicate stubs for the same employee in the same run
         unique_together = ('pay_run', 'employee')
+        indexes = [models.Index(fields=['employee', 'pay_run'], name='paystub_employee_idx')] # An employee's stubs, joined to their runs
 
     def clean(self):
         # Basic calculation check (can be done on save)
@@ -151,3 +211,79 @@ class PayStub(models.Model):
 
     def __str__(self):
         return f"Paystub for {self.employee.user.email} - Run {self.pay_run.id} (Pay Date: {self.pay_run.pay_date})"
+
+
+# --- Background Jobs ---
+class PayrollJob(models.Model):
+    """ A queued request to process a PayRun, claimed by `manage.py run_payroll_worker`. """
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Running', 'Running'),
+        ('Completed', 'Completed'),
+        ('Failed', 'Failed'),
+    ]
+    pay_run = models.ForeignKey(PayRun, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Queued')
+    total = models.PositiveIntegerField(default=0) # Eligible employees, counted when the job starts
+    processed = models.PositiveIntegerField(default=0) # Stubs written so far
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=255, blank=True) # host:pid of the claiming worker
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True) # Doubles as the worker heartbeat
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+
+    def __str__(self):
+        return f"Payroll job {self.id} for run {self.pay_run_id} - {self.status} ({self.processed}/{self.total})"
+
+
+# --- Directory Search Index ---
+class EmployeeSearchToken(models.Model):
+    """ One normalized word of a profile's name/email/title/department, maintained by api.signals. """
+    profile = models.ForeignKey(EmployeeProfile, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1) # Field weight, see api.search.WEIGHTS
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['profile', 'token'], name='uniq_search_token_per_profile')]
+        indexes = [models.Index(fields=['token', 'profile'], name='search_token_prefix_idx')] # Serves LIKE 'x%' lookups
+
+    def __str__(self):
+        return f"{self.token} -> {self.profile_id}"
+
+
+# --- Dashboard Counters ---
+class StatCounter(models.Model):
+    """ A dashboard count kept current by api.signals (see api.stats); `manage.py reconcile_stats` repairs drift. """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+# --- Clerk Webhook Inbox ---
+class ClerkWebhookEvent(models.Model):
+    """ A received Clerk webhook, stored by /api/sync-user/ and applied by `manage.py process_clerk_webhooks` (see api.webhooks). """
+    event_id = models.CharField(max_length=255, unique=True) # svix-id header; a redelivery reuses it
+    event_type = models.CharField(max_length=50)
+    clerk_id = models.CharField(max_length=255)
+    payload = models.JSONField() # The event's `data` object
+    occurred_at = models.DateTimeField(null=True, blank=True) # Clerk's event timestamp, orders events for one user
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['processed_at', 'id'], name='webhook_event_pending_idx'), # The consumer's queue scan
+            models.Index(fields=['clerk_id', 'occurred_at'], name='webhook_event_user_idx'), # Newest applied event per user
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} for {self.clerk_id} ({self.event_id})"
@@ -0,0 +1,149 @@
+# api/pagination.py
+import base64
+import json
+from collections import OrderedDict
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor (keyset) pagination over a complete, unique ordering such as ('-pay_run__pay_date', 'id').
+
+    The cursor carries the ordering values of the last row served; the next page is selected
+    with a lexicographic WHERE on those columns instead of an OFFSET, so a deep page costs the
+    same as the first one. Nullable columns sort NULLS FIRST ascending / NULLS LAST descending.
+
+    Viewsets declare `keyset_ordering`; function views pass `ordering=` to the constructor.
+    """
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        self.ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.columns = self.resolve_ordering(queryset.model, self.ordering or getattr(view, 'keyset_ordering'))
+        queryset = queryset.order_by(*[self.order_expression(column) for column in self.columns])
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.next_position = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            self.next_position = [self.row_value(rows[-1], column['path']) for column in self.columns]
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([('next', self.get_next_link()), ('results', data)]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    # --- Ordering ---
+    @staticmethod
+    def resolve_ordering(model, ordering):
+        columns = []
+        for entry in ordering:
+            path = entry.lstrip('-')
+            columns.append({'path': path, 'descending': entry.startswith('-'), 'field': KeysetPagination.resolve_field(model, path)})
+        return columns
+
+    @staticmethod
+    def resolve_field(model, path):
+        """ Model field at the end of a `__` path, or None for annotations. """
+        field = None
+        for part in path.split('__'):
+            if field is not None:
+                model = field.related_model
+            try:
+                field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+            except FieldDoesNotExist:
+                return None
+        return field
+
+    @staticmethod
+    def order_expression(column):
+        nullable = column['field'] is not None and column['field'].null
+        if column['descending']:
+            return F(column['path']).desc(nulls_last=True) if nullable else f"-{column['path']}"
+        return F(column['path']).asc(nulls_first=True) if nullable else column['path']
+
+    def after(self, position):
+        """ WHERE clause selecting rows strictly after `position` in the ordering. """
+        condition = Q(pk__in=[])
+        equal_so_far = Q()
+        for column, value in zip(self.columns, position):
+            path, nullable = column['path'], column['field'] is not None and column['field'].null
+            if value is None:
+                # NULL sorts first ascending (anything non-null is later) and last descending (nothing is later)
+                later = Q(pk__in=[]) if column['descending'] else Q(**{f'{path}__isnull': False})
+                same = Q(**{f'{path}__isnull': True})
+            else:
+                later = Q(**{f"{path}__{'lt' if column['descending'] else 'gt'}": value})
+                if column['descending'] and nullable:
+                    later |= Q(**{f'{path}__isnull': True})
+                same = Q(**{path: value})
+            condition |= equal_so_far & later
+            equal_so_far &= same
+        return condition
+
+    # --- Cursor encoding ---
+    @staticmethod
+    def row_value(row, path):
+        if isinstance(row, dict): # .values() rows (api.projections)
+            return row[path]
+        value = row
+        for part in path.split('__'):
+            value = getattr(value, part)
+            if value is None:
+                return None
+        return value
+
+    def encode_cursor(self, position):
+        values = [value if value is None or isinstance(value, (int, float, str)) else str(value) for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError
+            return [value if value is None or column['field'] is None else column['field'].to_python(value)
+                    for column, value in zip(self.columns, values)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
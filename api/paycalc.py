@@ -0,0 +1,32 @@
+# api/paycalc.py
+"""
+Pure pay calculation helpers.
+
+Deliberately free of Django imports so payroll worker processes (see api/payroll.py)
+can import it without configuring settings or touching the database.
+"""
+from decimal import Decimal
+
+DAYS_PER_YEAR = Decimal('365')
+DEDUCTION_RATE = Decimal('0.20') # Flat estimate until real tax tables are wired in
+CENT = Decimal('0.01')
+
+
+def calculate_stub_amounts(annual_salary, days_in_period):
+    """ Prorates an annual salary over the period. Returns (gross, deductions, net) rounded to cents. """
+    daily_rate = Decimal(annual_salary) / DAYS_PER_YEAR
+    gross = (daily_rate * days_in_period).quantize(CENT)
+    deductions = (gross * DEDUCTION_RATE).quantize(CENT)
+    # Net is derived from the rounded figures so PayStub.clean() always holds
+    return gross, deductions, gross - deductions
+
+
+def compute_shard(salary_rows, days_in_period):
+    """ [(employee_id, annual_salary), ...] -> [(employee_id, gross, deductions, net), ...], order preserved. """
+    return [(employee_id, *calculate_stub_amounts(amount, days_in_period)) for employee_id, amount in salary_rows]
+
+
+def split_shards(rows, shard_count):
+    """ Splits id-ordered rows into at most `shard_count` contiguous primary-key ranges. """
+    shard_size = -(-len(rows) // max(1, shard_count)) or 1
+    return [rows[i:i + shard_size] for i in range(0, len(rows), shard_size)]
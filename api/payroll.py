@@ -0,0 +1,120 @@
+# api/payroll.py
+"""
+Set-based payroll engine.
+
+Current salaries are read in keyset-ordered chunks (one joined query per chunk),
+stubs are computed in memory and written with one bulk INSERT per chunk, so the
+number of round trips grows with the number of batches instead of the headcount.
+
+Each chunk commits in its own short transaction together with the run's checkpoint
+(PayRun.checkpoint_employee_id), so a failed run resumes after the last committed
+employee instead of starting over. Inserts ignore conflicts on the
+(pay_run, employee) unique key, which makes replaying a chunk harmless.
+
+With PAYROLL_WORKERS > 1 each chunk is split into primary-key ranges whose stub
+amounts are computed in a process pool; all database access stays in the calling
+process and the shards are merged back in order, so the output matches the serial path.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from django.conf import settings
+from django.db import transaction
+
+from .models import Salary, PayRun, PayStub
+from .paycalc import calculate_stub_amounts, compute_shard, split_shards
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_WORKERS = 1
+
+
+def get_batch_size():
+    return int(getattr(settings, 'PAYROLL_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+
+def get_worker_count():
+    return int(getattr(settings, 'PAYROLL_WORKERS', DEFAULT_WORKERS))
+
+
+def period_days(pay_run):
+    """ Number of calendar days covered by the pay run (inclusive, at least 1). """
+    return max(1, (pay_run.end_date - pay_run.start_date).days + 1)
+
+
+def iter_current_salaries(batch_size=None, after_employee_id=None):
+    """
+    Yields lists of (employee_id, annual_salary) for active employees with a current salary,
+    ordered by employee_id and starting after `after_employee_id`. Each list costs exactly one query.
+    """
+    batch_size = batch_size or get_batch_size()
+    # One current salary per employee is enforced (Salary.Meta.constraints), so employee_id is a unique order
+    base = Salary.objects.filter(is_current=True, employee__user__is_active=True)\
+                         .order_by('employee_id')\
+                         .values_list('employee_id', 'amount')
+    last_employee_id = after_employee_id or None
+    while True:
+        queryset = base if last_employee_id is None else base.filter(employee_id__gt=last_employee_id)
+        rows = list(queryset[:batch_size])
+        if not rows:
+            return
+        last_employee_id = rows[-1][0]
+        yield rows
+
+
+def count_eligible(after_employee_id=None):
+    """ Number of employees run_payroll will pay after the given checkpoint (one COUNT query). """
+    queryset = Salary.objects.filter(is_current=True, employee__user__is_active=True)
+    if after_employee_id:
+        queryset = queryset.filter(employee_id__gt=after_employee_id)
+    return queryset.count() # One current salary per employee
+
+
+def build_stubs(pay_run, computed_rows):
+    return [PayStub(pay_run=pay_run, employee_id=employee_id, gross_pay=gross, deductions=deductions, net_pay=net)
+            for employee_id, gross, deductions, net in computed_rows]
+
+
+def save_batch(pay_run, stubs, stubs_generated):
+    """
+    Writes one chunk of stubs and advances the run's checkpoint in the same short transaction.
+    Returns the run's new stub count, `stubs_generated` plus the rows this chunk inserted: rows
+    that already existed (a replayed chunk) are skipped as conflicts and not counted twice.
+    """
+    with transaction.atomic():
+        # Only the chunk's rows are counted, so the work per batch stays constant as the run grows
+        existing = PayStub.objects.filter(pay_run=pay_run, employee_id__in=[stub.employee_id for stub in stubs]).count()
+        PayStub.objects.bulk_create(stubs, batch_size=len(stubs), ignore_conflicts=True)
+        stubs_generated += len(stubs) - existing
+        PayRun.objects.filter(pk=pay_run.pk).update(checkpoint_employee_id=stubs[-1].employee_id, stubs_generated=stubs_generated)
+    return stubs_generated
+
+
+def run_payroll(pay_run, batch_size=None, workers=None, progress=None):
+    """
+    Generates the stubs for a pay run, resuming after its checkpoint. Returns the run's total stub count.
+    `progress`, if given, is called with the running total after each batch is committed.
+    """
+    batch_size = batch_size or get_batch_size()
+    workers = workers or get_worker_count()
+    days_in_period = period_days(pay_run)
+    pay_run.refresh_from_db(fields=['checkpoint_employee_id', 'stubs_generated'])
+
+    pool = None
+    if workers > 1:
+        # 'spawn' keeps children clear of the parent's DB connection and threads; they only import api.paycalc
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        stubs_created_count = pay_run.stubs_generated
+        for salary_rows in iter_current_salaries(batch_size, after_employee_id=pay_run.checkpoint_employee_id):
+            if pool is None:
+                computed_rows = compute_shard(salary_rows, days_in_period)
+            else:
+                shards = split_shards(salary_rows, workers)
+                computed_rows = [row for shard in pool.map(compute_shard, shards, repeat(days_in_period)) for row in shard]
+            stubs_created_count = save_batch(pay_run, build_stubs(pay_run, computed_rows), stubs_created_count)
+            if progress is not None:
+                progress(stubs_created_count)
+        return stubs_created_count
+    finally:
+        if pool is not None:
+            pool.shutdown()
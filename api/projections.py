@@ -0,0 +1,113 @@
+# api/projections.py
+"""
+Fast read path for large list endpoints.
+
+A Projection selects only the columns a response needs with `.values()` and turns each row
+into the response dict with a function compiled once per projection, skipping model
+instantiation and DRF field machinery. The output must be exactly what the matching
+serializer produces; tests compare the rendered JSON byte for byte.
+"""
+import decimal
+from django.utils import timezone
+
+
+def format_decimal(places):
+    """ DecimalField.to_representation with COERCE_DECIMAL_TO_STRING (the DRF default). """
+    exponent = decimal.Decimal('.1') ** places
+
+    def to_string(value):
+        if value is None:
+            return ''
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return f'{value.quantize(exponent):f}'
+    return to_string
+
+
+def format_datetime(value):
+    """ DateTimeField.to_representation for ISO-8601 output in the current time zone. """
+    if not value:
+        return None
+    value = timezone.localtime(value).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def format_date(value):
+    return value.isoformat() if value else None
+
+
+class Projection:
+    """
+    Declared as (output key, source) pairs in serializer field order. A source is a `.values()`
+    path, a (path, formatter) pair, or a (tuple of paths, formatter) pair for derived values.
+    """
+    def __init__(self, *fields):
+        self.fields = fields
+        self.paths = []
+        self.formatters = {}
+        lines = []
+        for key, source in fields:
+            if isinstance(source, str):
+                source = (source, None)
+            paths, formatter = source
+            paths = (paths,) if isinstance(paths, str) else paths
+            self.paths.extend(path for path in paths if path not in self.paths)
+            arguments = ', '.join(f'row[{path!r}]' for path in paths)
+            if formatter is None:
+                lines.append(f'{key!r}: {arguments}')
+            else:
+                self.formatters[f'f_{key}'] = formatter
+                lines.append(f'{key!r}: f_{key}({arguments})')
+        namespace = dict(self.formatters)
+        exec(f"def render_row(row):\n    return {{{', '.join(lines)}}}", namespace)
+        self.render_row = namespace['render_row']
+
+    def values(self, queryset, ordering=()):
+        """ `queryset` projected to the needed columns, plus any ordering paths (for cursor pagination). """
+        extra = [entry.lstrip('-') for entry in ordering if entry.lstrip('-') not in self.paths]
+        return queryset.values(*self.paths, *extra)
+
+    def render(self, rows):
+        render_row = self.render_row
+        return [render_row(row) for row in rows]
+
+
+def pay_run_label(start_date, end_date, pay_date, status):
+    """ PayRun.__str__ from raw column values. """
+    return f"Pay Run: {start_date} to {end_date} (Pay Date: {pay_date}) - {status}"
+
+
+# EmployeeProfileBasicSerializer
+EMPLOYEE_BASIC = Projection(
+    ('clerk_id', 'user__clerk_id'),
+    ('first_name', 'user__first_name'),
+    ('last_name', 'user__last_name'),
+    ('email', 'user__email'),
+    ('job_title', 'job_title'),
+    ('department_name', 'department__name'),
+)
+
+# PayStubEmployeeSerializer
+PAYSTUB_EMPLOYEE = Projection(
+    ('id', 'id'),
+    ('pay_date', ('pay_run__pay_date', format_date)),
+    ('period_start_date', ('pay_run__start_date', format_date)),
+    ('period_end_date', ('pay_run__end_date', format_date)),
+    ('gross_pay', ('gross_pay', format_decimal(2))),
+    ('deductions', ('deductions', format_decimal(2))),
+    ('net_pay', ('net_pay', format_decimal(2))),
+)
+
+# PayStubAdminSerializer
+PAYSTUB_ADMIN = Projection(
+    ('id', 'id'),
+    ('pay_run', 'pay_run_id'),
+    ('pay_run_info', (('pay_run__start_date', 'pay_run__end_date', 'pay_run__pay_date', 'pay_run__status'), pay_run_label)),
+    ('employee', 'employee_id'),
+    ('employee_email', 'employee__user__email'),
+    ('employee_name', (('employee__user__first_name', 'employee__user__last_name'), lambda first, last: f"{first} {last}")),
+    ('gross_pay', ('gross_pay', format_decimal(2))),
+    ('deductions', ('deductions', format_decimal(2))),
+    ('net_pay', ('net_pay', format_decimal(2))),
+    ('created_at', ('created_at', format_datetime)),
+)
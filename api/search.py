@@ -0,0 +1,84 @@
+# api/search.py
+"""
+Employee directory search.
+
+Each profile is indexed as normalized word tokens in EmployeeSearchToken (one row per word,
+weighted by the field it came from). A search word matches indexed tokens by prefix, which
+is an index range scan instead of the previous five-way LIKE '%x%' over a join.
+"""
+import re
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+# Field weights: a hit on a name ranks above a hit on the department
+WEIGHTS = {'last_name': 5, 'first_name': 4, 'email': 3, 'job_title': 2, 'department': 1}
+TOKEN_MAX_LENGTH = 64
+MAX_QUERY_WORDS = 5
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """ Lower-cased word tokens of `text`; 'Jane.Doe@Acme.com' -> ['jane', 'doe', 'acme', 'com']. """
+    return [word[:TOKEN_MAX_LENGTH] for word in _WORD.findall((text or '').lower())]
+
+
+def profile_tokens(first_name, last_name, email, job_title, department_name):
+    """ {token: weight} for one profile, keeping the highest weight when a word occurs in several fields. """
+    tokens = {}
+    for field, text in (('first_name', first_name), ('last_name', last_name), ('email', email),
+                        ('job_title', job_title), ('department', department_name)):
+        for token in tokenize(text):
+            tokens[token] = max(tokens.get(token, 0), WEIGHTS[field])
+    return tokens
+
+
+def reindex_profiles(profiles):
+    """ Rebuilds the tokens of `profiles` (an EmployeeProfile queryset). """
+    from .models import EmployeeSearchToken
+    rows = []
+    profile_ids = []
+    for profile in profiles.select_related('user', 'department'):
+        profile_ids.append(profile.pk)
+        tokens = profile_tokens(profile.user.first_name, profile.user.last_name, profile.user.email,
+                                profile.job_title, profile.department.name if profile.department else '')
+        rows.extend(EmployeeSearchToken(profile_id=profile.pk, token=token, weight=weight) for token, weight in tokens.items())
+    with transaction.atomic():
+        EmployeeSearchToken.objects.filter(profile_id__in=profile_ids).delete()
+        EmployeeSearchToken.objects.bulk_create(rows, batch_size=2000)
+    return len(profile_ids)
+
+
+def prefix_match(word):
+    """
+    Q for tokens starting with `word` (tokens are lower-case). `istartswith` is a plain LIKE 'x%', which
+    the token index serves under any collation; on MySQL `startswith` would be LIKE BINARY, which the
+    case-insensitive column's index cannot, and a hand-built range depends on the collation's order.
+    """
+    return Q(token__istartswith=word)
+
+
+def search_profiles(queryset, term):
+    """
+    Narrows an EmployeeProfile queryset to profiles matching every word of `term` (by prefix)
+    and annotates `search_rank`: per word, the best field weight, doubled for a whole-word hit.
+    """
+    from .models import EmployeeSearchToken
+    words = list(dict.fromkeys(tokenize(term)))[:MAX_QUERY_WORDS]
+    if not words:
+        return queryset.annotate(search_rank=Value(0, output_field=IntegerField()))
+
+    per_word = {
+        f'word{index}': Max(Case(When(token=word, then=F('weight') * 2),
+                                 When(prefix_match(word), then=F('weight')),
+                                 default=Value(0), output_field=IntegerField()))
+        for index, word in enumerate(words)
+    }
+    any_word = Q()
+    for word in words:
+        any_word |= prefix_match(word)
+    matches = EmployeeSearchToken.objects.filter(any_word).values('profile_id').annotate(**per_word)\
+                                         .filter(**{f'{name}__gt': 0 for name in per_word}) # Every word must match
+    rank = matches.filter(profile_id=OuterRef('pk')).annotate(rank=sum(F(name) for name in per_word)).values('rank')
+    return queryset.filter(pk__in=matches.values('profile_id'))\
+                   .annotate(search_rank=Coalesce(Subquery(rank, output_field=IntegerField()), Value(0)))
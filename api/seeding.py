@@ -0,0 +1,168 @@
+# api/seeding.py
+"""
+Synthetic HRMS data at production-like scale (`manage.py seed_hrms`, `manage.py bench_endpoints`).
+
+Everything derives from one random.Random(seed), so a given seed and size always produce the
+same rows. Rows are written with bulk_create in fixed-size batches; the derived state that
+signals would normally maintain (current salary/title pointers, search tokens, dashboard
+counters) is rebuilt once at the end.
+
+Distributions: department sizes fall off like 1/rank, hire dates are exponential (most staff
+hired in the last few years), salaries are log-normal around a per-level base with yearly
+raises, and longer-tenured staff have more promotions in their title history.
+"""
+import calendar
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+
+from . import search, stats
+from .bulk_import import sync_pointers
+from .models import User, Department, EmployeeProfile, Salary, TitleHistory, PayRun, PayStub
+from .paycalc import calculate_stub_amounts
+
+BATCH_SIZE = 2000
+DEPARTMENTS = [
+    ('Engineering', 'Engineer'), ('Sales', 'Account Executive'), ('Customer Support', 'Support Specialist'),
+    ('Operations', 'Operations Analyst'), ('Marketing', 'Marketing Manager'), ('Finance', 'Accountant'),
+    ('Product', 'Product Manager'), ('Design', 'Designer'), ('People', 'HR Partner'), ('Legal', 'Counsel'),
+]
+LEVELS = ['Associate', '', 'Senior', 'Staff', 'Principal'] # Title prefixes, junior to senior
+LEVEL_WEIGHTS = [30, 35, 20, 10, 5]
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+               'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Carlos', 'Karen',
+               'Wei', 'Priya', 'Ahmed', 'Fatima', 'Hiroshi', 'Yuki', 'Olga', 'Ivan', 'Aisha', 'Kwame',
+               'Sofia', 'Mateo', 'Chloe', 'Liam', 'Emma', 'Noah', 'Ava', 'Lucas', 'Mia', 'Arjun']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+              'Lee', 'Perez', 'Thompson', 'White', 'Harris', 'Sanchez', 'Clark', 'Ramirez', 'Lewis', 'Robinson',
+              'Nguyen', 'Kim', 'Patel', 'Chen', 'Singh', 'Khan', 'Ivanova', 'Okafor', 'Tanaka', 'Muller']
+ROLE_WEIGHTS = [('employee', 975), ('hr_manager', 20), ('admin', 5)]
+INACTIVE_RATE = 0.04
+FUTURE_HIRE_RATE = 0.02 # Accepted offers not started yet: pending onboarding
+MEAN_TENURE_DAYS = 3 * 365
+MAX_TENURE_DAYS = 15 * 365
+MAX_SALARY_HISTORY = 6
+
+
+def title_for(level, noun):
+    return f'{LEVELS[level]} {noun}'.strip()
+
+
+def pay_periods(count, today):
+    """ The `count` most recent semi-monthly periods ending before `today`, oldest first: (start, end, pay_date). """
+    periods = []
+    year, month, second_half = today.year, today.month, today.day > 15
+    while len(periods) < count:
+        if second_half:
+            start, end = date(year, month, 16), date(year, month, calendar.monthrange(year, month)[1])
+            second_half = False
+        else:
+            start, end = date(year, month, 1), date(year, month, 15)
+            second_half = True
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        if end < today:
+            periods.append((start, end, end + timedelta(days=5)))
+    return periods[::-1]
+
+
+def batched(rows, size=BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def seed(employees, departments=None, pay_runs=6, seed=42, prefix='seed'):
+    """
+    Inserts `employees` users/profiles (clerk ids '<prefix>_0000000'...) with salary and title
+    history across `departments` departments, plus `pay_runs` completed pay runs with stubs.
+    Returns {table: rows inserted}. Raises ValueError if users with this prefix already exist.
+    """
+    if User.objects.filter(clerk_id__startswith=f'{prefix}_').exists():
+        raise ValueError(f"Users with clerk_id prefix '{prefix}_' already exist.")
+    rng = random.Random(seed)
+    today = timezone.now().date()
+    departments = departments or min(len(DEPARTMENTS), max(1, employees // 50))
+    counts = dict.fromkeys(['departments', 'users', 'salaries', 'titles', 'pay_runs', 'stubs'], 0)
+
+    with transaction.atomic():
+        # Departments: reuse existing names; numbered copies beyond the built-in list
+        specs = [(DEPARTMENTS[i % len(DEPARTMENTS)][0] + (f' {i // len(DEPARTMENTS) + 1}' if i >= len(DEPARTMENTS) else ''),
+                  DEPARTMENTS[i % len(DEPARTMENTS)][1]) for i in range(departments)]
+        existing = set(Department.objects.filter(name__in=[name for name, _ in specs]).values_list('name', flat=True))
+        Department.objects.bulk_create([Department(name=name) for name, _ in specs if name not in existing])
+        counts['departments'] = len(specs) - len(existing)
+        department_ids = dict(Department.objects.filter(name__in=[name for name, _ in specs]).values_list('name', 'id'))
+        department_weights = [1 / (rank + 1) for rank in range(len(specs))]
+
+        users, profiles, salaries, titles = [], [], [], []
+        salary_history = {} # clerk_id -> [(effective_date, amount)] for the stubs, oldest first
+        for i in range(employees):
+            clerk_id = f'{prefix}_{i:07d}'
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            department_name, noun = rng.choices(specs, weights=department_weights)[0]
+            level = rng.choices(range(len(LEVELS)), weights=LEVEL_WEIGHTS)[0]
+            future_hire = rng.random() < FUTURE_HIRE_RATE
+            if future_hire:
+                hire_date = today + timedelta(days=rng.randint(1, 60))
+                onboarding = rng.choice(['Pending', 'Scheduled', 'InProgress'])
+            else:
+                hire_date = today - timedelta(days=min(int(rng.expovariate(1 / MEAN_TENURE_DAYS)), MAX_TENURE_DAYS))
+                onboarding = 'Completed'
+
+            users.append(User(clerk_id=clerk_id, email=f'{first}.{last}.{prefix}{i}@example.com'.lower(), first_name=first, last_name=last,
+                              role=rng.choices(*zip(*ROLE_WEIGHTS))[0], is_active=future_hire or rng.random() >= INACTIVE_RATE))
+            profiles.append(EmployeeProfile(user_id=clerk_id, department_id=department_ids[department_name], job_title=title_for(level, noun),
+                                            hire_date=hire_date, phone_number=f'555-{rng.randint(0, 9999):04d}',
+                                            onboarding_status=onboarding, onboarding_start_date=hire_date))
+
+            # Promotions: about one per two years of tenure, ending at the current level
+            years = max(0, (today - hire_date).days // 365)
+            promotions = min(level, years // 2)
+            starts = sorted(hire_date + timedelta(days=rng.randint(365, max(365, (today - hire_date).days))) for _ in range(promotions))
+            for step, start in enumerate([hire_date, *starts]):
+                end = starts[step] - timedelta(days=1) if step < promotions else None
+                titles.append(TitleHistory(employee_id=clerk_id, job_title=title_for(level - promotions + step, noun), start_date=start, end_date=end))
+
+            # Salary: log-normal around the level's base at hire, a 2-8% raise each anniversary
+            amount = Decimal(55000 * 1.25 ** (level - promotions) * rng.lognormvariate(0, 0.12)).quantize(Decimal('100'))
+            history = [(hire_date, amount)]
+            for year in range(1, years + 1):
+                amount = (amount * Decimal(1 + rng.uniform(0.02, 0.08))).quantize(Decimal('100'))
+                history.append((hire_date + timedelta(days=365 * year), amount))
+            history = history[-MAX_SALARY_HISTORY:]
+            salary_history[clerk_id] = history
+            salaries.extend(Salary(employee_id=clerk_id, amount=amount, effective_date=effective, is_current=step == len(history) - 1)
+                            for step, (effective, amount) in enumerate(history))
+
+        for model, rows in ((User, users), (EmployeeProfile, profiles), (Salary, salaries), (TitleHistory, titles)):
+            for batch in batched(rows):
+                model.objects.bulk_create(batch)
+        counts.update(users=len(users), salaries=len(salaries), titles=len(titles))
+
+        # Completed pay runs, each paying the employees active and hired by the period end at the salary then in effect
+        active = [(user.clerk_id, profile.hire_date) for user, profile in zip(users, profiles) if user.is_active]
+        for start, end, pay_date in pay_periods(pay_runs, today):
+            pay_run = PayRun.objects.create(start_date=start, end_date=end, pay_date=pay_date, status='Completed', processed_at=timezone.now())
+            days = (end - start).days + 1
+            stubs = []
+            for clerk_id, hire_date in active:
+                if hire_date > end:
+                    continue
+                amount = next((amount for effective, amount in reversed(salary_history[clerk_id]) if effective <= end), salary_history[clerk_id][0][1])
+                gross, deductions, net = calculate_stub_amounts(amount, days)
+                stubs.append(PayStub(pay_run=pay_run, employee_id=clerk_id, gross_pay=gross, deductions=deductions, net_pay=net))
+            for batch in batched(stubs):
+                PayStub.objects.bulk_create(batch)
+            PayRun.objects.filter(pk=pay_run.pk).update(stubs_generated=len(stubs), checkpoint_employee_id=active[-1][0] if active else '')
+            counts['pay_runs'] += 1
+            counts['stubs'] += len(stubs)
+
+        # State the signals would have maintained
+        now = timezone.now()
+        for batch in batched([profile.pk for profile in profiles], 1000):
+            sync_pointers(batch, now)
+            search.reindex_profiles(EmployeeProfile.objects.filter(pk__in=batch))
+        stats.reconcile()
+    return counts
@@ -1,6 +1,6 @@
 # api/serializers.py
 from rest_framework import serializers
-from .models import User, Department, EmployeeProfile, Salary, TitleHistory, PayRun, PayStub
+from .models import User, Department, EmployeeProfile, Salary, TitleHistory, PayRun, PayStub, PayrollJob
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -31,8 +31,8 @@ class TitleHistorySerializer(serializers.ModelSerializer):
 class EmployeeProfileSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     department_name = serializers.CharField(source='department.name', read_only=True, allow_null=True)
-    current_salary = SalarySerializer(read_only=True, source='salaries.first')
-    current_title = TitleHistorySerializer(read_only=True, source='title_history.first')
+    current_salary = SalarySerializer(read_only=True) # Denormalized pointers: select_related them
+    current_title = TitleHistorySerializer(read_only=True)
 
     class Meta:
         model = EmployeeProfile
@@ -62,8 +62,17 @@ class EmployeeProfileBasicSerializer(serializers.ModelSerializer):
 class PayRunSerializer(serializers.ModelSerializer):
     class Meta:
         model = PayRun
-        fields = ['id', 'start_date', 'end_date', 'pay_date', 'status', 'created_at', 'processed_at']
-        read_only_fields = ['id', 'status', 'created_at', 'processed_at'] # Status changed via action endpoint
+        fields = ['id', 'start_date', 'end_date', 'pay_date', 'status', 'created_at', 'processed_at', 'stubs_generated']
+        read_only_fields = ['id', 'status', 'created_at', 'processed_at', 'stubs_generated'] # Status changed via action endpoint
+
+
+# Progress of a queued/background pay run (read-only)
+class PayrollJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PayrollJob
+        fields = ['id', 'pay_run', 'status', 'processed', 'total', 'attempts', 'error',
+                  'created_at', 'started_at', 'finished_at', 'updated_at']
+        read_only_fields = fields
 
 
 # Basic serializer for PayStub list view (HR/Admin perspective)
@@ -102,3 +111,24 @@ class PayStubEmployeeSerializer(serializers.ModelSerializer):
             'gross_pay', 'deductions', 'net_pay'
              ]
         read_only_fields = fields # Employee view is read-only
+
+
+# One row of a bulk employee import (api.bulk_import). Blank cells are dropped before validation,
+# so an omitted column keeps the stored value; uniqueness is checked per batch, not per row.
+class EmployeeImportRowSerializer(serializers.Serializer):
+    clerk_id = serializers.CharField(max_length=255)
+    email = serializers.EmailField(max_length=254)
+    first_name = serializers.CharField(max_length=100, required=False)
+    last_name = serializers.CharField(max_length=100, required=False)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, required=False)
+    is_active = serializers.BooleanField(required=False)
+    department = serializers.CharField(max_length=100, required=False) # Department name
+    job_title = serializers.CharField(max_length=100, required=False)
+    hire_date = serializers.DateField(required=False)
+    phone_number = serializers.CharField(max_length=20, required=False)
+    address = serializers.CharField(required=False)
+    onboarding_status = serializers.ChoiceField(choices=EmployeeProfile.ONBOARDING_STATUS_CHOICES, required=False)
+    onboarding_start_date = serializers.DateField(required=False)
+    salary = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    salary_effective_date = serializers.DateField(required=False)
+    title_start_date = serializers.DateField(required=False)
@@ -0,0 +1,142 @@
+# api/signals.py
+"""
+Keeps derived data in step with the models it is built from:
+the directory search index (EmployeeSearchToken) and the dashboard counters (StatCounter).
+Queryset .update()/bulk_create() bypass these receivers: after bulk loads run
+`manage.py rebuild_search_index` and `manage.py reconcile_stats`.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import search, stats
+from .models import User, Department, EmployeeProfile, PayRun
+
+USER_FIELDS = {'first_name', 'last_name', 'email'}
+PROFILE_FIELDS = {'job_title', 'department'}
+
+
+def _touches(update_fields, indexed):
+    return update_fields is None or bool(indexed & set(update_fields))
+
+
+@receiver(post_save, sender=EmployeeProfile)
+def index_profile(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and _touches(update_fields, PROFILE_FIELDS | {'department_id'}):
+        search.reindex_profiles(EmployeeProfile.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=User)
+def index_user_profile(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    if not raw and not created and _touches(update_fields, USER_FIELDS): # A new user has no profile yet
+        search.reindex_profiles(EmployeeProfile.objects.filter(user_id=instance.pk))
+
+
+@receiver(pre_save, sender=Department)
+def remember_department_name(sender, instance, raw=False, **kwargs):
+    # Department forms save every field: compare names so a manager change does not reindex the whole department
+    if not raw and instance.pk:
+        instance._indexed_name = Department.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Department)
+def index_department_profiles(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created and getattr(instance, '_indexed_name', instance.name) != instance.name:
+        search.reindex_profiles(EmployeeProfile.objects.filter(department_id=instance.pk))
+
+
+@receiver(pre_delete, sender=Department)
+def remember_department_members(sender, instance, **kwargs):
+    # on_delete=SET_NULL detaches profiles with a queryset update, which sends no signals
+    instance._member_ids = list(EmployeeProfile.objects.filter(department_id=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Department)
+def index_former_members(sender, instance, **kwargs):
+    if getattr(instance, '_member_ids', None):
+        search.reindex_profiles(EmployeeProfile.objects.filter(pk__in=instance._member_ids))
+
+
+# --- Dashboard counters ---
+def _user_is_active(user_id):
+    return User.objects.filter(pk=user_id, is_active=True).exists()
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=EmployeeProfile)
+@receiver(pre_save, sender=PayRun)
+def remember_counted_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Stashes (row existed, counted field as stored) so post_save can work out the delta. The row is read
+    with SELECT ... FOR UPDATE inside the save's transaction (CountedModel.save), so a concurrent writer
+    making the same change waits and then reads the new value: the change is counted once.
+    """
+    if raw:
+        return
+    field = {User: 'is_active', EmployeeProfile: 'onboarding_status', PayRun: 'status'}[sender]
+    if update_fields is not None and field not in update_fields:
+        instance._counted_state = (True, getattr(instance, field)) # Counted field untouched: no query
+        return
+    stored = list(sender.objects.select_for_update().filter(pk=instance.pk).values_list(field, flat=True)[:1]) if instance.pk is not None else []
+    instance._counted_state = (bool(stored), stored[0] if stored else None)
+
+
+@receiver(post_save, sender=User)
+def count_user(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_counted_state'):
+        return
+    existed, was_active = instance._counted_state
+    if not existed:
+        stats.bump(total_users=1, active_users=instance.is_active) # A new user has no profile yet
+    elif was_active != instance.is_active:
+        delta = 1 if instance.is_active else -1
+        has_profile = EmployeeProfile.objects.filter(user_id=instance.pk).exists()
+        stats.bump(active_users=delta, active_employees=delta if has_profile else 0)
+
+
+@receiver(post_save, sender=EmployeeProfile)
+def count_profile(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_counted_state'):
+        return
+    existed, old_status = instance._counted_state
+    pending = instance.onboarding_status in stats.PENDING_ONBOARDING_STATUSES
+    if not existed:
+        stats.bump(pending_onboarding=pending, active_employees=_user_is_active(instance.user_id))
+    else:
+        stats.bump(pending_onboarding=int(pending) - int(old_status in stats.PENDING_ONBOARDING_STATUSES))
+
+
+@receiver(post_save, sender=PayRun)
+def count_pay_run(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_counted_state'):
+        return
+    existed, old_status = instance._counted_state
+    stats.bump(pending_payruns=int(instance.status == 'Pending') - int(existed and old_status == 'Pending'))
+
+
+@receiver(post_save, sender=Department)
+def count_department(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        stats.bump(departments=1)
+
+
+# Deletes are counted in pre_delete, inside the same transaction as the delete itself. A deleted
+# user's profile is removed by cascade first and counted by its own receiver.
+@receiver(pre_delete, sender=User)
+def uncount_user(sender, instance, **kwargs):
+    stats.bump(total_users=-1, active_users=-int(instance.is_active))
+
+
+@receiver(pre_delete, sender=EmployeeProfile)
+def uncount_profile(sender, instance, **kwargs):
+    stats.bump(pending_onboarding=-int(instance.onboarding_status in stats.PENDING_ONBOARDING_STATUSES),
+               active_employees=-int(_user_is_active(instance.user_id)))
+
+
+@receiver(pre_delete, sender=PayRun)
+def uncount_pay_run(sender, instance, **kwargs):
+    stats.bump(pending_payruns=-int(instance.status == 'Pending'))
+
+
+@receiver(pre_delete, sender=Department)
+def uncount_department(sender, instance, **kwargs):
+    stats.bump(departments=-1)
@@ -0,0 +1,62 @@
+# api/stats.py
+"""
+Dashboard counters (StatCounter rows) maintained incrementally.
+
+Writers apply deltas with a single UPDATE ... SET value = value + delta inside their own
+transaction, so concurrent changes never overwrite each other and a rolled-back change takes
+its delta with it. Paths that bypass model signals (queryset .update()) call bump() themselves.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+PENDING_ONBOARDING_STATUSES = ['Pending', 'Scheduled', 'InProgress']
+COUNTERS = ['active_employees', 'pending_onboarding', 'pending_payruns', 'total_users', 'active_users', 'departments']
+
+
+def ground_truth():
+    """ The counters recomputed with COUNT(*) queries. """
+    from .models import User, Department, EmployeeProfile, PayRun
+    return {
+        'active_employees': EmployeeProfile.objects.filter(user__is_active=True).count(),
+        'pending_onboarding': EmployeeProfile.objects.filter(onboarding_status__in=PENDING_ONBOARDING_STATUSES).count(),
+        'pending_payruns': PayRun.objects.filter(status='Pending').count(),
+        'total_users': User.objects.count(),
+        'active_users': User.objects.filter(is_active=True).count(),
+        'departments': Department.objects.count(),
+    }
+
+
+def bump(**deltas):
+    """ Adds the given deltas, e.g. bump(total_users=1, active_users=1), in one UPDATE. """
+    from .models import StatCounter
+    deltas = {name: int(delta) for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    change = Case(*[When(name=name, then=Value(delta)) for name, delta in deltas.items()], output_field=IntegerField())
+    StatCounter.objects.filter(name__in=deltas).update(value=F('value') + change)
+
+
+def read():
+    """ {counter: value} in one query; counters that were never reconciled read as 0. """
+    from .models import StatCounter
+    values = dict.fromkeys(COUNTERS, 0)
+    values.update(StatCounter.objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+    return values
+
+
+def reconcile():
+    """
+    Overwrites the counters with ground truth and returns {counter: drift}. Counter rows are locked
+    first: writers committed before the lock are in the recount, later ones bump on top of it.
+    """
+    from .models import StatCounter
+    with transaction.atomic():
+        for name in COUNTERS:
+            StatCounter.objects.get_or_create(name=name)
+        current = dict(StatCounter.objects.select_for_update().filter(name__in=COUNTERS).values_list('name', 'value'))
+        truth = ground_truth()
+        now = timezone.now()
+        for name, value in truth.items():
+            StatCounter.objects.filter(name=name).update(value=value, reconciled_at=now)
+    return {name: truth[name] - current[name] for name in COUNTERS}
@@ -1,5 +1,1226 @@
+import csv
+import dataclasses
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+from jose import jwk, jwt
+from jose.exceptions import JWTError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from hrms_backend import config_loader
+from hrms_backend.log_handlers import AsyncRotatingFileHandler, RateLimitFilter, SamplingFilter
+from . import auth_utils, bulk_import, clerk_standin, jobs, payroll, projections, search, seeding, stats, warmup, webhooks
+from . import urls as api_urls
+from .management.commands import bench_endpoints
+from .models import User, Department, EmployeeProfile, EmployeeSearchToken, Salary, PayRun, PayStub, PayrollJob, ClerkWebhookEvent
+from .paycalc import split_shards
+from .search import prefix_match
+from .serializers import EmployeeProfileBasicSerializer, PayStubAdminSerializer, PayStubEmployeeSerializer
+from .stats import PENDING_ONBOARDING_STATUSES
+
 
 class HelloWorldTest(TestCase):
     def test_hello_world(self):
         self.assertEqual("hello".upper(), "HELLO")
+
+
+# --- Payroll Engine ---
+def make_employee(clerk_id, salary=None, is_active=True, role='employee', **profile_fields):
+    user = User.objects.create(clerk_id=clerk_id, email=f'{clerk_id}@example.com', role=role,
+                               first_name='Test', last_name=clerk_id.title(), is_active=is_active)
+    profile = EmployeeProfile.objects.create(user=user, job_title=profile_fields.pop('job_title', 'Engineer'), **profile_fields)
+    if salary is not None:
+        Salary.objects.create(employee=profile, amount=Decimal(salary), effective_date=date(2024, 1, 1))
+    return profile
+
+
+class ClerkAuthMixin:
+    """ Stubs token verification: the bearer token 'token-<clerk_id>' authenticates as <clerk_id>. """
+    def setUp(self):
+        super().setUp()
+        auth_utils.principal_cache.clear()
+        self.addCleanup(auth_utils.principal_cache.clear)
+        patcher = mock.patch('api.auth_utils.verify_clerk_token', side_effect=lambda token: {'sub': token.removeprefix('token-')})
+        self.verify_clerk_token = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def client_for(self, clerk_id):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer token-{clerk_id}')
+        return client
+
+
+class PayrollEngineTests(TestCase):
+    def setUp(self):
+        self.pay_run = PayRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 15), pay_date=date(2025, 1, 20))
+
+    def test_stub_amounts_are_prorated_and_balanced(self):
+        gross, deductions, net = payroll.calculate_stub_amounts(Decimal('73000.00'), 15)
+        self.assertEqual(gross, Decimal('3000.00'))
+        self.assertEqual(deductions, Decimal('600.00'))
+        self.assertEqual(net, gross - deductions)
+
+    def test_only_active_employees_with_current_salary_are_paid(self):
+        make_employee('alice', salary='73000')
+        make_employee('bob')
+        make_employee('carol', salary='50000', is_active=False)
+        self.assertEqual(payroll.run_payroll(self.pay_run), 1)
+        self.assertEqual(list(PayStub.objects.values_list('employee_id', flat=True)), ['alice'])
+
+    def test_second_current_salary_is_rejected(self):
+        profile = make_employee('dave', salary='36500')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Salary.objects.create(employee=profile, amount=Decimal('73000'), effective_date=date(2024, 6, 1))
+        Salary.objects.create(employee=profile, amount=Decimal('30000'), effective_date=date(2023, 1, 1), is_current=False)
+        payroll.run_payroll(self.pay_run, batch_size=1)
+        self.assertEqual(PayStub.objects.get().gross_pay, Decimal('1500.00'))
+
+    def test_query_count_scales_with_batches_not_headcount(self):
+        for i in range(10):
+            make_employee(f'emp{i:02d}', salary='50000')
+        with CaptureQueriesContext(connection) as ctx:
+            created = payroll.run_payroll(self.pay_run, batch_size=4)
+        self.assertEqual(created, 10)
+        statements = [q for q in ctx.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        # checkpoint refresh + 3 batches x (SELECT, chunk COUNT, INSERT, checkpoint UPDATE) + the final empty SELECT
+        self.assertEqual(len(statements), 14)
+        counts = [q['sql'] for q in statements if 'COUNT(' in q['sql']]
+        self.assertTrue(counts and all('"employee_id" IN (' in sql for sql in counts)) # Chunk-scoped, not the whole run
+
+
+class ParallelPayrollTests(TestCase):
+    def test_parallel_output_matches_serial_stub_by_stub(self):
+        for i in range(23):
+            make_employee(f'par{i:02d}', salary=Decimal('31337.17') + i * Decimal('1234.56'))
+        serial_run = PayRun.objects.create(start_date=date(2025, 2, 1), end_date=date(2025, 2, 14), pay_date=date(2025, 2, 15))
+        parallel_run = PayRun.objects.create(start_date=date(2025, 2, 1), end_date=date(2025, 2, 14), pay_date=date(2025, 2, 15))
+
+        payroll.run_payroll(serial_run, batch_size=10, workers=1)
+        payroll.run_payroll(parallel_run, batch_size=10, workers=3)
+
+        fields = ('employee_id', 'gross_pay', 'deductions', 'net_pay')
+        serial = list(serial_run.paystubs.order_by('employee_id').values_list(*fields))
+        parallel = list(parallel_run.paystubs.order_by('employee_id').values_list(*fields))
+        self.assertEqual(len(serial), 23)
+        self.assertEqual(serial, parallel)
+
+    def test_split_shards_covers_rows_in_order(self):
+        rows = [(f'e{i}', i) for i in range(10)]
+        shards = split_shards(rows, 3)
+        self.assertEqual(len(shards), 3)
+        self.assertEqual([row for shard in shards for row in shard], rows)
+
+
+class PayrollJobQueueTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_employee('hr1', role='hr_manager')
+        for i in range(5):
+            make_employee(f'job{i}', salary='50000')
+        self.pay_run = PayRun.objects.create(start_date=date(2025, 3, 1), end_date=date(2025, 3, 15), pay_date=date(2025, 3, 20))
+        self.client = self.client_for('hr1')
+
+    def test_process_enqueues_and_worker_completes(self):
+        response = self.client.post(f'/api/payroll/runs/{self.pay_run.pk}/process/', secure=True)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(PayStub.objects.count(), 0)
+        self.pay_run.refresh_from_db()
+        self.assertEqual(self.pay_run.status, 'Processing')
+
+        # A second request must not queue the run twice
+        response = self.client.post(f'/api/payroll/runs/{self.pay_run.pk}/process/', secure=True)
+        self.assertEqual(response.status_code, 400)
+
+        # The worker recycles its connection every loop; here that would close the TestCase's open transaction
+        with mock.patch('api.management.commands.run_payroll_worker.close_old_connections'):
+            call_command('run_payroll_worker', '--once', stdout=open(os.devnull, 'w'))
+
+        progress = self.client.get(f'/api/payroll/runs/{self.pay_run.pk}/progress/', secure=True).json()
+        self.assertEqual(progress['pay_run_status'], 'Completed')
+        self.assertEqual(progress['status'], 'Completed')
+        self.assertEqual((progress['processed'], progress['total']), (5, 5))
+        self.assertEqual(self.pay_run.paystubs.count(), 5)
+
+    def test_failed_job_marks_run_failed(self):
+        jobs.enqueue_pay_run(self.pay_run)
+        with mock.patch('api.payroll.build_stubs', side_effect=RuntimeError('boom')):
+            self.assertFalse(jobs.run_job(jobs.claim_next_job('test-worker')))
+        self.pay_run.refresh_from_db()
+        self.assertEqual(self.pay_run.status, 'Failed')
+        self.assertEqual(PayrollJob.objects.get().error, 'boom')
+        self.assertIsNone(jobs.claim_next_job('test-worker'))
+
+    def test_failure_while_counting_marks_run_failed(self):
+        jobs.enqueue_pay_run(self.pay_run)
+        with mock.patch('api.payroll.count_eligible', side_effect=RuntimeError('database went away')):
+            self.assertFalse(jobs.run_job(jobs.claim_next_job('test-worker')))
+        self.assertEqual(PayrollJob.objects.get().status, 'Failed')
+
+    def test_heartbeat_touches_the_job_during_a_long_batch(self):
+        job = jobs.enqueue_pay_run(self.pay_run)
+        with mock.patch('api.jobs._touch') as touch:
+            with jobs.heartbeat(job, 0.01):
+                time.sleep(0.1)
+        self.assertGreater(touch.call_count, 1)
+
+    def test_orphaned_job_is_failed_after_max_attempts(self):
+        job = jobs.enqueue_pay_run(self.pay_run)
+        PayrollJob.objects.filter(pk=job.pk).update(status='Running', attempts=3, updated_at=timezone.now() - timedelta(hours=1))
+        with self.settings(PAYROLL_JOB_MAX_ATTEMPTS=3):
+            self.assertIsNone(jobs.claim_next_job('test-worker'))
+        job.refresh_from_db()
+        self.pay_run.refresh_from_db()
+        self.assertEqual((job.status, self.pay_run.status), ('Failed', 'Failed'))
+
+
+class ResumablePayrollTests(TestCase):
+    def setUp(self):
+        for i in range(10):
+            make_employee(f'res{i:02d}', salary='50000')
+        self.pay_run = PayRun.objects.create(start_date=date(2025, 4, 1), end_date=date(2025, 4, 15), pay_date=date(2025, 4, 20))
+
+    def test_failed_run_resumes_from_checkpoint(self):
+        real_build_stubs = payroll.build_stubs
+        calls = []
+        def flaky_build_stubs(pay_run, rows):
+            calls.append(rows)
+            if len(calls) == 3:
+                raise RuntimeError('database went away')
+            return real_build_stubs(pay_run, rows)
+
+        with mock.patch('api.payroll.build_stubs', side_effect=flaky_build_stubs):
+            with self.assertRaises(RuntimeError):
+                payroll.run_payroll(self.pay_run, batch_size=4)
+        self.pay_run.refresh_from_db()
+        # The first two chunks were committed before the failure
+        self.assertEqual(self.pay_run.checkpoint_employee_id, 'res07')
+        self.assertEqual(self.pay_run.paystubs.count(), 8)
+
+        with mock.patch('api.payroll.build_stubs', side_effect=real_build_stubs) as resumed:
+            self.assertEqual(payroll.run_payroll(self.pay_run, batch_size=4), 10)
+        # Only the remaining employees were recomputed
+        self.assertEqual([row[0] for row in resumed.call_args_list[0].args[1]], ['res08', 'res09'])
+        self.assertEqual(self.pay_run.paystubs.count(), 10)
+
+    def test_replaying_from_scratch_is_idempotent(self):
+        payroll.run_payroll(self.pay_run, batch_size=4)
+        PayRun.objects.filter(pk=self.pay_run.pk).update(checkpoint_employee_id='', stubs_generated=0)
+        payroll.run_payroll(self.pay_run, batch_size=4)
+        self.assertEqual(self.pay_run.paystubs.count(), 10)
+
+    def test_replayed_chunks_are_not_counted_twice(self):
+        payroll.run_payroll(self.pay_run, batch_size=4)
+        PayRun.objects.filter(pk=self.pay_run.pk).update(checkpoint_employee_id='res03') # A stale checkpoint, as after a reclaim
+        self.assertEqual(payroll.run_payroll(self.pay_run, batch_size=4), 10)
+        self.pay_run.refresh_from_db()
+        self.assertEqual(self.pay_run.stubs_generated, 10)
+
+    def test_failed_run_can_be_requeued(self):
+        PayRun.objects.filter(pk=self.pay_run.pk).update(status='Failed', checkpoint_employee_id='res04', stubs_generated=0)
+        self.assertIsNotNone(jobs.enqueue_pay_run(self.pay_run))
+        job = jobs.claim_next_job('test-worker')
+        self.assertTrue(jobs.run_job(job))
+        job.refresh_from_db()
+        self.assertEqual((job.processed, job.total), (5, 5))
+
+
+# --- Authentication ---
+class VerifiedTokenCacheTests(TestCase):
+    def setUp(self):
+        auth_utils.token_cache.clear()
+        self.addCleanup(auth_utils.token_cache.clear)
+        patchers = [
+            mock.patch('api.auth_utils.jwks_manager.get_key', return_value=object()),
+            mock.patch('api.auth_utils.jwt.get_unverified_header', return_value={'kid': 'k1'}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_repeated_token_skips_signature_verification(self):
+        claims = {'sub': 'user_1', 'exp': time.time() + 60}
+        with mock.patch('api.auth_utils.jwt.decode', return_value=claims) as decode:
+            for _ in range(5):
+                self.assertEqual(auth_utils.verify_clerk_token('tok'), claims)
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(auth_utils.token_cache.stats()['hits'], 4)
+
+    def test_entries_expire_with_the_token(self):
+        with mock.patch('api.auth_utils.jwt.decode', return_value={'sub': 'user_1', 'exp': time.time() - 1}) as decode:
+            auth_utils.verify_clerk_token('tok')
+            auth_utils.verify_clerk_token('tok')
+        self.assertEqual(decode.call_count, 2)
+
+    def test_cache_is_bounded_lru(self):
+        cache = auth_utils.VerifiedTokenCache(max_size=2)
+        exp = time.time() + 60
+        cache.set('a', {'exp': exp}); cache.set('b', {'exp': exp})
+        cache.get('a')
+        cache.set('c', {'exp': exp})
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 2)
+
+
+def make_signing_key(kid='k1'):
+    """ Returns (private PEM, public JWK dict) for a fresh RSA key. """
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+    public_jwk = {**jwk.construct(public_pem, 'RS256').to_dict(), 'kid': kid, 'use': 'sig'}
+    return private_pem, public_jwk
+
+
+class JWKSKeyManagerTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_pem, cls.public_jwk = make_signing_key()
+
+    def fake_response(self, delay=0.0):
+        def fake_get(url, timeout):
+            time.sleep(delay)
+            response = mock.Mock()
+            response.json.return_value = {'keys': [self.public_jwk]}
+            return response
+        return fake_get
+
+    def test_concurrent_cold_requests_fetch_once(self):
+        manager = auth_utils.JWKSKeyManager('https://idp.example/jwks.json')
+        barrier = threading.Barrier(500)
+        def cold_request(_):
+            barrier.wait()
+            return manager.get_key('k1')
+        with mock.patch('api.auth_utils.requests.get', side_effect=self.fake_response(delay=0.2)) as fetch:
+            with ThreadPoolExecutor(max_workers=500) as pool:
+                keys = list(pool.map(cold_request, range(500)))
+        self.assertEqual(fetch.call_count, 1)
+        self.assertTrue(all(key is keys[0] and key is not None for key in keys))
+
+    def test_serves_last_known_good_keys_when_idp_is_down(self):
+        manager = auth_utils.JWKSKeyManager('https://idp.example/jwks.json', retry_interval=0)
+        with mock.patch('api.auth_utils.requests.get', side_effect=self.fake_response()):
+            key = manager.get_key('k1')
+        manager._expires_at = 0 # Force the next lookup to refresh
+        with mock.patch('api.auth_utils.requests.get', side_effect=requests.exceptions.ConnectTimeout()) as fetch:
+            self.assertIs(manager.get_key('k1'), key)
+            with manager._fetch_lock: # Wait for the background refresh to finish
+                pass
+        self.assertEqual(fetch.call_count, 1)
+        self.assertIs(manager.get_key('k1'), key)
+
+    def test_workers_share_fetches_through_the_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = os.path.join(directory, 'jwks.json')
+            first, second = (auth_utils.JWKSKeyManager('https://idp.example/jwks.json', retry_interval=0, store_path=store) for _ in range(2))
+            with mock.patch('api.auth_utils.requests.get', side_effect=self.fake_response()) as fetch:
+                self.assertIsNotNone(first.get_key('k1'))
+                self.assertIsNotNone(second.get_key('k1')) # Read from the store
+                self.assertEqual(fetch.call_count, 1)
+                first._expires_at = second._expires_at = 0 # Both due: the first refreshes, the second adopts
+                first._refresh(blocking=True)
+                second._refresh(blocking=True)
+                self.assertEqual(fetch.call_count, 2)
+            self.assertEqual(second._fetched_at, first._fetched_at)
+            self.assertTrue(second._is_current())
+
+    def test_fallback_snapshot_verifies_before_the_first_fetch(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fallback = os.path.join(directory, 'fallback.json')
+            config_loader.write_snapshot(fallback, {'url': 'https://idp.example/jwks.json', 'jwks': {'keys': [self.public_jwk]}, 'fetched_at': 1})
+            manager = auth_utils.JWKSKeyManager('https://idp.example/jwks.json', fallback_path=fallback)
+            with mock.patch('api.auth_utils.requests.get', side_effect=requests.exceptions.ConnectTimeout()) as fetch:
+                self.assertIsNotNone(manager.get_key('k1'))
+                with manager._fetch_lock: # The stale snapshot is refreshed in the background
+                    pass
+            self.assertEqual(fetch.call_count, 1)
+            self.assertIsNotNone(manager.get_key('k1'))
+
+    def test_verifies_token_with_parsed_key(self):
+        manager = auth_utils.JWKSKeyManager('https://idp.example/jwks.json')
+        now = int(time.time())
+        token = jwt.encode({'sub': 'user_1', 'iss': settings.CLERK_ISSUER_URL, 'iat': now, 'exp': now + 60},
+                           self.private_pem, algorithm='RS256', headers={'kid': 'k1'})
+        auth_utils.token_cache.clear()
+        self.addCleanup(auth_utils.token_cache.clear)
+        with mock.patch('api.auth_utils.requests.get', side_effect=self.fake_response()), \
+             mock.patch.object(auth_utils, 'jwks_manager', manager):
+            self.assertEqual(auth_utils.verify_clerk_token(token)['sub'], 'user_1')
+
+
+class ClerkStandInTests(TestCase):
+    def setUp(self):
+        self.server = clerk_standin.make_server(clerk_standin.SigningKey.generate())
+        clerk_standin.start_in_thread(self.server)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        auth_utils.token_cache.clear()
+        self.addCleanup(auth_utils.token_cache.clear)
+        manager = auth_utils.JWKSKeyManager(self.base_url + clerk_standin.JWKS_PATH)
+        patcher = mock.patch.object(auth_utils, 'jwks_manager', manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_minted_tokens_verify_against_the_configured_issuer(self):
+        token = requests.post(self.base_url + '/tokens', json={'sub': 'user_1', 'email': 'u1@example.com'}, timeout=5).json()['jwt']
+        with self.settings(CLERK_ISSUER_URL=self.server.issuer):
+            claims = auth_utils.verify_clerk_token(token)
+        self.assertEqual((claims['sub'], claims['email']), ('user_1', 'u1@example.com'))
+        auth_utils.token_cache.clear()
+        with self.settings(CLERK_ISSUER_URL='https://other-issuer.example'), self.assertRaises(JWTError):
+            auth_utils.verify_clerk_token(token)
+
+    def test_load_test_does_not_invent_a_signing_key(self):
+        with tempfile.TemporaryDirectory() as directory:
+            key_file = os.path.join(directory, 'missing.pem')
+            with self.assertRaisesMessage(CommandError, 'No signing key'):
+                call_command('load_test', '--key-file', key_file, stdout=open(os.devnull, 'w'))
+            self.assertFalse(os.path.exists(key_file))
+
+
+class PrincipalCacheTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_employee('admin1', role='admin')
+        make_employee('emp1')
+        self.admin = self.client_for('admin1')
+        self.employee = self.client_for('emp1')
+
+    def user_queries(self, ctx):
+        return [q for q in ctx.captured_queries if 'FROM "api_user"' in q['sql'] and '"api_user"."clerk_id" = ' in q['sql']]
+
+    def test_repeat_requests_skip_user_lookup(self):
+        self.employee.get('/api/my/paystubs/', secure=True)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.employee.get('/api/my/paystubs/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user_queries(ctx), [])
+
+    def test_role_change_takes_effect_immediately(self):
+        self.assertEqual(self.employee.get('/api/my/paystubs/', secure=True).status_code, 200)
+        response = self.admin.patch('/api/admin/users/emp1/', {'is_active': False}, format='json', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.employee.get('/api/my/paystubs/', secure=True).status_code, 403)
+
+    def test_change_made_by_another_process_is_picked_up_at_the_next_sync(self):
+        self.assertEqual(self.employee.get('/api/my/paystubs/', secure=True).status_code, 200)
+        # As the webhook consumer writes: no invalidate_cached_principal() reaches this process's cache
+        User.objects.filter(pk='emp1').update(is_active=False, updated_at=timezone.now())
+        self.assertEqual(self.employee.get('/api/my/paystubs/', secure=True).status_code, 200) # Until the next sync
+        with mock.patch.object(auth_utils.principal_cache, '_next_sync', 0):
+            self.assertEqual(self.employee.get('/api/my/paystubs/', secure=True).status_code, 403)
+
+
+class ClerkAuthenticationTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_employee('hr2', role='hr_manager')
+        make_employee('emp2')
+
+    def test_token_verified_once_per_request(self):
+        response = self.client_for('hr2').get('/api/payroll/runs/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.verify_clerk_token.call_count, 1)
+
+    def test_status_codes(self):
+        self.assertEqual(APIClient().get('/api/payroll/runs/', secure=True).status_code, 401)
+        self.assertEqual(self.client_for('emp2').get('/api/payroll/runs/', secure=True).status_code, 403)
+        self.assertEqual(self.client_for('emp2').get('/api/hr/stats/', secure=True).status_code, 403)
+        self.assertEqual(self.client_for('hr2').get('/api/hr/stats/', secure=True).status_code, 200)
+
+    def test_unknown_user_is_provisioned_just_in_time(self):
+        self.verify_clerk_token.side_effect = lambda token: {'sub': 'new_user', 'email': 'new@example.com'}
+        response = self.client_for('new_user').get('/api/me/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['job_title'], 'Pending Assignment')
+
+    def test_principal_is_immutable(self):
+        principal = auth_utils.ClerkPrincipal(clerk_id='emp2', role='employee', is_active=True)
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            principal.role = 'admin'
+
+
+# --- Logging ---
+class AsyncLoggingTests(TestCase):
+    def test_async_handler_writes_and_rotates_by_size(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'app.log')
+            handler = AsyncRotatingFileHandler(filename, maxBytes=200, backupCount=2)
+            handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+            log = logging.getLogger('tests.async_logging')
+            log.addHandler(handler)
+            log.propagate = False
+            try:
+                for i in range(20):
+                    log.warning('line %d of the rotation test', i)
+            finally:
+                log.removeHandler(handler)
+                handler.close() # Drains the queue
+            self.assertTrue(os.path.exists(filename + '.1'))
+            with open(filename) as f:
+                self.assertIn('line 19 of the rotation test', f.read())
+
+    def test_rate_limit_and_sampling_filters(self):
+        def record(level):
+            return logging.LogRecord('api.auth_utils', level, __file__, 1, 'msg', None, None)
+        limiter = RateLimitFilter(rate=5, per=60)
+        passed = sum(limiter.filter(record(logging.INFO)) for _ in range(50))
+        self.assertEqual((passed, limiter.suppressed), (5, 45))
+        self.assertTrue(limiter.filter(record(logging.ERROR)))
+
+        sampler = SamplingFilter(rate=0.0)
+        self.assertFalse(sampler.filter(record(logging.INFO)))
+        self.assertTrue(sampler.filter(record(logging.WARNING)))
+
+
+# --- Keyset Pagination ---
+class KeysetPaginationTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_employee('hr1', role='hr_manager')
+        for i in range(10):
+            # Repeated last names and start dates (some NULL) exercise the tie-breaking columns
+            profile = make_employee(f'page{i}', onboarding_status='Pending',
+                                    onboarding_start_date=None if i % 3 == 0 else date(2025, 1, 1 + i % 2))
+            User.objects.filter(pk=profile.pk).update(last_name=f'Name{i % 3}')
+        self.client = self.client_for('hr1')
+
+    def walk(self, url):
+        """ Follows `next` links; returns all rows and the query count of each page. """
+        rows, page_queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                body = self.client.get(url, secure=True).json()
+            rows += body['results']
+            page_queries.append(len(ctx.captured_queries))
+            url = body['next']
+        return rows, page_queries
+
+    def test_pages_cover_every_row_once_in_order(self):
+        rows, page_queries = self.walk('/api/employees/?page_size=3')
+        expected = EmployeeProfile.objects.filter(user__is_active=True).order_by('user__last_name', 'user__first_name', 'pk')
+        self.assertEqual([row['clerk_id'] for row in rows], [profile.pk for profile in expected])
+        self.assertEqual(len(page_queries), 4)
+        # The first page also resolves the caller's role; after that a deep page costs the same as an early one
+        self.assertEqual(len(set(page_queries[1:])), 1)
+
+    def test_nullable_ordering_column(self):
+        rows, _ = self.walk('/api/hr/onboarding/pending/?page_size=4')
+        expected = EmployeeProfile.objects.filter(onboarding_status='Pending')\
+            .order_by(models.F('onboarding_start_date').asc(nulls_first=True), 'user__last_name', 'pk')
+        self.assertEqual([row['user']['clerk_id'] for row in rows], [profile.pk for profile in expected])
+
+    def test_descending_ordering_across_pay_runs(self):
+        for month in (1, 2):
+            pay_run = PayRun.objects.create(start_date=date(2025, month, 1), end_date=date(2025, month, 15), pay_date=date(2025, month, 20))
+            PayStub.objects.bulk_create(PayStub(pay_run=pay_run, employee=profile, gross_pay=1, deductions=0, net_pay=1)
+                                        for profile in EmployeeProfile.objects.exclude(pk='hr1'))
+        rows, _ = self.walk('/api/payroll/stubs-admin/?page_size=7')
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(len({row['id'] for row in rows}), 20)
+        self.assertEqual([row['pay_run'] for row in rows[:10]], [PayRun.objects.get(pay_date=date(2025, 2, 20)).pk] * 10)
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/employees/?cursor=garbage', secure=True).status_code, 404)
+
+
+# --- Directory Search ---
+class EmployeeSearchTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.finance = Department.objects.create(name='Finance')
+        make_employee('ann', job_title='Accountant', department=self.finance)
+        make_employee('smithers', job_title='Engineer')
+        make_employee('bob', job_title='Smith Liaison')
+        self.client = self.client_for('ann')
+
+    def search(self, term):
+        response = self.client.get('/api/employees/', {'search': term}, secure=True)
+        return [row['clerk_id'] for row in response.json()['results']]
+
+    def test_prefix_words_ranked_by_field(self):
+        # Last name 'Smithers' outranks a job title word; every query word must match
+        self.assertEqual(self.search('smith'), ['smithers', 'bob'])
+        self.assertEqual(self.search('SMITH liaison'), ['bob'])
+        self.assertEqual(self.search('fin acc'), ['ann'])
+        self.assertEqual(self.search('nomatch'), [])
+
+    def test_words_ending_in_any_character_match(self):
+        # A bound like 'ruiz' < token < 'rui{' only works in binary order: MySQL's utf8mb4_0900_ai_ci sorts '{' before letters
+        make_employee('ruiz', job_title='Analyst_9')
+        self.assertEqual(self.search('ruiz'), ['ruiz'])
+        self.assertEqual(self.search('analyst_9'), ['ruiz'])
+        self.assertIn('LIKE', str(EmployeeSearchToken.objects.filter(prefix_match('ruiz')).query))
+
+    def test_index_follows_user_profile_and_department_changes(self):
+        user = User.objects.get(pk='bob')
+        user.last_name = 'Zephyr'
+        user.save()
+        self.assertEqual(self.search('zeph'), ['bob'])
+
+        profile = EmployeeProfile.objects.get(pk='smithers')
+        profile.department = self.finance
+        profile.save(update_fields=['department'])
+        self.finance.name = 'Treasury'
+        self.finance.save()
+        self.assertEqual(set(self.search('treas')), {'ann', 'smithers'})
+        self.assertEqual(self.search('finance'), [])
+
+        self.finance.delete()
+        self.assertFalse(EmployeeSearchToken.objects.filter(token='treasury').exists())
+
+    def test_rebuild_command(self):
+        EmployeeSearchToken.objects.all().delete()
+        call_command('rebuild_search_index', '--batch-size', '2', stdout=open(os.devnull, 'w'))
+        self.assertEqual(self.search('smith'), ['smithers', 'bob'])
+
+
+# --- Current Salary / Title Pointers ---
+class CurrentPointerTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_employee('hr1', role='hr_manager')
+        self.profile = make_employee('pat', salary='50000')
+        self.client = self.client_for('hr1')
+
+    def test_salary_endpoints_move_the_pointer(self):
+        response = self.client.post('/api/salaries/', {'employee': 'pat', 'amount': '60000.00', 'effective_date': '2025-01-01'}, secure=True)
+        self.assertEqual(response.status_code, 201)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.current_salary_id, response.json()['id'])
+
+        self.client.delete(f"/api/salaries/{response.json()['id']}/", secure=True)
+        self.profile.refresh_from_db()
+        self.assertIsNone(self.profile.current_salary) # The older salary was demoted when the new one was added
+
+    def test_title_change_sets_current_title(self):
+        response = self.client.put('/api/manage/employee/pat/', {'job_title': 'Lead Engineer'}, format='json', secure=True)
+        self.assertEqual(response.json()['current_title']['job_title'], 'Lead Engineer')
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.current_title.job_title, 'Lead Engineer')
+
+    def test_onboarding_list_query_count_is_constant(self):
+        def list_queries():
+            auth_utils.principal_cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get('/api/hr/onboarding/pending/', secure=True)
+            return len(ctx.captured_queries)
+
+        for profile in EmployeeProfile.objects.all():
+            profile.sync_current_salary()
+        baseline = list_queries()
+        for i in range(5):
+            profile = make_employee(f'new{i}', salary='40000')
+            profile.sync_current_salary()
+            profile.title_history.create(job_title='Engineer', start_date=date(2024, 1, 1))
+            profile.sync_current_title()
+        self.assertEqual(list_queries(), baseline)
+
+
+# --- Query Budgets ---
+def seed_dataset(count, start=0):
+    """ `count` employees with a salary, a title, and a stub in each of two pay runs. """
+    department, _ = Department.objects.get_or_create(name='Budget Dept')
+    runs = list(PayRun.objects.order_by('id')[:2]) or [
+        PayRun.objects.create(start_date=date(2025, m, 1), end_date=date(2025, m, 15), pay_date=date(2025, m, 20)) for m in (1, 2)]
+    PayrollJob.objects.get_or_create(pay_run=runs[0])
+    for i in range(start, start + count):
+        profile = make_employee(f'seed{i:03d}', salary='50000', department=department, onboarding_status='Pending')
+        profile.sync_current_salary()
+        profile.title_history.create(job_title='Engineer', start_date=date(2024, 1, 1))
+        profile.sync_current_title()
+        for run in runs:
+            PayStub.objects.create(pay_run=run, employee=profile, gross_pay=1, deductions=0, net_pay=1)
+
+
+def route_names(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from route_names(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+IMPORT_CSV = (b'clerk_id,email,first_name,last_name,department,job_title,salary\n'
+              b'seed000,seed000@example.com,Test,Seed000,Budget Dept,Staff Engineer,55000\n'
+              b'new001,new001@example.com,New,Hire,Budget Dept,Engineer,50000\n')
+
+
+class QueryBudgetTests(ClerkAuthMixin, TestCase):
+    """
+    Every named route in api/urls.py declares the most queries one request may run. Each request
+    runs against a small and a larger dataset: the count must stay within budget and must not grow.
+    Requests run as an admin who is also an employee with pay stubs, and are rolled back afterwards.
+    """
+    # route name: (method, reverse kwargs, body, max queries)
+    BUDGETS = {
+        'api-root': ('get', {}, None, 1),
+        'department-list': ('get', {}, None, 3),
+        'department-detail': ('get', {'pk': 'department'}, None, 3),
+        'salary-list': ('get', {}, None, 2),
+        'salary-detail': ('get', {'pk': 'salary'}, None, 2),
+        'titlehistory-list': ('get', {}, None, 2),
+        'titlehistory-detail': ('get', {'pk': 'title'}, None, 2),
+        'admin-user-list': ('get', {}, None, 2),
+        'admin-user-detail': ('get', {'clerk_id': 'boss'}, None, 2),
+        'payrun-list': ('get', {}, None, 2),
+        'payrun-detail': ('get', {'pk': 'run'}, None, 2),
+        'payrun-process-payroll': ('post', {'pk': 'run'}, None, 5),
+        'payrun-progress': ('get', {'pk': 'run'}, None, 3),
+        'payrun-export': ('get', {'pk': 'run'}, None, 4),
+        'paystub-admin-list': ('get', {}, None, 2),
+        'sync-user': ('post', {}, {'type': 'user.updated', 'data': {
+            'id': 'boss', 'first_name': 'Big', 'last_name': 'Boss',
+            'email_addresses': [{'email_address': 'boss@example.com', 'verification': {'status': 'verified'}}]}}, 1),
+        'get-current-user': ('get', {}, None, 3),
+        'list-employees': ('get', {}, None, 3),
+        'manage-employee-profile': ('get', {'clerk_id': 'seed000'}, None, 2),
+        'list-pending-onboarding': ('get', {}, None, 2),
+        'import-employees': ('post', {}, lambda: {'file': SimpleUploadedFile('employees.csv', IMPORT_CSV)}, 35),
+        'my-paystubs': ('get', {}, None, 3),
+        'get-hr-stats': ('get', {}, None, 2),
+        'get-admin-stats': ('get', {}, None, 2),
+        'health-ready': ('get', {}, None, 0),
+    }
+
+    def setUp(self):
+        super().setUp()
+        make_employee('boss', salary='90000', role='admin')
+        self.client = self.client_for('boss')
+
+    def fixture_ids(self):
+        return {'department': Department.objects.get().pk, 'salary': Salary.objects.first().pk,
+                'title': EmployeeProfile.objects.get(pk='seed000').current_title_id, 'run': PayrollJob.objects.get().pay_run_id}
+
+    def measure(self):
+        fixtures, counts = self.fixture_ids(), {}
+        for name, (method, kwargs, body, _) in self.BUDGETS.items():
+            url = reverse(name, kwargs={key: fixtures.get(value, value) for key, value in kwargs.items()})
+            auth_utils.principal_cache.clear()
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as ctx:
+                    if callable(body): # File uploads: a fresh multipart body per request
+                        response = getattr(self.client, method)(url, body(), format='multipart', secure=True)
+                    else:
+                        response = getattr(self.client, method)(url, body, format='json', secure=True)
+                    if response.streaming:
+                        b''.join(response.streaming_content) # Streamed queries run while the body is consumed
+                transaction.set_rollback(True)
+            self.assertLess(response.status_code, 300, f'{name}: {response.status_code}')
+            self.assertIn('Server-Timing', response)
+            counts[name] = len([q for q in ctx.captured_queries if not q['sql'].startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK'))])
+        return counts
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(set(route_names(api_urls.urlpatterns)), set(self.BUDGETS))
+
+    def test_routes_stay_within_budget_and_do_not_scale_with_rows(self):
+        seed_dataset(2)
+        small = self.measure()
+        seed_dataset(8, start=2)
+        large = self.measure()
+        for name, (_, _, _, budget) in self.BUDGETS.items():
+            with self.subTest(route=name):
+                self.assertLessEqual(large[name], budget)
+                self.assertEqual(large[name], small[name], 'query count grows with the number of rows')
+
+
+# --- Projections ---
+class ProjectionTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name='Ops')
+        make_employee('ann', department=department)
+        make_employee('bob') # No department: department_name is null
+        pay_run = PayRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 15), pay_date=date(2025, 1, 20))
+        for profile, gross in zip(EmployeeProfile.objects.all(), ('1234.5', '7')):
+            PayStub.objects.create(pay_run=pay_run, employee=profile, gross_pay=Decimal(gross), deductions=Decimal('0.10'), net_pay=Decimal(gross) - Decimal('0.10'))
+
+    def assertSameJSON(self, projection, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(JSONRenderer().render(projection.render(projection.values(queryset))), expected)
+
+    def test_projections_match_serializers_byte_for_byte(self):
+        self.assertSameJSON(projections.EMPLOYEE_BASIC, EmployeeProfileBasicSerializer, EmployeeProfile.objects.order_by('pk'))
+        self.assertSameJSON(projections.PAYSTUB_EMPLOYEE, PayStubEmployeeSerializer, PayStub.objects.order_by('id'))
+        self.assertSameJSON(projections.PAYSTUB_ADMIN, PayStubAdminSerializer, PayStub.objects.order_by('id'))
+
+
+# --- Pay Stub Export ---
+class PayStubExportTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_employee('hr1', role='hr_manager')
+        self.pay_run = PayRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 15), pay_date=date(2025, 1, 20))
+        for clerk_id in ('ann', 'bob', 'cid', 'dee', 'eve'):
+            profile = make_employee(clerk_id)
+            PayStub.objects.create(pay_run=self.pay_run, employee=profile, gross_pay=Decimal('100'), deductions=Decimal('20'), net_pay=Decimal('80'))
+        self.url = f'/api/payroll/runs/{self.pay_run.pk}/export/'
+
+    def export(self, output):
+        response = self.client_for('hr1').get(self.url, {'output': output}, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def expected_rows(self):
+        return JSONRenderer().render(PayStubAdminSerializer(PayStub.objects.order_by('id'), many=True).data)
+
+    def test_ndjson_matches_admin_serializer(self):
+        lines = self.export('ndjson').splitlines()
+        self.assertEqual(json.loads(self.expected_rows()), [json.loads(line) for line in lines])
+
+    def test_csv_has_header_and_one_row_per_stub(self):
+        rows = list(csv.DictReader(io.StringIO(self.export('csv'))))
+        self.assertEqual([row['employee_email'] for row in rows], [s['employee_email'] for s in json.loads(self.expected_rows())])
+        self.assertEqual(rows[0]['employee_name'], 'Test Ann')
+
+    def test_query_count_grows_per_chunk_not_per_row(self):
+        self.export('ndjson') # Warm the cached principal
+        with self.settings(PAYROLL_EXPORT_CHUNK_SIZE=2), CaptureQueriesContext(connection) as queries:
+            self.export('ndjson')
+        chunked = len(queries)
+        with self.settings(PAYROLL_EXPORT_CHUNK_SIZE=100), CaptureQueriesContext(connection) as queries:
+            self.export('ndjson')
+        self.assertEqual(chunked - len(queries), 2) # 5 stubs: 3 chunks + empty probe vs 1 chunk + empty probe
+
+    def test_unknown_output_is_rejected(self):
+        self.assertEqual(self.client_for('hr1').get(self.url, {'output': 'xml'}, secure=True).status_code, 400)
+
+
+# --- Bulk Employee Import ---
+class BulkImportTests(ClerkAuthMixin, TestCase):
+    HEADER = 'clerk_id,email,first_name,last_name,department,job_title,hire_date,salary,salary_effective_date\n'
+
+    def setUp(self):
+        super().setUp()
+        Department.objects.create(name='Ops')
+        stats.reconcile()
+
+    def run_import(self, lines, batch_size=None):
+        return bulk_import.EmployeeImporter(batch_size=batch_size).run(bulk_import.read_csv(io.StringIO(self.HEADER + ''.join(lines))))
+
+    def test_creates_employees_and_reports_bad_rows(self):
+        report = self.run_import([
+            'ann,ann@example.com,Ann,Lee,Ops,Engineer,2024-03-01,60000,\n',
+            'bob,not-an-email,Bob,Roe,Ops,Engineer,,,\n',
+            'cid,cid@example.com,Cid,Poe,Nowhere,Engineer,,,\n',
+            'ann,ann2@example.com,Ann,Again,Ops,Engineer,,,\n',
+            'dee,dee@example.com,Dee,Fox,,,,,\n',
+            'eve,eve@example.com,Eve,Ray,,Analyst,,,\n',
+        ])
+        self.assertEqual((report.created, report.updated, report.salaries, report.titles), (2, 0, 1, 2))
+        self.assertEqual({e['row']: sorted(e['errors']) for e in report.errors},
+                         {3: ['email'], 4: ['department'], 5: ['clerk_id'], 6: ['job_title']})
+
+        ann = EmployeeProfile.objects.select_related('user', 'department', 'current_salary', 'current_title').get(pk='ann')
+        self.assertEqual((ann.user.last_name, ann.department.name), ('Lee', 'Ops'))
+        self.assertEqual((ann.current_salary.amount, ann.current_salary.effective_date), (Decimal('60000'), date(2024, 3, 1)))
+        self.assertEqual((ann.current_title.job_title, ann.current_title.start_date), ('Engineer', date(2024, 3, 1)))
+        self.assertEqual(list(search.search_profiles(EmployeeProfile.objects.all(), 'lee').values_list('pk', flat=True)), ['ann'])
+        self.assertEqual(stats.read()['active_employees'], 2) # Bulk writes skip the signals; the import reconciles
+
+    def test_update_records_history_and_is_idempotent(self):
+        self.run_import(['ann,ann@example.com,Ann,Lee,Ops,Engineer,2024-03-01,60000,\n'])
+        row = 'ann,ann@example.com,Ann,Lee,,Lead Engineer,,65000,2025-01-01\n'
+        report = self.run_import([row])
+        self.assertEqual((report.created, report.updated, report.salaries, report.titles), (0, 1, 1, 1))
+        ann = EmployeeProfile.objects.select_related('current_salary', 'current_title').get(pk='ann')
+        self.assertEqual(ann.department.name, 'Ops') # Blank cells keep stored values
+        self.assertEqual(ann.current_salary.amount, Decimal('65000'))
+        self.assertEqual(list(ann.salaries.values_list('is_current', flat=True)), [True, False])
+        self.assertEqual(ann.current_title.job_title, 'Lead Engineer')
+        self.assertIsNotNone(ann.title_history.get(job_title='Engineer').end_date)
+
+        report = self.run_import([row])
+        self.assertEqual((report.salaries, report.titles), (0, 0))
+        self.assertEqual((ann.salaries.count(), ann.title_history.count()), (2, 2))
+
+    def test_email_owned_by_another_user_in_other_case_is_rejected(self):
+        self.run_import(['ann,Ann.Lee@Example.com,Ann,Lee,Ops,Engineer,,,\n'])
+        report = self.run_import(['bob,ann.lee@example.com,Bob,Roe,Ops,Engineer,,,\n'])
+        self.assertEqual({e['row']: sorted(e['errors']) for e in report.errors}, {2: ['email']})
+        self.assertEqual(User.objects.get(pk='ann').first_name, 'Ann')
+        self.assertFalse(User.objects.filter(pk='bob').exists())
+
+    def test_raise_without_a_date_takes_effect_today(self):
+        self.run_import(['ann,ann@example.com,Ann,Lee,Ops,Engineer,2020-01-01,50000,2024-01-01\n'])
+        self.run_import(['ann,ann@example.com,Ann,Lee,,,,60000,\n'])
+        current = EmployeeProfile.objects.select_related('current_salary').get(pk='ann').current_salary
+        self.assertEqual((current.amount, current.effective_date), (Decimal('60000'), date.today()))
+
+    def test_query_count_grows_per_batch_not_per_row(self):
+        def queries(first, count):
+            lines = [f'e{i:03d},e{i:03d}@example.com,E,{i},Ops,Engineer,,50000,\n' for i in range(first, first + count)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.run_import(lines, batch_size=10)
+            return len(ctx)
+        one_batch = queries(0, 10)
+        per_batch = queries(10, 20) - one_batch
+        self.assertLess(per_batch, 20)
+        self.assertEqual(queries(30, 40) - one_batch, 3 * per_batch)
+
+    def test_upload_endpoint(self):
+        make_employee('hr1', role='hr_manager')
+        client = self.client_for('hr1')
+        upload = SimpleUploadedFile('employees.csv', (self.HEADER + 'ann,ann@example.com,Ann,Lee,Ops,Engineer,,,\n').encode())
+        response = client.post('/api/hr/employees/import/', {'file': upload}, format='multipart', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+
+        # Role, status and existing emails are admin-only, as in UserViewSet
+        upload = SimpleUploadedFile('employees.csv', b'clerk_id,email,role\nhr1,hr1@example.com,admin\nann,ann@example.com,hr_manager\n')
+        report = client.post('/api/hr/employees/import/', {'file': upload}, format='multipart', secure=True).json()
+        self.assertEqual({e['row']: sorted(e['errors']) for e in report['errors']}, {2: ['role'], 3: ['role']})
+        self.assertEqual(dict(User.objects.filter(pk__in=['hr1', 'ann']).values_list('pk', 'role')), {'hr1': 'hr_manager', 'ann': 'employee'})
+        make_employee('root', role='admin')
+        upload = SimpleUploadedFile('employees.csv', b'clerk_id,email,role\nann,ann@example.com,hr_manager\n')
+        self.assertEqual(self.client_for('root').post('/api/hr/employees/import/', {'file': upload}, format='multipart', secure=True).json()['updated'], 1)
+        self.assertEqual(User.objects.get(pk='ann').role, 'hr_manager')
+
+        upload = SimpleUploadedFile('employees.csv', b'email\nann@example.com\n')
+        response = client.post('/api/hr/employees/import/', {'file': upload}, format='multipart', secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('clerk_id', response.json()['error'])
+
+
+# --- Clerk Webhook Inbox ---
+def clerk_event(event_type, clerk_id, timestamp, email=None, first_name='First'):
+    data = {'id': clerk_id, 'first_name': first_name, 'last_name': 'Last'}
+    if email:
+        data['email_addresses'] = [{'email_address': email, 'verification': {'status': 'verified'}}]
+    return {'type': event_type, 'timestamp': timestamp, 'data': data}
+
+
+class ClerkWebhookInboxTests(TestCase):
+    def setUp(self):
+        stats.reconcile()
+
+    def deliver(self, event, svix_id):
+        return self.client.post('/api/sync-user/', event, content_type='application/json', secure=True, HTTP_SVIX_ID=svix_id)
+
+    def test_webhook_queues_and_ignores_redeliveries(self):
+        event = clerk_event('user.created', 'u1', 1000, 'u1@example.com')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.deliver(event, 'msg_1')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(self.deliver(event, 'msg_1').status_code, 202)
+        self.assertEqual(ClerkWebhookEvent.objects.count(), 1)
+        self.assertFalse(User.objects.exists()) # Applied by the consumer, not the request
+        self.assertEqual(self.deliver(clerk_event('user.created', 'u2', 1000), 'msg_2').status_code, 400) # No verified email
+
+    def test_consumer_coalesces_events_per_user(self):
+        make_employee('gone')
+        self.deliver(clerk_event('user.created', 'u1', 1000, 'u1@example.com', 'Old'), 'msg_1')
+        self.deliver(clerk_event('user.updated', 'u1', 3000, 'u1@example.com', 'Newest'), 'msg_2')
+        self.deliver(clerk_event('user.updated', 'u1', 2000, 'u1@example.com', 'Middle'), 'msg_3') # Delivered out of order
+        self.deliver(clerk_event('user.created', 'u2', 1000, 'u2@example.com'), 'msg_4')
+        self.deliver(clerk_event('user.deleted', 'gone', 1000), 'msg_5')
+
+        self.assertEqual(webhooks.process_batch(), 5)
+        self.assertEqual(webhooks.process_batch(), 0)
+        self.assertEqual(User.objects.get(pk='u1').first_name, 'Newest')
+        self.assertEqual(EmployeeProfile.objects.get(pk='u2').job_title, 'Pending Assignment')
+        self.assertFalse(User.objects.filter(pk='gone').exists())
+        self.assertEqual(stats.read(), stats.ground_truth())
+        self.assertEqual(list(search.search_profiles(EmployeeProfile.objects.all(), 'newest').values_list('pk', flat=True)), ['u1'])
+
+        # A late, older event does not roll the user back
+        self.deliver(clerk_event('user.updated', 'u1', 2500, 'u1@example.com', 'Stale'), 'msg_6')
+        webhooks.process_batch()
+        self.assertEqual(User.objects.get(pk='u1').first_name, 'Newest')
+
+    def test_batch_cost_does_not_grow_with_events(self):
+        def queries(first, count):
+            for i in range(first, first + count):
+                self.deliver(clerk_event('user.created', f'u{i}', 1000, f'u{i}@example.com'), f'msg_{i}')
+            with CaptureQueriesContext(connection) as ctx:
+                webhooks.process_batch()
+            return len(ctx)
+        self.assertEqual(queries(0, 3), queries(3, 30))
+
+    def test_taken_email_is_recorded_and_leaves_its_owner_alone(self):
+        make_employee('owner', role='hr_manager') # owner@example.com
+        make_employee('mover')
+        self.deliver(clerk_event('user.created', 'thief', 1000, 'owner@example.com'), 'msg_1')
+        self.deliver(clerk_event('user.updated', 'mover', 1000, 'OWNER@example.com'), 'msg_2')
+        self.deliver(clerk_event('user.created', 'u1', 1000, 'u1@example.com'), 'msg_3')
+        self.deliver(clerk_event('user.created', 'u2', 1000, 'u1@example.com'), 'msg_4') # Same email twice in one batch
+        self.assertEqual(webhooks.process_batch(), 4)
+        self.assertEqual(set(ClerkWebhookEvent.objects.exclude(error='').values_list('event_id', flat=True)), {'msg_1', 'msg_2', 'msg_4'})
+        owner = User.objects.get(pk='owner')
+        self.assertEqual((owner.first_name, owner.role), ('Test', 'hr_manager'))
+        self.assertEqual(User.objects.get(pk='mover').email, 'mover@example.com')
+        self.assertEqual(set(User.objects.values_list('pk', flat=True)), {'owner', 'mover', 'u1'})
+        self.assertEqual(stats.read(), stats.ground_truth())
+
+
+# --- Conditional GET ---
+class ConditionalGetTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.department = Department.objects.create(name='Ops')
+        make_employee('ann', department=self.department)
+        make_employee('bob')
+
+    def revalidate(self, client, url, response):
+        return client.get(url, secure=True, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_data_is_not_modified(self):
+        client = self.client_for('ann')
+        for url in ('/api/me/', '/api/employees/', '/api/departments/', f'/api/departments/{self.department.pk}/'):
+            with self.subTest(url=url):
+                first = client.get(url, secure=True)
+                self.assertEqual(first.status_code, 200)
+                self.assertIn('Authorization', first['Vary'])
+                self.assertIn('private', first['Cache-Control'])
+                second = self.revalidate(client, url, first)
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second.content, b'')
+
+    def test_changes_invalidate(self):
+        client = self.client_for('ann')
+        me, employees, departments = (client.get(url, secure=True) for url in ('/api/me/', '/api/employees/', '/api/departments/'))
+
+        self.department.name = 'Operations'
+        self.department.save()
+        self.assertEqual(self.revalidate(client, '/api/me/', me).status_code, 200) # department_name is part of /me/
+        self.assertEqual(self.revalidate(client, '/api/departments/', departments).status_code, 200)
+
+        employees = client.get('/api/employees/', secure=True)
+        make_employee('cid')
+        self.assertEqual(self.revalidate(client, '/api/employees/', employees).status_code, 200)
+
+    def test_me_is_scoped_to_the_caller(self):
+        ann = self.client_for('ann').get('/api/me/', secure=True)
+        bob = self.revalidate(self.client_for('bob'), '/api/me/', ann)
+        self.assertEqual(bob.status_code, 200)
+        self.assertEqual(bob.json()['user']['clerk_id'], 'bob')
+
+
+# --- Dashboard Counters ---
+class StatCounterTests(ClerkAuthMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        stats.reconcile() # The test database starts empty; migrations seeded the rows
+        make_employee('root', role='admin')
+        self.client = self.client_for('root')
+
+    def assertMatchesGroundTruth(self):
+        self.assertEqual(stats.read(), stats.ground_truth())
+
+    def test_counters_follow_writes(self):
+        department = Department.objects.create(name='Ops')
+        for i in range(3):
+            make_employee(f'cnt{i}', salary='50000', department=department, onboarding_status='Pending')
+        self.assertMatchesGroundTruth()
+
+        self.client.put('/api/manage/employee/cnt0/', {'onboarding_status': 'Completed'}, format='json', secure=True)
+        self.client.patch('/api/admin/users/cnt1/', {'is_active': False}, format='json', secure=True)
+        self.client.delete('/api/admin/users/cnt2/', secure=True)
+        self.assertMatchesGroundTruth()
+
+        pay_run = PayRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 15), pay_date=date(2025, 1, 20))
+        self.assertEqual(stats.read()['pending_payruns'], 1)
+        jobs.enqueue_pay_run(pay_run)
+        self.assertMatchesGroundTruth()
+
+        self.client.post('/api/sync-user/', {'type': 'user.deleted', 'data': {'id': 'cnt1', 'email_addresses': [
+            {'email_address': 'cnt1@example.com', 'verification': {'status': 'verified'}}]}}, format='json', secure=True)
+        webhooks.process_batch()
+        department.delete()
+        self.assertMatchesGroundTruth()
+
+        response = self.client.get('/api/admin/stats/', secure=True).json()
+        self.assertEqual(response['total_users_count'], User.objects.count())
+
+    def test_failed_save_takes_its_counter_change_with_it(self):
+        make_employee('flaky')
+        user = User.objects.get(pk='flaky')
+        user.is_active = False
+        def fail(sender, instance, **kwargs): # Runs after the counter receivers
+            raise RuntimeError('write failed')
+        post_save.connect(fail, sender=User)
+        self.addCleanup(post_save.disconnect, fail, sender=User)
+        with self.assertRaises(RuntimeError):
+            user.save()
+        self.assertTrue(User.objects.get(pk='flaky').is_active)
+        self.assertMatchesGroundTruth()
+
+    def test_reconcile_fixes_drift(self):
+        User.objects.bulk_create([User(clerk_id='bulk1', email='bulk1@example.com')]) # Bypasses signals
+        self.assertEqual(stats.reconcile()['total_users'], 1)
+        self.assertMatchesGroundTruth()
+
+
+# --- Query Plans ---
+@unittest.skipUnless(connection.vendor in ('sqlite', 'mysql'), 'Plan assertions are written for SQLite and MySQL output')
+class QueryPlanTests(TestCase):
+    """ EXPLAIN of the hot queries: each must be an index search, and those marked ordered must not sort. """
+    def setUp(self):
+        department = Department.objects.create(name='Ops')
+        for i in range(20):
+            profile = make_employee(f'plan{i:02d}', salary='50000', department=department, onboarding_status='Pending')
+            profile.title_history.create(job_title='Engineer', start_date=date(2024, 1, 1))
+        PayRun.objects.create(start_date=date(2025, 1, 1), end_date=date(2025, 1, 15), pay_date=date(2025, 1, 20))
+        self.profile = EmployeeProfile.objects.get(pk='plan00')
+
+    def hot_queries(self):
+        # (description, queryset as issued by the code path, index it must use, whether the index serves ORDER BY)
+        profile = self.profile
+        return [
+            ('EmployeeProfile.sync_current_salary', profile.salaries.filter(is_current=True).order_by('-effective_date', '-id'), 'salary_employee_date_idx', True),
+            ('payroll.iter_current_salaries', Salary.objects.filter(is_current=True, employee__user__is_active=True, employee_id__gt='plan05')
+                                                            .order_by('employee_id').values_list('employee_id', 'amount'), 'salary_employee_date_idx', True),
+            ('EmployeeProfile.sync_current_title', profile.title_history.order_by('-start_date', '-id'), 'title_latest_idx', True),
+            ('list_pending_onboarding', EmployeeProfile.objects.filter(onboarding_status__in=PENDING_ONBOARDING_STATUSES)
+                                                       .order_by('onboarding_start_date', 'user__last_name', 'pk'), 'profile_onboarding_idx', False),
+            ('stats pending_payruns', PayRun.objects.filter(status='Pending'), 'payrun_status_idx', False),
+            ('list_my_paystubs', PayStub.objects.filter(employee=profile).select_related('pay_run').order_by('-pay_run__pay_date', 'id'), 'paystub_employee_idx', False),
+        ]
+
+    def test_hot_queries_use_their_indexes(self):
+        for description, queryset, index, ordered in self.hot_queries():
+            with self.subTest(query=description):
+                plan = queryset.explain()
+                self.assertIn(index, plan)
+                if connection.vendor == 'sqlite':
+                    self.assertNotRegex(plan, rf'SCAN {queryset.model._meta.db_table}(?! USING)') # Full table scan
+                    if ordered:
+                        self.assertNotIn('TEMP B-TREE', plan)
+                elif ordered:
+                    self.assertNotIn('filesort', plan)
+
+
+# --- Synthetic Data and Endpoint Benchmarks ---
+class SeedingTests(TestCase):
+    def snapshot(self, prefix):
+        """ The seeded rows with the prefix-dependent parts (ids, emails) stripped. """
+        users = User.objects.filter(clerk_id__startswith=prefix).order_by('clerk_id')
+        return ([(u.first_name, u.last_name, u.role, u.is_active) for u in users],
+                list(Salary.objects.filter(employee__user__clerk_id__startswith=prefix).order_by('employee_id', 'effective_date')
+                                   .values_list('amount', 'effective_date', 'is_current')),
+                list(PayStub.objects.filter(employee__user__clerk_id__startswith=prefix).order_by('pay_run_id', 'employee_id')
+                                    .values_list('gross_pay', 'net_pay')))
+
+    def test_same_seed_gives_same_data(self):
+        counts = seeding.seed(60, pay_runs=2, seed=7, prefix='a')
+        seeding.seed(60, pay_runs=2, seed=7, prefix='b')
+        self.assertEqual(self.snapshot('a_'), self.snapshot('b_'))
+        self.assertEqual(counts['users'], 60)
+        with self.assertRaises(ValueError):
+            seeding.seed(1, prefix='a')
+
+    def test_seeded_rows_are_consistent(self):
+        seeding.seed(80, pay_runs=3)
+        for profile in EmployeeProfile.objects.select_related('current_salary', 'current_title'):
+            self.assertEqual(profile.salaries.filter(is_current=True).get(), profile.current_salary)
+            self.assertEqual(profile.title_history.order_by('-start_date', '-id').first(), profile.current_title)
+            self.assertIsNone(profile.current_title.end_date)
+            self.assertTrue(profile.search_tokens.exists())
+        self.assertEqual(PayRun.objects.filter(status='Completed').count(), 3)
+        self.assertFalse(PayStub.objects.filter(employee__user__is_active=False).exists())
+        self.assertEqual(stats.read()['total_users'], User.objects.count())
+
+    def test_benchmark_covers_every_route(self):
+        self.assertEqual(set(route_names(api_urls.urlpatterns)), set(bench_endpoints.ROUTES))
+        out = io.StringIO()
+        call_command('bench_endpoints', '--sizes', '40', '--iterations', '1', stdout=out)
+        self.assertEqual(len([line for line in out.getvalue().splitlines() if line.partition(' ')[0] in bench_endpoints.ROUTES]),
+                         len(bench_endpoints.ROUTES))
+        self.assertFalse(User.objects.exists()) # Everything was rolled back
+
+
+# --- SSM Config Snapshot ---
+class ConfigLoaderTests(TestCase):
+    NAMES = ['/hrms/prod/debug', '/hrms/prod/allowed_hosts']
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'snapshot.json')
+
+    def load(self, **kwargs):
+        return config_loader.load(self.NAMES, self.path, 'us-east-1', **kwargs)
+
+    def test_snapshot_is_reused_until_stale(self):
+        with mock.patch.object(config_loader, 'fetch', return_value={'/hrms/prod/debug': 'true'}) as fetch:
+            self.assertEqual(self.load(), {'/hrms/prod/debug': 'true'})
+            self.assertEqual(self.load(), {'/hrms/prod/debug': 'true'})
+            self.assertEqual(fetch.call_count, 1)
+            self.load(ttl=0)
+            self.assertEqual(fetch.call_count, 2)
+
+    def test_failed_refresh_keeps_last_values_and_backs_off(self):
+        with mock.patch.object(config_loader, 'fetch', return_value={'/hrms/prod/debug': 'true'}):
+            self.load()
+        with mock.patch.object(config_loader, 'fetch', side_effect=OSError('unreachable')) as fetch:
+            for _ in range(3):
+                self.assertEqual(self.load(ttl=0), {'/hrms/prod/debug': 'true'})
+        self.assertEqual(fetch.call_count, 1) # Later processes skip SSM until the retry interval has passed
+        self.assertIn('failed_at', config_loader.read_snapshot(self.path))
+
+    def test_disabled_never_fetches(self):
+        with mock.patch.object(config_loader, 'fetch') as fetch:
+            self.assertEqual(self.load(enabled=False), {})
+        fetch.assert_not_called()
+
+
+# --- Warm-up and Readiness ---
+class WarmupTests(TestCase):
+    def setUp(self):
+        for patcher in (mock.patch.object(warmup, 'state', warmup.WarmupState()), mock.patch.object(warmup, '_thread', None),
+                        mock.patch.object(warmup, '_fork_hooks', False), # Every test starts unregistered, whatever ran before
+                        mock.patch.object(warmup.os, 'register_at_fork')): # Keep the test process's forks untouched
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_readiness_waits_for_warmup(self):
+        release = threading.Event()
+        with mock.patch('api.auth_utils.jwks_manager.get_jwks', side_effect=lambda: release.wait() and None):
+            warmup.start()
+            response = self.client.get('/api/health/ready', secure=True)
+            self.assertEqual(response.status_code, 503)
+            release.set()
+            warmup._thread.join()
+        response = self.client.get('/api/health/ready', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['steps'], {
+            'jwks': {'ms': mock.ANY, 'ok': False}, 'database': {'ms': mock.ANY, 'ok': True},
+            'urls': {'ms': mock.ANY, 'ok': True}, 'serializers': {'ms': mock.ANY, 'ok': True}})
+
+    def test_fork_hooks_finish_warmup_then_restart_it_in_the_child(self):
+        with mock.patch('api.auth_utils.jwks_manager.get_jwks', side_effect=lambda: time.sleep(0.1) or {'keys': [{}]}):
+            warmup.start()
+            warmup._before_fork()
+            self.assertTrue(warmup.state.is_ready())
+            warmup._after_fork_in_child()
+            self.assertTrue(warmup.state.started)
+            warmup._thread.join()
+        self.assertTrue(warmup.state.is_ready())
+        self.assertEqual(warmup.os.register_at_fork.call_count, 1)
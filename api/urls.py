@@ -1,4 +1,4 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 
@@ -17,8 +17,10 @@ urlpatterns = [
     path('me/', views.get_current_user_profile, name='get-current-user'),
     path('employees/', views.list_employees, name='list-employees'),
     path('manage/employee/<str:clerk_id>/', views.manage_employee_profile, name='manage-employee-profile'),
+    path('hr/employees/import/', views.import_employees, name='import-employees'),
     path('hr/onboarding/pending/', views.list_pending_onboarding, name='list-pending-onboarding'),
     path('my/paystubs/', views.list_my_paystubs, name='my-paystubs'),
     path('hr/stats/', views.get_hr_stats, name='get-hr-stats'),
     path('admin/stats/', views.get_admin_stats, name='get-admin-stats'),
+    re_path(r'^health/ready/?$', views.readiness, name='health-ready'), # With or without the slash: probes do not follow redirects
 ]
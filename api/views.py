@@ -1,18 +1,27 @@
 # api/views.py
 import os
-from decimal import Decimal
-from rest_framework.decorators import api_view, action, permission_classes
+import codecs
+import csv
+import hashlib
+import json
+import logging
+from rest_framework.decorators import api_view, action, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework import status, generics, viewsets, mixins
 from rest_framework.permissions import AllowAny
-from django.db.models import Q
+from rest_framework.exceptions import APIException
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db import transaction
+from django.db import DatabaseError, connection, transaction
 
 # Import Permission utilities and decorators
 from .auth_utils import IsClerkEmployee, IsClerkHr, IsClerkAdmin
 from .auth_utils import clerk_auth_employee, clerk_auth_hr, clerk_auth_admin
+from .auth_utils import invalidate_cached_principal
+from . import bulk_import, conditional, exports, jobs, search, stats, warmup, webhooks
+from .pagination import KeysetPagination
+from .projections import EMPLOYEE_BASIC, PAYSTUB_ADMIN, PAYSTUB_EMPLOYEE
 
 # Import Models
 from .models import (
@@ -21,74 +30,52 @@ from .models import (
 # Import Serializers
 from .serializers import (
     UserSerializer, DepartmentSerializer, EmployeeProfileSerializer,
-    SalarySerializer, TitleHistorySerializer, EmployeeProfileBasicSerializer,
-    PayRunSerializer, PayStubAdminSerializer, PayStubEmployeeSerializer
+    SalarySerializer, TitleHistorySerializer,
+    PayRunSerializer, PayStubAdminSerializer, PayrollJobSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 
 # --- User Synchronization Endpoint ---
 @api_view(['POST'])
+@authentication_classes([]) # Webhook: no bearer token to verify
 @permission_classes([AllowAny]) # Assumes webhook verification will be added for production
 def sync_clerk_user(request):
+    # Only validates and queues the event; `manage.py process_clerk_webhooks` applies it (api/webhooks.py)
     data = request.data.get('data')
-    print(f"Received data: {data}")
     event_type = request.data.get('type')
-    if not data:
+    logger.debug("Clerk webhook %s received for %s", event_type, (data or {}).get('id'))
+    if not isinstance(data, dict):
         return Response({"error": "Invalid payload"}, status=status.HTTP_400_BAD_REQUEST)
 
-    clerk_id = data.get('id')
-    email = next((e['email_address'] for e in data.get('email_addresses', []) if e.get('verification', {}).get('status') == 'verified'), None)
-    first_name = data.get('first_name', '')
-    last_name = data.get('last_name', '')
-    role = 'employee' # Default role
-
-    if not clerk_id or not email:
-         return Response({"error": "Missing clerk_id or verified email"}, status=status.HTTP_400_BAD_REQUEST)
-
-    if event_type in ['user.created', 'user.updated']:
-        user, created = User.objects.update_or_create(
-            clerk_id=clerk_id,
-            defaults={
-                'email': email,
-                'first_name': first_name,
-                'last_name': last_name,
-                'role': role,
-                'is_active': True
-            }
-        )
-        # Ensure profile exists
-        EmployeeProfile.objects.get_or_create(
-            user=user,
-            defaults={'job_title': 'Pending Assignment'}
-        )
-        serializer = UserSerializer(user)
-        return Response({"message": f"User {'created' if created else 'updated'} successfully", "user": serializer.data}, status=status.HTTP_200_OK)
-
-    elif event_type == 'user.deleted':
-        deleted_count, _ = User.objects.filter(clerk_id=clerk_id).delete()
-        if deleted_count > 0:
-             return Response({"message": "User deleted successfully"}, status=status.HTTP_200_OK)
-        else:
-             return Response({"message": "User not found to delete"}, status=status.HTTP_404_NOT_FOUND)
+    if event_type not in webhooks.UPSERT_EVENTS + webhooks.DELETE_EVENTS:
+        return Response({"message": "Event type not handled"}, status=status.HTTP_200_OK)
+    if not data.get('id'):
+        return Response({"error": "Missing clerk_id"}, status=status.HTTP_400_BAD_REQUEST)
+    if event_type in webhooks.UPSERT_EVENTS and not webhooks.verified_email(data):
+        return Response({"error": "Missing clerk_id or verified email"}, status=status.HTTP_400_BAD_REQUEST)
 
-    return Response({"message": "Event type not handled"}, status=status.HTTP_200_OK)
+    # Svix sends the same svix-id on every redelivery; without it, identical payloads count as one event
+    event_id = request.headers.get('svix-id') or hashlib.sha256(json.dumps(request.data, sort_keys=True).encode()).hexdigest()
+    webhooks.store(event_id, event_type, data, request.data.get('timestamp'))
+    return Response({"message": "Event queued"}, status=status.HTTP_202_ACCEPTED)
 
 
 # --- Current User Endpoint ---
 @api_view(['GET'])
-@clerk_auth_employee # Decorator for FBV - sets request.user_profile
+@clerk_auth_employee # Decorator for FBV - request.user is the authenticated ClerkPrincipal
 def get_current_user_profile(request):
     try:
-        profile = EmployeeProfile.objects.select_related('user', 'department')\
-                                     .prefetch_related('salaries', 'title_history')\
-                                     .get(user=request.user_profile)
+        not_modified, validators = conditional.check(
+            request, EmployeeProfile.objects.filter(user_id=request.user.clerk_id), 'updated_at', 'user__updated_at', 'department__updated_at')
+        if not_modified: return not_modified
+        profile = EmployeeProfile.objects.select_related('user', 'department', 'current_salary', 'current_title')\
+                                     .get(user_id=request.user.clerk_id)
         serializer = EmployeeProfileSerializer(profile, context={'request': request})
-        return Response(serializer.data)
+        return validators.apply(Response(serializer.data))
     except EmployeeProfile.DoesNotExist:
          return Response({'error': 'Employee profile not found for this user. Please contact Admin.'}, status=status.HTTP_404_NOT_FOUND)
-    except AttributeError:
-         # Only happens if decorator fails to attach user_profile
-         return Response({'error': 'Authentication user profile not found in request.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     except Exception as e:
          return Response({'error': f'An unexpected error occurred: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -98,7 +85,7 @@ def get_current_user_profile(request):
 @clerk_auth_employee # Decorator for FBV
 def list_employees(request):
     try:
-        queryset = EmployeeProfile.objects.select_related('user', 'department').filter(user__is_active=True).order_by('user__last_name', 'user__first_name')
+        queryset = EmployeeProfile.objects.filter(user__is_active=True)
 
         dept_id = request.query_params.get('department')
         title = request.query_params.get('title')
@@ -111,16 +98,18 @@ def list_employees(request):
                  return Response({'error': 'Invalid department ID format.'}, status=status.HTTP_400_BAD_REQUEST)
         if title:
             queryset = queryset.filter(job_title__icontains=title)
+        ordering = ('user__last_name', 'user__first_name', 'pk')
         if search_term:
-            queryset = queryset.filter(
-                Q(user__first_name__icontains=search_term) |
-                Q(user__last_name__icontains=search_term) |
-                Q(user__email__icontains=search_term) |
-                Q(job_title__icontains=search_term) |
-                Q(department__name__icontains=search_term)
-            )
-        serializer = EmployeeProfileBasicSerializer(queryset, many=True)
-        return Response(serializer.data)
+            # Word-prefix match on the search index, best matches first
+            queryset = search.search_profiles(queryset, search_term)
+            ordering = ('-search_rank',) + ordering
+        not_modified, validators = conditional.check(request, queryset, 'updated_at', 'user__updated_at', 'department__updated_at')
+        if not_modified: return not_modified
+        paginator = KeysetPagination(ordering=ordering)
+        page = paginator.paginate_queryset(EMPLOYEE_BASIC.values(queryset, ordering), request)
+        return validators.apply(paginator.get_paginated_response(EMPLOYEE_BASIC.render(page))) # Same output as EmployeeProfileBasicSerializer
+    except APIException:
+        raise
     except Exception as e:
          return Response({'error': f'Could not retrieve employee list: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -129,15 +118,25 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     queryset = Department.objects.select_related('manager').all().order_by('name')
     serializer_class = DepartmentSerializer
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']: permissions_instances = [IsClerkEmployee]
-        else: permissions_instances = [IsClerkAdmin]
+        if self.action in ['list', 'retrieve']: permissions_instances = [IsClerkEmployee()]
+        else: permissions_instances = [IsClerkAdmin()]
         return permissions_instances
+    # Conditional GET: 304 when no department (or its manager) changed since the client's copy
+    def list(self, request, *args, **kwargs):
+        not_modified, validators = conditional.check(request, self.filter_queryset(self.get_queryset()), 'updated_at', 'manager__updated_at')
+        return not_modified or validators.apply(super().list(request, *args, **kwargs))
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            not_modified, validators = conditional.check(request, self.get_queryset().filter(pk=kwargs['pk']), 'updated_at', 'manager__updated_at')
+        except (TypeError, ValueError):
+            return super().retrieve(request, *args, **kwargs) # Malformed pk: let get_object() answer 404
+        return not_modified or validators.apply(super().retrieve(request, *args, **kwargs))
 
 # --- HR Manager: Manage Employee Profile (HR/Admin Update) ---
 @api_view(['GET', 'PUT'])
-@clerk_auth_hr # Decorator for FBV - ensures user is HR/Admin and attaches request.user_profile
+@clerk_auth_hr # Decorator for FBV - ensures user is HR/Admin
 def manage_employee_profile(request, clerk_id):
-    profile = get_object_or_404(EmployeeProfile.objects.select_related('user', 'department'), user__clerk_id=clerk_id)
+    profile = get_object_or_404(EmployeeProfile.objects.select_related('user', 'department', 'current_salary', 'current_title'), user__clerk_id=clerk_id)
 
     if request.method == 'GET':
         serializer = EmployeeProfileSerializer(profile, context={'request': request})
@@ -169,30 +168,32 @@ def manage_employee_profile(request, clerk_id):
                      if is_foreign_key_changed or (field != 'department' and current_value != new_value) :
                            fields_to_update[field] = new_value
 
-             if fields_to_update:
-                 for field, value in fields_to_update.items():
-                    setattr(profile, field, value)
-                 # Only save fields that were actually updated
-                 profile.save(update_fields=fields_to_update.keys())
-
-                 # Title History Update Logic
-                 new_job_title = fields_to_update.get('job_title')
-                 if new_job_title and new_job_title != original_job_title:
-                      latest_title_entry = TitleHistory.objects.filter(employee=profile).order_by('-start_date', '-id').first()
-                      today = timezone.now().date()
-                      if latest_title_entry and latest_title_entry.job_title != new_job_title:
-                          if latest_title_entry.end_date is None:
-                              end_date_update = today - timezone.timedelta(days=1)
-                              if end_date_update < latest_title_entry.start_date: end_date_update = latest_title_entry.start_date
-                              latest_title_entry.end_date = end_date_update
-                              latest_title_entry.save(update_fields=['end_date'])
-                          TitleHistory.objects.create(employee=profile, job_title=new_job_title, start_date=today)
-                      elif not latest_title_entry:
-                           start_date = profile.hire_date if profile.hire_date else today
-                           TitleHistory.objects.create(employee=profile, job_title=new_job_title, start_date=start_date)
+             with transaction.atomic():
+                 if fields_to_update:
+                     for field, value in fields_to_update.items():
+                        setattr(profile, field, value)
+                     # Only save fields that were actually updated
+                     profile.save(update_fields=fields_to_update.keys())
+
+                     # Title History Update Logic
+                     new_job_title = fields_to_update.get('job_title')
+                     if new_job_title and new_job_title != original_job_title:
+                          latest_title_entry = TitleHistory.objects.filter(employee=profile).order_by('-start_date', '-id').first()
+                          today = timezone.now().date()
+                          if latest_title_entry and latest_title_entry.job_title != new_job_title:
+                              if latest_title_entry.end_date is None:
+                                  end_date_update = today - timezone.timedelta(days=1)
+                                  if end_date_update < latest_title_entry.start_date: end_date_update = latest_title_entry.start_date
+                                  latest_title_entry.end_date = end_date_update
+                                  latest_title_entry.save(update_fields=['end_date'])
+                              TitleHistory.objects.create(employee=profile, job_title=new_job_title, start_date=today)
+                          elif not latest_title_entry:
+                               start_date = profile.hire_date if profile.hire_date else today
+                               TitleHistory.objects.create(employee=profile, job_title=new_job_title, start_date=start_date)
+                     profile.sync_current_title()
 
              # Return updated data
-             refreshed_profile = EmployeeProfile.objects.get(pk=profile.pk)
+             refreshed_profile = EmployeeProfile.objects.select_related('user', 'department', 'current_salary', 'current_title').get(pk=profile.pk)
              response_serializer = EmployeeProfileSerializer(refreshed_profile, context={'request': request})
              return Response(response_serializer.data)
         else:
@@ -202,14 +203,9 @@ def manage_employee_profile(request, clerk_id):
 # --- Salary Views (HR/Admin CRUD) ---
 class SalaryViewSet(viewsets.ModelViewSet):
     serializer_class = SalarySerializer
-    def dispatch(self, request, *args, **kwargs):
-        checker = IsClerkHr
-        if not checker.has_permission(request, self):
-            status_code = status.HTTP_401_UNAUTHORIZED
-            if hasattr(checker, 'message') and ('Forbidden' in checker.message or 'inactive' in checker.message or 'not found' in checker.message):
-                status_code = status.HTTP_403_FORBIDDEN
-            return Response({"detail": getattr(checker, 'message', "Permission Denied")}, status=status_code)
-        return super().dispatch(request, *args, **kwargs)
+    permission_classes = [IsClerkHr]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-effective_date', '-id')
     def get_queryset(self):
         queryset = Salary.objects.select_related('employee__user').all()
         clerk_id = self.request.query_params.get('clerk_id')
@@ -220,45 +216,67 @@ class SalaryViewSet(viewsets.ModelViewSet):
         employee_profile = serializer.validated_data['employee']
         Salary.objects.filter(employee=employee_profile, is_current=True).update(is_current=False)
         serializer.save(is_current=True)
+        employee_profile.sync_current_salary()
     @transaction.atomic
     def perform_update(self, serializer):
+        previous_profile = serializer.instance.employee
         if serializer.validated_data.get('is_current', False):
-            employee_profile = serializer.instance.employee
+            employee_profile = serializer.validated_data.get('employee', previous_profile)
             Salary.objects.filter(employee=employee_profile, is_current=True).exclude(pk=serializer.instance.pk).update(is_current=False)
-        serializer.save()
+        salary = serializer.save()
+        salary.employee.sync_current_salary(edited=salary)
+        if previous_profile.pk != salary.employee_id: previous_profile.sync_current_salary()
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        employee_profile = instance.employee
+        instance.delete()
+        employee_profile.sync_current_salary()
 
 # --- Title History Views (Admin CRUD, Employee View) ---
 class TitleHistoryViewSet(viewsets.ModelViewSet):
     serializer_class = TitleHistorySerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-start_date', '-id')
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']: permissions_instances = [IsClerkEmployee]
-        else: permissions_instances = [IsClerkAdmin]
+        if self.action in ['list', 'retrieve']: permissions_instances = [IsClerkEmployee()]
+        else: permissions_instances = [IsClerkAdmin()]
         return permissions_instances
     def get_queryset(self):
          queryset = TitleHistory.objects.select_related('employee__user').all()
          clerk_id = self.request.query_params.get('clerk_id')
          if clerk_id: queryset = queryset.filter(employee__user__clerk_id=clerk_id)
          return queryset.order_by('-start_date', '-id')
+    @transaction.atomic
+    def perform_create(self, serializer):
+        serializer.save().employee.sync_current_title()
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_profile = serializer.instance.employee
+        entry = serializer.save()
+        entry.employee.sync_current_title(edited=entry)
+        if previous_profile.pk != entry.employee_id: previous_profile.sync_current_title()
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        employee_profile = instance.employee
+        instance.delete()
+        employee_profile.sync_current_title()
 
 # --- Admin: User Management Views ---
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('email')
     serializer_class = UserSerializer
     lookup_field = 'clerk_id'
-    def dispatch(self, request, *args, **kwargs):
-        checker = IsClerkAdmin
-        if not checker.has_permission(request, self):
-            status_code = status.HTTP_401_UNAUTHORIZED
-            if hasattr(checker, 'message') and ('Forbidden' in checker.message or 'inactive' in checker.message or 'not found' in checker.message):
-                status_code = status.HTTP_403_FORBIDDEN
-            return Response({"detail": getattr(checker, 'message', "Permission Denied")}, status=status_code)
-        return super().dispatch(request, *args, **kwargs)
+    permission_classes = [IsClerkAdmin]
     def perform_update(self, serializer):
         instance = serializer.instance
-        allowed_updates = {'role': serializer.validated_data.get('role', instance.role), 'is_active': serializer.validated_data.get('is_active', instance.is_active)}
-        User.objects.filter(pk=instance.pk).update(**allowed_updates)
+        instance.role = serializer.validated_data.get('role', instance.role)
+        instance.is_active = serializer.validated_data.get('is_active', instance.is_active)
+        instance.save(update_fields=['role', 'is_active', 'updated_at']) # save() so the dashboard counters see is_active changes
+        invalidate_cached_principal(instance.pk) # This worker at once; the others at their next sync on updated_at
     def perform_destroy(self, instance):
-         User.objects.filter(pk=instance.pk).update(is_active=False)
+         instance.is_active = False
+         instance.save(update_fields=['is_active', 'updated_at'])
+         invalidate_cached_principal(instance.pk)
 
 
 # --- Onboarding Views ---
@@ -267,56 +285,64 @@ class UserViewSet(viewsets.ModelViewSet):
 def list_pending_onboarding(request):
     try:
          pending_statuses = ['Pending', 'Scheduled', 'InProgress']
-         queryset = EmployeeProfile.objects.select_related('user', 'department')\
-                         .filter(onboarding_status__in=pending_statuses)\
-                         .order_by('onboarding_start_date', 'user__last_name')
-         serializer = EmployeeProfileSerializer(queryset, many=True, context={'request': request})
-         return Response(serializer.data)
+         queryset = EmployeeProfile.objects.select_related('user', 'department', 'current_salary', 'current_title')\
+                         .filter(onboarding_status__in=pending_statuses)
+         paginator = KeysetPagination(ordering=('onboarding_start_date', 'user__last_name', 'pk'))
+         page = paginator.paginate_queryset(queryset, request)
+         serializer = EmployeeProfileSerializer(page, many=True, context={'request': request})
+         return paginator.get_paginated_response(serializer.data)
+    except APIException:
+         raise
     except Exception as e:
          return Response({'error': f'Could not retrieve onboarding list: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['POST'])
+@clerk_auth_hr # Decorator for FBV
+def import_employees(request):
+    # Multipart upload with a `file` CSV (columns: api.bulk_import.COLUMNS); rows are decoded and imported as they are read
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({'error': "Upload the CSV as multipart form field 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+    importer = bulk_import.EmployeeImporter(manage_users=request.user.role == 'admin') # Role/status/email stay admin-only
+    try:
+        report = importer.run(bulk_import.read_csv(codecs.iterdecode(upload, 'utf-8-sig')))
+    except (ValueError, csv.Error) as e: # Bad header or undecodable input; batches before it are kept
+        return Response({'error': f'Could not read CSV: {str(e)}', **importer.report.as_dict()}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report.as_dict())
+
 # --- Payroll Views ---
 class PayRunViewSet(viewsets.ModelViewSet):
     queryset = PayRun.objects.all().order_by('-pay_date', '-id')
     serializer_class = PayRunSerializer
-    def dispatch(self, request, *args, **kwargs):
-        checker = IsClerkHr
-        if not checker.has_permission(request, self):
-            status_code = status.HTTP_401_UNAUTHORIZED
-            if hasattr(checker, 'message') and ('Forbidden' in checker.message or 'inactive' in checker.message or 'not found' in checker.message):
-                status_code = status.HTTP_403_FORBIDDEN
-            return Response({"detail": getattr(checker, 'message', "Permission Denied")}, status=status_code)
-        return super().dispatch(request, *args, **kwargs)
+    permission_classes = [IsClerkHr]
     @action(detail=True, methods=['post'], url_path='process')
-    @transaction.atomic
     def process_payroll(self, request, pk=None):
         pay_run = self.get_object();
-        if pay_run.status != 'Pending': return Response({'error': 'Payroll can only be processed from Pending status.'}, status=status.HTTP_400_BAD_REQUEST)
-        pay_run.status = 'Processing'; pay_run.save()
-        try:
-            profiles_to_pay = EmployeeProfile.objects.filter(user__is_active=True);
-            if not profiles_to_pay.exists(): pay_run.status='Completed'; pay_run.processed_at = timezone.now(); pay_run.save(); return Response({'message': 'No eligible employees found...'}, status=status.HTTP_200_OK)
-            stubs_created_count = 0
-            for profile in profiles_to_pay:
-                current_salary_obj = Salary.objects.filter(employee=profile, is_current=True).first()
-                if not current_salary_obj: continue
-                days_in_period=max(1, (...)); daily_rate = ...; estimated_gross = ...; estimated_deductions = ...; estimated_net = ...;
-                PayStub.objects.create(pay_run=pay_run, employee=profile, gross_pay=estimated_gross.quantize(Decimal("0.01")), deductions=estimated_deductions.quantize(Decimal("0.01")), net_pay=estimated_net.quantize(Decimal("0.01")))
-                stubs_created_count += 1
-            pay_run.status = 'Completed'; pay_run.processed_at = timezone.now(); pay_run.save();
-            return Response({'message': f'Payroll processed... {stubs_created_count} stubs generated.'}, status=status.HTTP_200_OK)
-        except Exception as e: pay_run.status='Failed'; pay_run.processed_at=timezone.now(); pay_run.save(); return Response({'error': f'Error during processing: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        job = jobs.enqueue_pay_run(pay_run)
+        if job is None: return Response({'error': 'Payroll can only be processed from Pending or Failed status.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'Payroll processing queued.', 'job': PayrollJobSerializer(job).data}, status=status.HTTP_202_ACCEPTED)
+    @action(detail=True, methods=['get'], url_path='progress')
+    def progress(self, request, pk=None):
+        pay_run = self.get_object()
+        job = pay_run.jobs.order_by('-created_at', '-id').first()
+        if job is None: return Response({'error': 'Payroll has not been queued for this run.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'pay_run_status': pay_run.status, **PayrollJobSerializer(job).data})
+    @action(detail=True, methods=['get'], url_path='export')
+    def export(self, request, pk=None):
+        # ?output=csv (default) or ndjson; `format` is taken by DRF's renderer negotiation
+        pay_run = self.get_object()
+        output = request.query_params.get('output', 'csv')
+        if output not in exports.FORMATS: return Response({'error': f"Unsupported output '{output}'. Use csv or ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+        lines, content_type, extension = exports.FORMATS[output]
+        response = StreamingHttpResponse(lines(exports.iter_stub_rows(pay_run)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="payrun-{pay_run.pk}-stubs.{extension}"'
+        return response
 
 class PayStubAdminViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = PayStubAdminSerializer
-    def dispatch(self, request, *args, **kwargs):
-        checker = IsClerkHr
-        if not checker.has_permission(request, self):
-            status_code = status.HTTP_401_UNAUTHORIZED
-            if hasattr(checker, 'message') and ('Forbidden' in checker.message or 'inactive' in checker.message or 'not found' in checker.message):
-                status_code = status.HTTP_403_FORBIDDEN
-            return Response({"detail": getattr(checker, 'message', "Permission Denied")}, status=status_code)
-        return super().dispatch(request, *args, **kwargs)
+    permission_classes = [IsClerkHr]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-pay_run__pay_date', 'employee__user__last_name', 'id')
     def get_queryset(self):
         queryset = PayStub.objects.select_related('pay_run', 'employee__user').all()
         pay_run_id = self.request.query_params.get('run_id'); employee_clerk_id = self.request.query_params.get('clerk_id');
@@ -328,18 +354,24 @@ class PayStubAdminViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
         if employee_clerk_id:
             queryset = queryset.filter(employee__user__clerk_id=employee_clerk_id)
         return queryset.order_by('-pay_run__pay_date', 'employee__user__last_name')
+    def list(self, request, *args, **kwargs):
+        # Read path via .values(): same output as PayStubAdminSerializer without building model instances
+        queryset = PAYSTUB_ADMIN.values(self.filter_queryset(self.get_queryset()), self.keyset_ordering)
+        return self.get_paginated_response(PAYSTUB_ADMIN.render(self.paginate_queryset(queryset)))
 
 
 @api_view(['GET'])
 @clerk_auth_employee # Decorator for FBV
 def list_my_paystubs(request):
     try:
-         employee_profile = get_object_or_404(EmployeeProfile, user=request.user_profile)
-         queryset = PayStub.objects.select_related('pay_run')\
-                        .filter(employee=employee_profile)\
-                        .order_by('-pay_run__pay_date')
-         serializer = PayStubEmployeeSerializer(queryset, many=True)
-         return Response(serializer.data)
+         employee_profile = get_object_or_404(EmployeeProfile, user_id=request.user.clerk_id)
+         queryset = PayStub.objects.filter(employee=employee_profile)
+         ordering = ('-pay_run__pay_date', 'id')
+         paginator = KeysetPagination(ordering=ordering)
+         page = paginator.paginate_queryset(PAYSTUB_EMPLOYEE.values(queryset, ordering), request)
+         return paginator.get_paginated_response(PAYSTUB_EMPLOYEE.render(page)) # Same output as PayStubEmployeeSerializer
+    except APIException:
+          raise
     except EmployeeProfile.DoesNotExist:
           return Response({'error': 'Could not find employee profile associated with your user.'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -352,22 +384,17 @@ def list_my_paystubs(request):
 def get_hr_stats(request):
     """ Returns key statistics for the HR Overview dashboard. """
     try:
-        active_employees_count = EmployeeProfile.objects.filter(user__is_active=True).count()
-        pending_onboarding_statuses = ['Pending', 'Scheduled', 'InProgress']
-        pending_onboarding_count = EmployeeProfile.objects.filter(onboarding_status__in=pending_onboarding_statuses).count()
-        pending_payruns_count = PayRun.objects.filter(status='Pending').count()
-
-        stats = {
-            "active_employees_count": active_employees_count,
-            "pending_onboarding_count": pending_onboarding_count,
-            "pending_payruns_count": pending_payruns_count,
+        counters = stats.read() # Maintained incrementally, see api/stats.py
+        hr_stats = {
+            "active_employees_count": counters['active_employees'],
+            "pending_onboarding_count": counters['pending_onboarding'],
+            "pending_payruns_count": counters['pending_payruns'],
             # Add more stats as needed (e.g., recent hires, upcoming reviews)
         }
-        return Response(stats)
+        return Response(hr_stats)
 
     except Exception as e:
-        # Log the exception for debugging
-        print(f"ERROR fetching HR stats: {e}")
+        logger.error(f"ERROR fetching HR stats: {e}", exc_info=True)
         return Response({'error': f'Could not retrieve HR statistics: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 @api_view(['GET'])
@@ -375,18 +402,33 @@ def get_hr_stats(request):
 def get_admin_stats(request):
     """ Returns key statistics for the Admin Overview dashboard. """
     try:
-        total_users_count = User.objects.count()
-        active_users_count = User.objects.filter(is_active=True).count()
-        department_count = Department.objects.count()
-        # Could add more stats like pending payrolls, onboarding users etc.
-
-        stats = {
-            "total_users_count": total_users_count,
-            "active_users_count": active_users_count,
-            "department_count": department_count,
+        counters = stats.read() # Maintained incrementally, see api/stats.py
+        admin_stats = {
+            "total_users_count": counters['total_users'],
+            "active_users_count": counters['active_users'],
+            "department_count": counters['departments'],
+            # Could add more stats like pending payrolls, onboarding users etc.
         }
-        return Response(stats)
+        return Response(admin_stats)
 
     except Exception as e:
-        print(f"ERROR fetching Admin stats: {e}")
+        logger.error(f"ERROR fetching Admin stats: {e}", exc_info=True)
         return Response({'error': f'Could not retrieve Admin statistics: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# --- Health ---
+@api_view(['GET'])
+@authentication_classes([]) # Load balancer probes carry no token
+@permission_classes([AllowAny])
+def readiness(request):
+    """ 200 once this process has warmed up (api/warmup.py) and can reach the database, else 503. """
+    body = warmup.state.as_dict()
+    if body['ready']:
+        try:
+            connection.ensure_connection() # Opens the serving thread's connection, which CONN_MAX_AGE keeps
+        except DatabaseError as e:
+            logger.error(f"Readiness check: database unavailable: {e}")
+            body['ready'] = False
+    response = Response(body, status=status.HTTP_200_OK if body['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Cache-Control'] = 'no-store'
+    return response
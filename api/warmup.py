@@ -0,0 +1,128 @@
+# api/warmup.py
+"""
+Per-process warm-up, so a new worker does not serve its first requests cold.
+
+ApiConfig.ready() calls start() when settings.WARMUP_ON_START is set (the WSGI/ASGI entry points
+turn it on; manage.py commands and tests leave it off). A background thread then:
+- fetches the Clerk JWKS;
+- connects to the database once, which pays for DNS, the handshake and the driver's lazy set-up
+  and checks that the database is reachable;
+- compiles the URL patterns;
+- builds every serializer's fields.
+/api/health/ready answers 503 until the thread is done. Django connections are per thread, so the
+readiness check opens the serving thread's own connection, which CONN_MAX_AGE then keeps. Steps
+are best effort: a failing step is reported by the endpoint, but it does not hold the worker back,
+since the lazy paths still work.
+
+gunicorn --preload loads the app once in the master and then forks the workers. Before each fork,
+the master waits for its warm-up to finish and closes its DB connections. A child must not share
+the parent's socket, but it does inherit the keys, compiled patterns and other warmed memory. In
+each child, readiness is reset and warm-up runs again; steps already done in the parent are then
+cheap.
+"""
+import logging
+import os
+import threading
+import time
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    def __init__(self):
+        self.started = False
+        self.finished = threading.Event()
+        self.steps = {} # name -> {'ms': duration, 'error': message (failures only)}
+
+    def is_ready(self):
+        return not self.started or self.finished.is_set() # Warm-up disabled: nothing to wait for
+
+    def as_dict(self):
+        # Errors are logged, not returned: the readiness endpoint is unauthenticated
+        return {'ready': self.is_ready(), 'steps': {name: {'ms': step['ms'], 'ok': 'error' not in step} for name, step in self.steps.items()}}
+
+
+state = WarmupState()
+_thread = None
+_fork_hooks = False
+
+
+def warm_jwks():
+    from .auth_utils import jwks_manager
+    if not jwks_manager.get_jwks():
+        raise RuntimeError('JWKS could not be fetched.')
+
+
+def warm_database():
+    for connection in connections.all():
+        connection.ensure_connection()
+
+
+def warm_urls():
+    def compile_patterns(resolver):
+        for pattern in resolver.url_patterns:
+            pattern.pattern.regex # Compiled lazily on first access
+            if isinstance(pattern, URLResolver):
+                compile_patterns(pattern)
+    resolver = get_resolver()
+    compile_patterns(resolver)
+    resolver.reverse_dict # Populates the reverse lookup tables for every namespace
+
+
+def warm_serializers():
+    from rest_framework.serializers import BaseSerializer
+    from . import serializers
+    for serializer_class in vars(serializers).values():
+        if isinstance(serializer_class, type) and issubclass(serializer_class, BaseSerializer) and serializer_class.__module__ == serializers.__name__:
+            serializer_class().fields
+
+
+STEPS = [('jwks', warm_jwks), ('database', warm_database), ('urls', warm_urls), ('serializers', warm_serializers)]
+
+
+def run():
+    """ Runs every step in this thread and marks the process ready. """
+    try:
+        for name, step in STEPS:
+            started = time.perf_counter()
+            result = {}
+            try:
+                step()
+            except Exception as exc:
+                logger.warning("Warm-up step %s failed: %s", name, exc)
+                result['error'] = str(exc)
+            result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+            state.steps[name] = result
+    finally:
+        connections.close_all() # This thread's connections only: request threads open their own
+        state.finished.set()
+    logger.info("Warm-up finished in pid %s: %s", os.getpid(), state.steps)
+
+
+def start():
+    """ Starts warm-up in a background thread (once per process). """
+    global _thread, _fork_hooks
+    if state.started:
+        return
+    state.started = True
+    if not _fork_hooks: # Only processes that warm up (servers) need them; children inherit the registration
+        os.register_at_fork(before=_before_fork, after_in_child=_after_fork_in_child)
+        _fork_hooks = True
+    _thread = threading.Thread(target=run, name='warmup', daemon=True)
+    _thread.start()
+
+
+def _before_fork():
+    if _thread is not None:
+        _thread.join() # Fork with no warm-up half done (locks held, sockets mid-request)
+    for connection in connections.all(initialized_only=True):
+        if not connection.in_atomic_block:
+            connection.close() # The child must open its own connection, not share the parent's socket
+
+
+def _after_fork_in_child():
+    global state, _thread
+    state, _thread = WarmupState(), None
+    start()
@@ -0,0 +1,151 @@
+# api/webhooks.py
+"""
+Clerk webhook inbox.
+
+The webhook view validates the payload and INSERTs it into ClerkWebhookEvent with conflicts on
+the event id ignored, so a delivery costs one statement and a redelivery changes nothing.
+`manage.py process_clerk_webhooks` drains the inbox in batches claimed with
+SELECT ... FOR UPDATE SKIP LOCKED. Clerk sends the whole user object with every event, so a
+batch is reduced to the newest event per clerk_id and applied with one bulk UPDATE for known
+users, one INSERT for new ones and one DELETE for deleted ones. Events older than one already
+applied for the same user (deliveries are not ordered) are marked processed without being applied,
+and an event whose email belongs to another user is recorded as failed without touching either user.
+
+The consumer runs in its own process, so it cannot evict the web workers' cached principals
+directly: updates bump User.updated_at, which the workers' PrincipalCache sync picks up within
+CLERK_PRINCIPAL_SYNC_INTERVAL. Deleted users leave no row to sync on; a cached principal lasts at
+most CLERK_PRINCIPAL_CACHE_TTL, and Clerk issues no new tokens for them.
+"""
+import logging
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import search, stats
+from .models import User, EmployeeProfile, ClerkWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+UPSERT_EVENTS = ('user.created', 'user.updated')
+DELETE_EVENTS = ('user.deleted',)
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_RETENTION_DAYS = 7 # Processed events are kept this long so redeliveries stay no-ops
+
+
+def get_batch_size():
+    return int(getattr(settings, 'CLERK_WEBHOOK_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+
+
+def verified_email(data):
+    return next((e['email_address'] for e in data.get('email_addresses', []) if e.get('verification', {}).get('status') == 'verified'), None)
+
+
+def event_time(timestamp):
+    """ Clerk's event `timestamp` (milliseconds since the epoch) as a datetime, or None. """
+    try:
+        return datetime.fromtimestamp(int(timestamp) / 1000, tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def store(event_id, event_type, data, timestamp=None):
+    """ Appends an event to the inbox; a second delivery of the same event id is ignored. """
+    ClerkWebhookEvent.objects.bulk_create([ClerkWebhookEvent(
+        event_id=event_id, event_type=event_type, clerk_id=data['id'], payload=data, occurred_at=event_time(timestamp),
+    )], ignore_conflicts=True)
+
+
+def process_batch(batch_size=None):
+    """ Applies one batch of pending events and returns how many were consumed (0 when the inbox is empty). """
+    with transaction.atomic():
+        events = list(ClerkWebhookEvent.objects.select_for_update(skip_locked=True)
+                                               .filter(processed_at__isnull=True).order_by('id')[:batch_size or get_batch_size()])
+        if not events:
+            return 0
+        latest = {}
+        for event in sorted(events, key=lambda e: (e.occurred_at or e.received_at, e.id)):
+            latest[event.clerk_id] = event
+        applied = dict(ClerkWebhookEvent.objects.filter(clerk_id__in=latest, processed_at__isnull=False, error='')
+                                                .values('clerk_id').annotate(newest=Max('occurred_at')).values_list('clerk_id', 'newest'))
+        current = [event for event in latest.values()
+                   if not (event.occurred_at and applied.get(event.clerk_id) and event.occurred_at < applied[event.clerk_id])]
+
+        errors = {}
+        try:
+            with transaction.atomic():
+                errors.update(apply(current))
+        except DatabaseError:
+            # e.g. a user created concurrently by JIT provisioning: apply users one by one, recording failures
+            for event in current:
+                try:
+                    with transaction.atomic():
+                        errors.update(apply([event]))
+                except DatabaseError as exc:
+                    logger.error("Clerk webhook %s for %s could not be applied: %s", event.event_id, event.clerk_id, exc)
+                    errors[event.pk] = str(exc)
+
+        ClerkWebhookEvent.objects.filter(pk__in=[event.pk for event in events]).update(processed_at=timezone.now())
+        for pk, error in errors.items():
+            ClerkWebhookEvent.objects.filter(pk=pk).update(error=error)
+    return len(events)
+
+
+def apply(events):
+    """
+    Brings users to the state in `events` (at most one per clerk_id). Returns {event pk: error} for the
+    events that were not applied because their email belongs to another user.
+    """
+    deleted = [event.clerk_id for event in events if event.event_type in DELETE_EVENTS]
+    if deleted:
+        User.objects.filter(clerk_id__in=deleted).delete() # Per-object signals keep the counters and search index in step
+
+    upserts = [event for event in events if event.event_type in UPSERT_EVENTS]
+    if not upserts:
+        return {}
+    # Email owners are resolved up front, as bulk_import.validate does: writing a taken email must not reach the
+    # database, where MySQL's upsert would have overwritten the owner's row instead of raising
+    owners = {email.lower(): clerk_id for email, clerk_id in
+              User.objects.filter(email__in=[verified_email(event.payload) for event in upserts]).values_list('email', 'clerk_id')}
+    errors, accepted = {}, []
+    for event in upserts:
+        email = verified_email(event.payload)
+        owner = owners.setdefault(email.lower(), event.clerk_id) # Also catches two users claiming one email in this batch
+        if owner != event.clerk_id:
+            errors[event.pk] = f"Email {email} belongs to user {owner}."
+        else:
+            accepted.append(event)
+    if not accepted:
+        return errors
+
+    clerk_ids = [event.clerk_id for event in accepted]
+    # clerk_id -> (is_active, profile pk or None) before the write, for the dashboard counters
+    before = {clerk_id: (is_active, profile) for clerk_id, is_active, profile in
+              User.objects.filter(clerk_id__in=clerk_ids).values_list('clerk_id', 'is_active', 'profile__user_id')}
+    now = timezone.now()
+    users = [User(clerk_id=event.clerk_id, email=verified_email(event.payload), first_name=event.payload.get('first_name') or '',
+                  last_name=event.payload.get('last_name') or '', role='employee', is_active=True, created_at=now, updated_at=now)
+             for event in accepted]
+    # Separate UPDATE and INSERT: a conflict then raises instead of being resolved against another unique key
+    User.objects.bulk_update([user for user in users if user.pk in before], ['email', 'first_name', 'last_name', 'role', 'is_active', 'updated_at'])
+    User.objects.bulk_create([user for user in users if user.pk not in before])
+    new_profiles = [clerk_id for clerk_id in clerk_ids if before.get(clerk_id, (None, None))[1] is None]
+    EmployeeProfile.objects.bulk_create([EmployeeProfile(user_id=clerk_id, job_title='Pending Assignment') for clerk_id in new_profiles])
+
+    # Bulk writes skip the signals that maintain these (see api.signals)
+    new_users = [clerk_id for clerk_id in clerk_ids if clerk_id not in before]
+    reactivated = [clerk_id for clerk_id, (is_active, _) in before.items() if not is_active]
+    stats.bump(total_users=len(new_users), active_users=len(new_users) + len(reactivated),
+               active_employees=len(new_profiles) + sum(1 for clerk_id in reactivated if before[clerk_id][1] is not None),
+               pending_onboarding=len(new_profiles)) # New profiles start 'Pending'
+    search.reindex_profiles(EmployeeProfile.objects.filter(pk__in=clerk_ids))
+    return errors
+
+
+def prune(retention_days=None):
+    """ Deletes processed events older than the retention period; returns the number deleted. """
+    days = retention_days if retention_days is not None else int(getattr(settings, 'CLERK_WEBHOOK_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
+    deleted, _ = ClerkWebhookEvent.objects.filter(processed_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
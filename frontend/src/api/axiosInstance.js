@@ -27,3 +27,9 @@ export const getAuthenticatedInstance = async (getToken) => {
 };
 
 export default axiosInstance;
+
+// List endpoints are cursor-paginated: { next, results }. Pass either a path or a previous `next` URL.
+export const fetchPage = async (apiClient, url) => {
+    const response = await apiClient.get(url);
+    return { results: response.data?.results || [], next: response.data?.next || null };
+};
@@ -2,14 +2,18 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '@clerk/clerk-react';
 import { Link } from 'react-router-dom'; // Use Link to navigate to edit page
-import { getAuthenticatedInstance } from '../../api/axiosInstance';
+import { getAuthenticatedInstance, fetchPage } from '../../api/axiosInstance';
 
 function EmployeeManagement() {
     const [employees, setEmployees] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const [searchTerm, setSearchTerm] = useState('');
     const [deptFilter] = useState(''); // Add filters later if needed
+    const [isImporting, setIsImporting] = useState(false);
+    const [importResult, setImportResult] = useState(null);
     const { getToken } = useAuth();
 
     // Function to fetch employees
@@ -26,12 +30,14 @@ function EmployeeManagement() {
             if (deptFilter) {
                 params.append('department', deptFilter);
             }
-            const response = await apiClient.get(`/employees/?${params.toString()}`);
-            setEmployees(response.data || []);
+            const page = await fetchPage(apiClient, `/employees/?${params.toString()}`);
+            setEmployees(page.results);
+            setNextPage(page.next);
         } catch (err) {
             console.error("Failed to fetch employees:", err);
             setError(err.response?.data?.error || err.message || 'Failed to load employees');
             setEmployees([]);
+            setNextPage(null);
         } finally {
             setIsLoading(false);
         }
@@ -42,6 +48,42 @@ function EmployeeManagement() {
         fetchEmployees();
     }, [fetchEmployees]);
 
+    const loadMore = async () => {
+        setIsLoadingMore(true);
+        try {
+            const apiClient = await getAuthenticatedInstance(getToken);
+            const page = await fetchPage(apiClient, nextPage);
+            setEmployees((current) => [...current, ...page.results]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error("Failed to fetch more employees:", err);
+            setError(err.response?.data?.error || err.message || 'Failed to load more employees');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
+    const handleImport = async (e) => {
+        const file = e.target.files[0];
+        e.target.value = ''; // Allow re-selecting the same file
+        if (!file) return;
+        setIsImporting(true);
+        setImportResult(null);
+        try {
+            const apiClient = await getAuthenticatedInstance(getToken);
+            const formData = new FormData();
+            formData.append('file', file);
+            const response = await apiClient.post('/hr/employees/import/', formData);
+            setImportResult(response.data);
+            fetchEmployees();
+        } catch (err) {
+            console.error("Failed to import employees:", err);
+            setImportResult(err.response?.data || { error: 'Failed to import employees' });
+        } finally {
+            setIsImporting(false);
+        }
+    };
+
     const handleSearchSubmit = (e) => {
          e.preventDefault();
          fetchEmployees(); // Trigger fetch manually on submit if desired
@@ -70,6 +112,28 @@ function EmployeeManagement() {
                 <button type="submit">Search</button>
             </form>
 
+            {/* Bulk import: CSV with clerk_id, email and optional profile/salary columns */}
+            <div style={{ margin: '10px 0' }}>
+                <label>
+                    Import CSV:{' '}
+                    <input type="file" accept=".csv,text/csv" onChange={handleImport} disabled={isImporting} />
+                </label>
+                {isImporting && <span> Importing...</span>}
+                {importResult && (
+                    <div style={{ marginTop: '5px' }}>
+                        {importResult.error && <div style={{ color: 'red' }}>{importResult.error}</div>}
+                        {importResult.created !== undefined && (
+                            <div>{importResult.created} created, {importResult.updated} updated, {importResult.failed} failed</div>
+                        )}
+                        {importResult.errors?.slice(0, 20).map((rowError) => (
+                            <div key={rowError.row} style={{ color: 'red' }}>
+                                Line {rowError.row}: {Object.entries(rowError.errors).map(([field, messages]) => `${field}: ${[].concat(messages).join(' ')}`).join('; ')}
+                            </div>
+                        ))}
+                    </div>
+                )}
+            </div>
+
             <table border="1" style={{ width: '100%', borderCollapse: 'collapse' }}>
                 <thead>
                     <tr>
@@ -102,6 +166,11 @@ function EmployeeManagement() {
                     )}
                 </tbody>
             </table>
+                {nextPage && (
+                    <button onClick={loadMore} disabled={isLoadingMore} style={{ marginTop: '10px' }}>
+                        {isLoadingMore ? 'Loading...' : 'Load More'}
+                    </button>
+                )}
         </div>
     );
 }
@@ -2,12 +2,14 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '@clerk/clerk-react';
 import { Link } from 'react-router-dom';
-import { getAuthenticatedInstance } from '../../api/axiosInstance';
+import { getAuthenticatedInstance, fetchPage } from '../../api/axiosInstance';
 import { format } from 'date-fns'; // For formatting dates
 
 function OnboardingDashboard() {
     const [pendingEmployees, setPendingEmployees] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const { getToken } = useAuth();
 
@@ -16,12 +18,14 @@ function OnboardingDashboard() {
         setError(null);
         try {
             const apiClient = await getAuthenticatedInstance(getToken);
-            const response = await apiClient.get('/hr/onboarding/pending/');
-            setPendingEmployees(response.data || []);
+            const page = await fetchPage(apiClient, '/hr/onboarding/pending/');
+            setPendingEmployees(page.results);
+            setNextPage(page.next);
         } catch (err) {
             console.error("Failed to fetch pending onboarding:", err);
             setError(err.response?.data?.error || 'Failed to load onboarding data');
             setPendingEmployees([]);
+            setNextPage(null);
         } finally {
             setIsLoading(false);
         }
@@ -31,6 +35,21 @@ function OnboardingDashboard() {
         fetchPendingOnboarding();
     }, [fetchPendingOnboarding]);
 
+    const loadMore = async () => {
+        setIsLoadingMore(true);
+        try {
+            const apiClient = await getAuthenticatedInstance(getToken);
+            const page = await fetchPage(apiClient, nextPage);
+            setPendingEmployees((current) => [...current, ...page.results]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error("Failed to fetch more pending onboarding:", err);
+            setError(err.response?.data?.error || 'Failed to load onboarding data');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     const formatDate = (dateString) => {
          if (!dateString) return 'N/A';
          try {
@@ -86,6 +105,11 @@ function OnboardingDashboard() {
                      )}
                 </tbody>
             </table>
+            {nextPage && (
+                <button onClick={loadMore} disabled={isLoadingMore} style={{ marginTop: '10px' }}>
+                    {isLoadingMore ? 'Loading...' : 'Load More'}
+                </button>
+            )}
         </div>
     );
 }
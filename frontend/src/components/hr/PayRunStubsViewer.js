@@ -2,7 +2,7 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '@clerk/clerk-react';
-import { getAuthenticatedInstance } from '../../api/axiosInstance';
+import { getAuthenticatedInstance, fetchPage } from '../../api/axiosInstance';
 import { format } from 'date-fns'; // Optional: For formatting created_at
 
 function PayRunStubsViewer() {
@@ -10,7 +10,10 @@ function PayRunStubsViewer() {
     const navigate = useNavigate();
     const { getToken } = useAuth();
     const [stubs, setStubs] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    const [isExporting, setIsExporting] = useState(false);
     const [error, setError] = useState(null);
     const [runInfo, setRunInfo] = useState(null); // Optional: Store PayRun info
 
@@ -25,15 +28,16 @@ function PayRunStubsViewer() {
         try {
             const apiClient = await getAuthenticatedInstance(getToken);
             // Fetch stubs filtered by run_id using the admin endpoint
-            const response = await apiClient.get(`/payroll/stubs-admin/?run_id=${runId}`);
-            setStubs(response.data || []);
+            const page = await fetchPage(apiClient, `/payroll/stubs-admin/?run_id=${runId}`);
+            setStubs(page.results);
+            setNextPage(page.next);
 
             // Optional: Fetch PayRun details if needed for display context
-            if (response.data && response.data.length > 0 && response.data[0].pay_run_info) {
+            if (page.results.length > 0 && page.results[0].pay_run_info) {
                  // Simple approach: just use the info from the first stub if available
                  // Alternatively, fetch /payroll/runs/<runId>/ separately
-                 setRunInfo({ info: response.data[0].pay_run_info }); // Example using __str__ from serializer
-            } else if (response.data?.length === 0) {
+                 setRunInfo({ info: page.results[0].pay_run_info }); // Example using __str__ from serializer
+            } else if (page.results.length === 0) {
                 // If no stubs, still try to fetch run info for context
                 try {
                      const runResponse = await apiClient.get(`/payroll/runs/${runId}/`);
@@ -48,6 +52,7 @@ function PayRunStubsViewer() {
             console.error(`Failed to fetch pay stubs for run ${runId}:`, err);
             setError(err.response?.data?.error || `Failed to load pay stubs for run ${runId}`);
             setStubs([]);
+            setNextPage(null);
         } finally {
             setIsLoading(false);
         }
@@ -57,6 +62,41 @@ function PayRunStubsViewer() {
         fetchStubs();
     }, [fetchStubs]);
 
+    const loadMore = async () => {
+        setIsLoadingMore(true);
+        try {
+            const apiClient = await getAuthenticatedInstance(getToken);
+            const page = await fetchPage(apiClient, nextPage);
+            setStubs((current) => [...current, ...page.results]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error("Failed to fetch more pay stubs:", err);
+            setError(err.response?.data?.error || 'Failed to load more pay stubs');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
+    const exportStubs = async (output) => {
+        setIsExporting(true);
+        try {
+            const apiClient = await getAuthenticatedInstance(getToken);
+            // The server streams the file; the browser saves it as a download
+            const response = await apiClient.get(`/payroll/runs/${runId}/export/?output=${output}`, { responseType: 'blob' });
+            const url = window.URL.createObjectURL(response.data);
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = `payrun-${runId}-stubs.${output}`;
+            link.click();
+            window.URL.revokeObjectURL(url);
+        } catch (err) {
+            console.error(`Failed to export pay stubs for run ${runId}:`, err);
+            setError(`Failed to export pay stubs for run ${runId}`);
+        } finally {
+            setIsExporting(false);
+        }
+    };
+
     if (isLoading) return <div>Loading pay stubs for Run ID: {runId}...</div>;
 
 
@@ -67,6 +107,12 @@ function PayRunStubsViewer() {
              </button>
             <h2>Pay Stubs for {runInfo?.info || `Run ID ${runId}`}</h2>
             {error && <div style={{ color: 'red', marginBottom: '10px' }}>Error: {error}</div>}
+            <button onClick={() => exportStubs('csv')} disabled={isExporting}>
+                {isExporting ? 'Exporting...' : 'Export CSV'}
+            </button>
+            <button onClick={() => exportStubs('ndjson')} disabled={isExporting} style={{ marginLeft: '10px' }}>
+                Export NDJSON
+            </button>
 
              <table border="1" style={{ width: '100%', borderCollapse: 'collapse', marginTop: '15px' }}>
                 <thead>
@@ -101,6 +147,11 @@ function PayRunStubsViewer() {
                      )}
                 </tbody>
              </table>
+            {nextPage && (
+                <button onClick={loadMore} disabled={isLoadingMore} style={{ marginTop: '10px' }}>
+                    {isLoadingMore ? 'Loading...' : 'Load More'}
+                </button>
+            )}
         </div>
     );
 }
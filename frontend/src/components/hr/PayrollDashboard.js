@@ -13,6 +13,7 @@ function PayrollDashboard() {
     const [newRunStartDate, setNewRunStartDate] = useState('');
     const [newRunEndDate, setNewRunEndDate] = useState('');
     const [newRunPayDate, setNewRunPayDate] = useState('');
+    const [progressByRun, setProgressByRun] = useState({}); // runId -> { processed, total }
     const { getToken } = useAuth();
 
     // Removed unused formatDate function
@@ -47,6 +48,28 @@ function PayrollDashboard() {
         fetchPayRuns();
     }, [fetchPayRuns]);
 
+    // Processing runs are handled by a background worker: poll their progress until they finish
+    const processingRunIds = payRuns.filter(run => run.status === 'Processing').map(run => run.id).join(',');
+    useEffect(() => {
+        if (!processingRunIds) return undefined;
+        const pollProgress = async () => {
+            try {
+                const apiClient = await getAuthenticatedInstance(getToken);
+                const results = await Promise.all(
+                    processingRunIds.split(',').map(id => apiClient.get(`/payroll/runs/${id}/progress/`).then(res => [id, res.data]))
+                );
+                setProgressByRun(current => ({ ...current, ...Object.fromEntries(results) }));
+                if (results.some(([, progress]) => progress.pay_run_status !== 'Processing')) {
+                    fetchPayRuns(); // A run finished: refresh statuses
+                }
+            } catch (err) {
+                console.error("Failed to fetch payroll progress:", err);
+            }
+        };
+        const intervalId = setInterval(pollProgress, 3000);
+        return () => clearInterval(intervalId);
+    }, [processingRunIds, getToken, fetchPayRuns]);
+
     // Handle Creating New Pay Run
      const handleCreatePayRun = async (e) => {
          e.preventDefault();
@@ -97,7 +120,7 @@ function PayrollDashboard() {
 
              const response = await apiClient.post(`/payroll/runs/${runId}/process/`);
             alert(response.data.message || 'Payroll processing requested successfully.'); // Basic feedback
-            fetchPayRuns(); // Refresh the list fully after processing
+            fetchPayRuns(); // Run is now 'Processing'; progress is polled until the worker finishes
          } catch (err) {
              console.error(`Failed to process payroll run ${runId}:`, err);
              const errMsg = err.response?.data?.error || err.response?.data?.detail || `Failed processing run ${runId}`;
@@ -147,7 +170,15 @@ function PayrollDashboard() {
                                         </button>
                                     )}
                                     {(run.status === 'Processing...' || run.status === 'Processing') && (
-                                         <button disabled>Processing...</button>
+                                         <button disabled>
+                                             Processing...{progressByRun[run.id] && ` ${progressByRun[run.id].processed}/${progressByRun[run.id].total}`}
+                                         </button>
+                                    )}
+
+                                    {run.status === 'Failed' && (
+                                        <button onClick={() => handleProcessPayroll(run.id)}>
+                                             Resume Payroll
+                                        </button>
                                     )}
 
                                      {(run.status === 'Completed' || run.status === 'Failed') && (
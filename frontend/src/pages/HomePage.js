@@ -2,14 +2,16 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '@clerk/clerk-react';
 import { useUserProfile } from '../contexts/UserProfileContext';
-import { getAuthenticatedInstance } from '../api/axiosInstance';
+import { getAuthenticatedInstance, fetchPage } from '../api/axiosInstance';
 // Import components for displaying directory etc. later
 
 const HomePage = () => {
     const { userProfile, isLoading: profileLoading, error: profileError } = useUserProfile();
     const { getToken } = useAuth();
     const [employees, setEmployees] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [isLoading, setIsLoading] = useState(false);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const [error, setError] = useState('');
     
 
@@ -20,8 +22,9 @@ const HomePage = () => {
             setError('');
             try {
                 const apiClient = await getAuthenticatedInstance(getToken);
-                const response = await apiClient.get('/employees/'); // Basic list endpoint
-                setEmployees(response.data);
+                const page = await fetchPage(apiClient, '/employees/'); // Basic list endpoint
+                setEmployees(page.results);
+                setNextPage(page.next);
             } catch (err) {
                 console.error("Failed to fetch employees:", err);
                 setError(err.response?.data?.error || 'Failed to load employee directory');
@@ -35,6 +38,21 @@ const HomePage = () => {
         }
     }, [getToken, userProfile]); // Depend on profile being loaded
 
+    const loadMore = async () => {
+        setIsLoadingMore(true);
+        try {
+            const apiClient = await getAuthenticatedInstance(getToken);
+            const page = await fetchPage(apiClient, nextPage);
+            setEmployees((current) => [...current, ...page.results]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error("Failed to fetch more employees:", err);
+            setError(err.response?.data?.error || 'Failed to load employee directory');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     
     if (profileLoading) return <div>Loading your profile...</div>;
     if (!userProfile) return <div>Error loading profile data.</div>;
@@ -60,6 +78,11 @@ const HomePage = () => {
                     ))}
                 </ul>
              )}
+             {!isLoading && nextPage && (
+                 <button onClick={loadMore} disabled={isLoadingMore}>
+                     {isLoadingMore ? 'Loading...' : 'Load More'}
+                 </button>
+             )}
             {/* Add Search/Filter inputs here later */}
         </div>
     );
@@ -1,12 +1,14 @@
 // src/pages/MyPaystubsPage.js
 import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '@clerk/clerk-react';
-import { getAuthenticatedInstance } from '../api/axiosInstance';
+import { getAuthenticatedInstance, fetchPage } from '../api/axiosInstance';
 import { format } from 'date-fns';
 
 function MyPaystubsPage() {
     const [paystubs, setPaystubs] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const { getToken } = useAuth();
 
@@ -23,12 +25,14 @@ function MyPaystubsPage() {
         setError(null);
         try {
             const apiClient = await getAuthenticatedInstance(getToken);
-            const response = await apiClient.get('/my/paystubs/');
-            setPaystubs(response.data || []);
+            const page = await fetchPage(apiClient, '/my/paystubs/');
+            setPaystubs(page.results);
+            setNextPage(page.next);
         } catch (err) {
             console.error("Failed to fetch my paystubs:", err);
             setError(err.response?.data?.error || 'Failed to load paystubs');
             setPaystubs([]);
+            setNextPage(null);
         } finally {
             setIsLoading(false);
         }
@@ -38,6 +42,21 @@ function MyPaystubsPage() {
         fetchMyPaystubs();
     }, [fetchMyPaystubs]);
 
+    const loadMore = async () => {
+        setIsLoadingMore(true);
+        try {
+            const apiClient = await getAuthenticatedInstance(getToken);
+            const page = await fetchPage(apiClient, nextPage);
+            setPaystubs((current) => [...current, ...page.results]);
+            setNextPage(page.next);
+        } catch (err) {
+            console.error("Failed to fetch more paystubs:", err);
+            setError(err.response?.data?.error || 'Failed to load paystubs');
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
      if (isLoading) return <div>Loading your paystubs...</div>;
 
     return (
@@ -74,6 +93,11 @@ function MyPaystubsPage() {
                      )}
                  </tbody>
              </table>
+            {nextPage && (
+                <button onClick={loadMore} disabled={isLoadingMore} style={{ marginTop: '10px' }}>
+                    {isLoadingMore ? 'Loading...' : 'Load More'}
+                </button>
+            )}
         </div>
     );
 }
@@ -0,0 +1,113 @@
+# hrms_backend/config_loader.py
+"""
+AWS SSM Parameter Store values for settings.py, kept off the import path.
+
+All parameters are fetched in one GetParameters call and written to a JSON snapshot file. Later
+processes (manage.py commands, gunicorn workers) read that file instead of calling SSM, and boto3
+(~0.2 s to import) is only imported when the snapshot is missing or older than its TTL. A refresh
+that fails is recorded in the snapshot as well. Until the retry interval has passed, processes
+then use the last known values, or the defaults, without trying again. So one unreachable SSM
+costs one short timeout, not one per worker. Refreshes are serialised with flock, so a worker pool
+that boots at the same moment makes a single call.
+
+The loader never raises: any failure falls back to the snapshot's values or the caller's defaults.
+"""
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError: # Windows: refreshes are not serialised
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600 # Seconds a snapshot is served before it is refreshed
+DEFAULT_RETRY_SECONDS = 300 # After a failed refresh, seconds before SSM is tried again
+DEFAULT_TIMEOUT = 2.0 # Connect/read timeout per SSM call, no retries
+
+
+def read_snapshot(path):
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+        return snapshot if isinstance(snapshot, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def write_snapshot(path, snapshot):
+    """ Atomic replace, so concurrent readers see the old file or the new one, never a partial one. """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'{os.path.basename(path)}.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f)
+        os.chmod(tmp_path, 0o600) # SSM snapshots may hold SecureString values
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+
+def is_current(snapshot, names, ttl, retry_seconds, now):
+    if not set(names) <= set(snapshot.get('names', [])):
+        return False # A parameter was added since the snapshot was taken
+    if now - snapshot.get('fetched_at', 0) < ttl:
+        return True
+    return now - snapshot.get('failed_at', 0) < retry_seconds
+
+
+@contextmanager
+def refresh_lock(path):
+    if fcntl is None:
+        yield
+        return
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def fetch(names, region, timeout):
+    """ {name: value} for the parameters that exist; unknown names are left out. """
+    import boto3 # Imported here so processes with a current snapshot never pay for it
+    from botocore.config import Config
+    client = boto3.client('ssm', region_name=region,
+                          config=Config(connect_timeout=timeout, read_timeout=timeout, retries={'total_max_attempts': 1}))
+    response = client.get_parameters(Names=list(names), WithDecryption=True)
+    if response.get('InvalidParameters'):
+        logger.warning("SSM parameters not found, defaults apply: %s", ', '.join(response['InvalidParameters']))
+    return {parameter['Name']: parameter['Value'] for parameter in response.get('Parameters', [])}
+
+
+def load(names, path, region, ttl=DEFAULT_TTL, retry_seconds=DEFAULT_RETRY_SECONDS, timeout=DEFAULT_TIMEOUT, enabled=True):
+    """ {name: value} for `names` from the snapshot at `path`, refreshing it from SSM when it is stale. """
+    snapshot = read_snapshot(path)
+    if not enabled or is_current(snapshot, names, ttl, retry_seconds, time.time()):
+        return snapshot.get('values', {})
+    try:
+        with refresh_lock(path):
+            snapshot = read_snapshot(path)
+            if is_current(snapshot, names, ttl, retry_seconds, time.time()):
+                return snapshot.get('values', {}) # Another process refreshed while we waited
+            snapshot = refresh(snapshot, names, region, timeout)
+            write_snapshot(path, snapshot)
+    except OSError as exc: # Read-only directory: use what was fetched, for this process only
+        logger.warning("Could not write SSM snapshot %s: %s", path, exc)
+    return snapshot.get('values', {})
+
+
+def refresh(snapshot, names, region, timeout):
+    now = time.time()
+    try:
+        return {'names': sorted(names), 'values': fetch(names, region, timeout), 'fetched_at': now}
+    except Exception as exc: # No credentials, no network, no boto3...: keep the last known values
+        logger.warning("Could not refresh SSM parameters, using %s: %s", 'last known values' if snapshot.get('values') else 'defaults', exc)
+        return {**snapshot, 'names': sorted(names), 'values': snapshot.get('values', {}), 'failed_at': now}
@@ -0,0 +1,147 @@
+# hrms_backend/log_handlers.py
+"""
+Non-blocking logging pieces referenced from settings.LOGGING.
+
+Request threads only put records on an in-memory queue; a QueueListener thread does the
+formatting and the file/console I/O. Sampling and rate-limit filters keep hot-path loggers
+(e.g. api.auth_utils) from flooding that queue.
+"""
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel) # Block until there is room: stop() must not fail on a full queue
+
+
+class AsyncHandler(logging.handlers.QueueHandler):
+    """
+    Base for handlers whose I/O runs on a background listener thread.
+    Subclasses implement build_target(). When the queue is full records are dropped
+    (and counted) rather than blocking the request thread.
+    """
+    def __init__(self, queue_size=10000):
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._closed = False
+        self.target = self.build_target()
+        super().__init__(queue.Queue(queue_size))
+        self._start_listener()
+        atexit.register(self.close)
+        # gunicorn --preload forks after settings are loaded: threads do not survive a fork
+        os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def build_target(self):
+        raise NotImplementedError
+
+    def _start_listener(self):
+        self.listener = _QueueListener(self.queue, self.target, respect_handler_level=True)
+        self.listener.start()
+
+    def _restart_in_child(self):
+        if self._closed:
+            return
+        self.queue = queue.Queue(self.queue_size) # The parent's queue lock may have been held at fork time
+        self._start_listener()
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread, not in the caller
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare this does not format: it only freezes the message
+        # and traceback text so the record can safely cross threads.
+        if not record.args and not record.exc_info:
+            return record # Already final (e.g. f-string messages): nothing to freeze, no copy needed
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        self._closed = True
+        listener = getattr(self, 'listener', None)
+        if listener is not None and listener._thread is not None:
+            listener.stop() # Drains the queue before returning
+        self.target.close()
+        super().close()
+
+
+class AsyncRotatingFileHandler(AsyncHandler):
+    """ Size-rotated log file written by the listener thread. """
+    def __init__(self, filename, maxBytes=10 * 1024 * 1024, backupCount=5, encoding='utf-8', queue_size=10000):
+        self.filename = filename
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.encoding = encoding
+        super().__init__(queue_size=queue_size)
+
+    def build_target(self):
+        return logging.handlers.RotatingFileHandler(
+            self.filename, maxBytes=self.maxBytes, backupCount=self.backupCount, encoding=self.encoding, delay=True)
+
+
+class AsyncStreamHandler(AsyncHandler):
+    """ Console output written by the listener thread. """
+    def __init__(self, stream=None, queue_size=10000):
+        self.stream = stream
+        super().__init__(queue_size=queue_size)
+
+    def build_target(self):
+        return logging.StreamHandler(self.stream or sys.stderr)
+
+
+class SamplingFilter(logging.Filter):
+    """ Keeps roughly `rate` of the records below `always_level`; records at or above it always pass. """
+    def __init__(self, name='', rate=1.0, always_level='WARNING'):
+        super().__init__(name)
+        self.rate = float(rate)
+        self.always_level = logging._checkLevel(always_level)
+
+    def filter(self, record):
+        if record.levelno >= self.always_level or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class RateLimitFilter(logging.Filter):
+    """ Token bucket: at most `rate` records per `per` seconds below `always_level`; the rest are counted and dropped. """
+    def __init__(self, name='', rate=50, per=1.0, always_level='ERROR'):
+        super().__init__(name)
+        self.rate = float(rate)
+        self.per = float(per)
+        self.always_level = logging._checkLevel(always_level)
+        self.suppressed = 0
+        self._allowance = self.rate
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= self.always_level:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rate, self._allowance + (now - self._last_check) * self.rate / self.per)
+            self._last_check = now
+            if self._allowance < 1.0:
+                self.suppressed += 1
+                return False
+            self._allowance -= 1.0
+            return True
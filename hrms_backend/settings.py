@@ -2,9 +2,10 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-import boto3 # Import boto3 to fetch parameters
 import logging
 
+from . import config_loader
+
 logger = logging.getLogger(__name__)
 
 load_dotenv() # Keep loading from .env for local dev, override below
@@ -13,74 +14,51 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 LOG_FILE_PATH_DEBUG = BASE_DIR / 'logs/django.log'
 
-# --- Fetch Secrets from AWS Parameter Store ---
-# Assumes EC2 instance has role with SSM GetParameter permissions
-try:
-    # MODIFIED: Specify your region
-    ssm = boto3.client('ssm', region_name='us-east-1')
-
-    def get_ssm_parameter(name, default=None):
-        try:
-            response = ssm.get_parameter(Name=name, WithDecryption=True)
-            return response['Parameter']['Value']
-        except Exception as e:
-            logger.error(f"Warning: Could not fetch SSM parameter '{name}'. Error: {e}")
-            if default is not None:
-                logger.error(f"Using default value for {name}.")
-                return default
-            else:
-                raise # Re-raise if no default and param is mandatory
-
-    # Override settings from Parameter Store if available
-    SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', "GuessWhat?")
-    CLERK_SECRET_KEY = os.getenv('CLERK_SECRET_KEY', "sk_test_8HFxPqpjfxZuMLeEElsX4t3tVBlEp9eZtW0QpMOWuO")
-    CLERK_PUBLISHABLE_KEY = os.getenv('VITE_CLERK_PUBLISHABLE_KEY', "pk_test_YmFsYW5jZWQtcGFycm90LTIxLmNsZXJrLmFjY291bnRzLmRldiQ")
-    CLERK_ISSUER_URL = os.getenv('CLERK_ISSUER_URL', "https://balanced-parrot-21.clerk.accounts.dev")
-    CLERK_JWKS_URL = os.getenv('CLERK_JWKS_URL', "https://balanced-parrot-21.clerk.accounts.dev/.well-known/jwks.json")
-    logger.info(f"DEBUG settings.py: CLERK_JWKS_URL is {CLERK_JWKS_URL} in try block")
-
-    DB_NAME = os.getenv('DB_NAME', "hrms_db")
-    DB_USER = os.getenv('DB_USER', "db_admin")
-    DB_PASSWORD = os.getenv('DB_PASSWORD', "xD1fy852I9kl")
-    DB_HOST = os.getenv('DB_HOST', "hrms-db.can0qyu46og4.us-east-1.rds.amazonaws.com")
-    DB_PORT = os.getenv('DB_PORT', '3306') # Default MySQL port
-
-    # Debug requires careful handling - fetch from SSM or use env var
-    # Get DEBUG value - ensure it's treated as boolean
-    debug_param = get_ssm_parameter('/hrms/prod/debug', default='False').strip().lower()
-    DEBUG = debug_param in ['true', '1', 't', 'y', 'yes']
-
-    # If your Nginx is correctly setting X-Forwarded-Proto, Django can use these
-    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
-    SECURE_SSL_REDIRECT = os.getenv('DJANGO_SECURE_SSL_REDIRECT', 'True').lower() == 'true' # True in prod
-    SESSION_COOKIE_SECURE = os.getenv('DJANGO_SESSION_COOKIE_SECURE', 'True').lower() == 'true' # True in prod
-    CSRF_COOKIE_SECURE = os.getenv('DJANGO_CSRF_COOKIE_SECURE', 'True').lower() == 'true' # True in prod
-    # Allowed hosts - GET FROM SSM OR ENV VAR
-    allowed_hosts_param = get_ssm_parameter(
-        '/hrms/prod/allowed_hosts',
-        default='localhost,ec2-54-165-184-90.compute-1.amazonaws.com,54.165.184.90'
-    )
-    ALLOWED_HOSTS = [host.strip() for host in allowed_hosts_param.split(',') if host.strip()]
-
-
-except Exception as e:
-    logger.error(f"CRITICAL: Could not initialize settings from SSM. Error: {e}")
-    # Define minimal fallbacks or raise an exception
-    # Fallback (INSECURE - replace or ensure parameters are fetched)
-    SECRET_KEY = os.getenv('DJANGO_SECRET_KEY',"GuessWhat?")
-    CLERK_SECRET_KEY = os.getenv('CLERK_SECRET_KEY', "sk_test_8HFxPqpjfxZuMLeEElsX4t3tVBlEp9eZtW0QpMOWuO")
-    CLERK_PUBLISHABLE_KEY = os.getenv('VITE_CLERK_PUBLISHABLE_KEY', "pk_test_YmFsYW5jZWQtcGFycm90LTIxLmNsZXJrLmFjY291bnRzLmRldiQ")
-    CLERK_ISSUER_URL = os.getenv('CLERK_ISSUER_URL',"https://balanced-parrot-21.clerk.accounts.dev")
-    print(f"DEBUG settings.py: CLERK_ISSUER_URL is {CLERK_ISSUER_URL} in except block")
-    CLERK_JWKS_URL = os.getenv('CLERK_JWKS_URL', "https://balanced-parrot-21.clerk.accounts.dev/.well-known/jwks.json")
-    DEBUG = os.getenv('DEBUG', 'False').lower() in ['true', '1']
-    # MODIFIED: Fallback ALLOWED_HOSTS to include EC2 details if SSM fails catastrophically
-    ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'ec2-54-165-184-90.compute-1.amazonaws.com', '54.165.184.90']
-    DB_NAME = os.getenv('DB_NAME', 'test_db')         # <-- Add this
-    DB_USER = os.getenv('DB_USER', 'test_user')       # <-- Add this
-    DB_PASSWORD = os.getenv('DB_PASSWORD', 'test_pw') # <-- Add this
-    DB_HOST = os.getenv('DB_HOST', 'localhost')
-    DB_PORT = os.getenv('DB_PORT', '3306')
+# --- Settings from AWS Parameter Store ---
+# Assumes EC2 instance has role with SSM GetParameter permissions. Values are read from a local
+# snapshot; SSM is only called when it is older than HRMS_SSM_TTL seconds (hrms_backend/config_loader.py).
+# Set HRMS_SSM_ENABLED=false to skip SSM entirely (local development, tests).
+SSM_PARAMETERS = {
+    '/hrms/prod/debug': 'False',
+    '/hrms/prod/allowed_hosts': 'localhost,ec2-54-165-184-90.compute-1.amazonaws.com,54.165.184.90',
+}
+ssm_values = config_loader.load(
+    SSM_PARAMETERS,
+    path=os.getenv('HRMS_SSM_SNAPSHOT', str(BASE_DIR / '.ssm-snapshot.json')),
+    region=os.getenv('HRMS_SSM_REGION', 'us-east-1'),
+    ttl=int(os.getenv('HRMS_SSM_TTL', str(config_loader.DEFAULT_TTL))),
+    retry_seconds=int(os.getenv('HRMS_SSM_RETRY_SECONDS', str(config_loader.DEFAULT_RETRY_SECONDS))),
+    enabled=os.getenv('HRMS_SSM_ENABLED', 'True').lower() == 'true',
+)
+
+
+def get_ssm_parameter(name):
+    return ssm_values.get(name, SSM_PARAMETERS[name])
+
+
+SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', "GuessWhat?")
+CLERK_SECRET_KEY = os.getenv('CLERK_SECRET_KEY', "sk_test_8HFxPqpjfxZuMLeEElsX4t3tVBlEp9eZtW0QpMOWuO")
+CLERK_PUBLISHABLE_KEY = os.getenv('VITE_CLERK_PUBLISHABLE_KEY', "pk_test_YmFsYW5jZWQtcGFycm90LTIxLmNsZXJrLmFjY291bnRzLmRldiQ")
+CLERK_ISSUER_URL = os.getenv('CLERK_ISSUER_URL', "https://balanced-parrot-21.clerk.accounts.dev")
+CLERK_JWKS_URL = os.getenv('CLERK_JWKS_URL', "https://balanced-parrot-21.clerk.accounts.dev/.well-known/jwks.json")
+
+DB_NAME = os.getenv('DB_NAME', "hrms_db")
+DB_USER = os.getenv('DB_USER', "db_admin")
+DB_PASSWORD = os.getenv('DB_PASSWORD', "xD1fy852I9kl")
+DB_HOST = os.getenv('DB_HOST', "hrms-db.can0qyu46og4.us-east-1.rds.amazonaws.com")
+DB_PORT = os.getenv('DB_PORT', '3306') # Default MySQL port
+
+# Get DEBUG value - ensure it's treated as boolean
+DEBUG = get_ssm_parameter('/hrms/prod/debug').strip().lower() in ['true', '1', 't', 'y', 'yes']
+
+# If your Nginx is correctly setting X-Forwarded-Proto, Django can use these
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SECURE_SSL_REDIRECT = os.getenv('DJANGO_SECURE_SSL_REDIRECT', 'True').lower() == 'true' # True in prod
+SESSION_COOKIE_SECURE = os.getenv('DJANGO_SESSION_COOKIE_SECURE', 'True').lower() == 'true' # True in prod
+CSRF_COOKIE_SECURE = os.getenv('DJANGO_CSRF_COOKIE_SECURE', 'True').lower() == 'true' # True in prod
+SECURE_REDIRECT_EXEMPT = [r'^api/health/'] # Load balancer probes come over plain HTTP
+# Allowed hosts - GET FROM SSM OR ENV VAR
+ALLOWED_HOSTS = [host.strip() for host in get_ssm_parameter('/hrms/prod/allowed_hosts').split(',') if host.strip()]
 
 
 # CSRF Trusted Origins (Needed if Frontend/Backend on different domains)
@@ -130,6 +108,7 @@ INSTALLED_APPS = [ # Ensure boto3 is not needed here usually
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.ServerTimingMiddleware', # SQL query count / DB time per request as a Server-Timing header
     'whitenoise.middleware.WhiteNoiseMiddleware', # Added for serving static admin files easily
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -140,6 +119,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+REST_FRAMEWORK = {
+    # Verify the Clerk token once per request; role checks are stateless permission classes (api/auth_utils.py)
+    'DEFAULT_AUTHENTICATION_CLASSES': ['api.auth_utils.ClerkAuthentication'],
+}
+
 ROOT_URLCONF = 'hrms_backend.urls'
 
 TEMPLATES = [
@@ -170,6 +154,9 @@ DATABASES = {
         'HOST': DB_HOST,
         'PORT': DB_PORT,
         'OPTIONS': {'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"},
+        # Keep each worker thread's connection between requests (checked before reuse) instead of reconnecting per request
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -209,23 +196,72 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # https://docs.djangoproject.com/en/stable/ref/settings/#default-auto-field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Clerk JWKS keys (api/auth_utils.py): refreshed in the background REFRESH_AHEAD seconds before the TTL ends
+CLERK_JWKS_CACHE_TTL = int(os.getenv('CLERK_JWKS_CACHE_TTL', '3600'))
+CLERK_JWKS_REFRESH_AHEAD = int(os.getenv('CLERK_JWKS_REFRESH_AHEAD', '300'))
+# One JWKS snapshot file shared by the workers on a host, so one of them fetches per TTL ('' disables)
+CLERK_JWKS_STORE = os.getenv('CLERK_JWKS_STORE', str(BASE_DIR / '.jwks-store.json'))
+# Packaged snapshot (`manage.py snapshot_jwks`) that verifies tokens before the first fetch
+CLERK_JWKS_FALLBACK = os.getenv('CLERK_JWKS_FALLBACK', str(BASE_DIR / 'api' / 'jwks_fallback.json'))
 
-# Logging configuration (Example - customize as needed)
+# Verified Clerk token cache (api/auth_utils.py): max distinct tokens kept, each until its exp claim
+CLERK_TOKEN_CACHE_SIZE = int(os.getenv('CLERK_TOKEN_CACHE_SIZE', '1024'))
+
+# Per-process clerk_id -> role/is_active cache (api/auth_utils.py), seconds
+CLERK_PRINCIPAL_CACHE_TTL = int(os.getenv('CLERK_PRINCIPAL_CACHE_TTL', '30'))
+# How often each process evicts users changed elsewhere (by User.updated_at), seconds
+CLERK_PRINCIPAL_SYNC_INTERVAL = float(os.getenv('CLERK_PRINCIPAL_SYNC_INTERVAL', '2'))
+
+# Clerk webhook inbox (api/webhooks.py): events applied per batch, days processed events are kept for dedupe
+CLERK_WEBHOOK_BATCH_SIZE = int(os.getenv('CLERK_WEBHOOK_BATCH_SIZE', '500'))
+CLERK_WEBHOOK_RETENTION_DAYS = int(os.getenv('CLERK_WEBHOOK_RETENTION_DAYS', '7'))
+
+# Payroll engine (api/payroll.py)
+PAYROLL_BATCH_SIZE = int(os.getenv('PAYROLL_BATCH_SIZE', '1000')) # Employees per SELECT / bulk INSERT
+PAYROLL_WORKERS = int(os.getenv('PAYROLL_WORKERS', '1')) # >1 computes stubs in a process pool
+PAYROLL_JOB_STALE_SECONDS = int(os.getenv('PAYROLL_JOB_STALE_SECONDS', '600')) # Reclaim Running jobs without a heartbeat
+PAYROLL_JOB_MAX_ATTEMPTS = int(os.getenv('PAYROLL_JOB_MAX_ATTEMPTS', '3')) # Orphaned claims before a job is failed
+PAYROLL_EXPORT_CHUNK_SIZE = int(os.getenv('PAYROLL_EXPORT_CHUNK_SIZE', '2000')) # Stubs per query when streaming an export
+EMPLOYEE_IMPORT_BATCH_SIZE = int(os.getenv('EMPLOYEE_IMPORT_BATCH_SIZE', '500')) # CSV rows validated/written per batch
+
+# Per-process warm-up from ApiConfig.ready() (api/warmup.py); wsgi.py/asgi.py turn it on for server processes
+WARMUP_ON_START = os.getenv('HRMS_WARMUP', 'False').lower() == 'true'
+
+# Server-Timing header with per-request SQL count and DB time (api/middleware.py)
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'True').lower() == 'true'
+
+
+# Logging configuration
+# Handlers only enqueue records; a listener thread per handler does the formatting and I/O
+# (hrms_backend/log_handlers.py). The auth hot path is sampled and rate limited.
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
         'console': {
-            'class': 'logging.StreamHandler',
+            '()': 'hrms_backend.log_handlers.AsyncStreamHandler',
             'formatter': 'simple',
-            'level': 'DEBUG', # Keep console at DEBUG for now
+            'level': os.getenv('DJANGO_CONSOLE_LOG_LEVEL', 'INFO'),
         },
         'file': {
-            'level': 'DEBUG', # Temporarily set file to DEBUG to capture everything
-            'class': 'logging.FileHandler',
+            '()': 'hrms_backend.log_handlers.AsyncRotatingFileHandler',
+            'level': os.getenv('DJANGO_FILE_LOG_LEVEL', 'INFO'),
             # Ensure this path is writable by the user Gunicorn runs as
             'filename': BASE_DIR / 'logs/django.log', # Corrected path to be inside project if BASE_DIR is project root
-             'formatter': 'verbose',
+            'maxBytes': int(os.getenv('DJANGO_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+            'backupCount': int(os.getenv('DJANGO_LOG_BACKUP_COUNT', '5')),
+            'formatter': 'verbose',
+        },
+    },
+    'filters': {
+        'auth_sampling': { # Keep a fraction of per-request DEBUG/INFO lines; warnings and errors always pass
+            '()': 'hrms_backend.log_handlers.SamplingFilter',
+            'rate': float(os.getenv('AUTH_LOG_SAMPLE_RATE', '0.01')),
+        },
+        'auth_rate_limit': { # Cap what is left (incl. warnings) during bursts; errors always pass
+            '()': 'hrms_backend.log_handlers.RateLimitFilter',
+            'rate': int(os.getenv('AUTH_LOG_RATE_LIMIT', '20')),
+            'per': 1.0,
         },
     },
     'formatters': { # Define formatters first
@@ -250,12 +286,13 @@ LOGGING = {
         },
         'api': { # Specific logger for your 'api' app
             'handlers': ['console', 'file'],
-            'level': 'DEBUG', # Set to DEBUG to capture all levels (INFO, ERROR, etc.)
+            'level': os.getenv('API_LOG_LEVEL', 'INFO'),
             'propagate': False, # Don't let it bubble up to root if handled here
         },
-        'api.auth_utils': { # Even more specific for the module
+        'api.auth_utils': { # Runs on every request: sampled and rate limited
             'handlers': ['console', 'file'],
-            'level': 'DEBUG', # DEBUG for this module specifically
+            'level': os.getenv('AUTH_LOG_LEVEL', 'INFO'),
+            'filters': ['auth_sampling', 'auth_rate_limit'],
             'propagate': False,
         }
     },
@@ -12,5 +12,6 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hrms_backend.settings")
+os.environ.setdefault("HRMS_WARMUP", "true") # Server process: warm up before taking traffic (api/warmup.py)
 
 application = get_wsgi_application()